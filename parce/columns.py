@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Export tokens as column arrays, e.g. for analytics on large corpora.
+
+A :class:`TokenColumns` object holds five :class:`array.array` columns,
+``pos``, ``end``, ``action``, ``lexicon`` and ``depth``, with one entry per
+token. Actions and lexicons are stored as integer codes; use
+:meth:`~TokenColumns.action_table` and :meth:`~TokenColumns.lexicon_table` to
+get the objects the codes refer to.
+
+The columns can be filled directly from the events of a
+:class:`~parce.lexer.Lexer`, without creating a tree and Token objects, or
+from an existing tree::
+
+    >>> import parce
+    >>> from parce.lang.css import Css
+    >>> from parce.lexer import Lexer
+    >>> c = Lexer([Css.root]).columns("h1 { color: red; }")
+    >>> list(c.pos)
+    [0, 3, 5, 10, 12, 15, 17]
+    >>> [c.action_table()[a] for a in c.action]
+    [Name.Tag, Delimiter.Bracket, Name.Property.Definition, Delimiter, Literal.Color, Delimiter, Delimiter.Bracket]
+    >>> c = parce.root(Css.root, "h1 { color: red; }").columns()
+
+The arrays support the buffer protocol, so they can be wrapped in a
+:class:`memoryview` or converted to NumPy arrays without copying. If NumPy is
+installed, :meth:`~TokenColumns.numpy` returns the columns as NumPy arrays.
+
+To use the same codes for multiple documents, pass the ``actions`` and
+``lexicons`` dictionaries of one TokenColumns object to the next one.
+
+"""
+
+import array
+
+
+class TokenColumns:
+    """Column arrays describing tokens.
+
+    The ``actions`` and ``lexicons`` dictionaries map actions and lexicons to
+    their codes; new codes are added as needed. Specify them to share codes
+    between multiple TokenColumns objects.
+
+    """
+    names = ('pos', 'end', 'action', 'lexicon', 'depth')  #: The names of the columns.
+
+    def __init__(self, actions=None, lexicons=None):
+        self.pos = array.array('q')     #: The position of every token.
+        self.end = array.array('q')     #: The end position of every token.
+        self.action = array.array('l')  #: The action code of every token.
+        self.lexicon = array.array('l') #: The lexicon code of every token.
+        self.depth = array.array('l')   #: The depth (1 for the root lexicon) of every token.
+        self.actions = {} if actions is None else actions       #: Maps action to code.
+        self.lexicons = {} if lexicons is None else lexicons    #: Maps lexicon to code.
+
+    def __len__(self):
+        return len(self.pos)
+
+    def __repr__(self):
+        return "<{} ({} tokens)>".format(type(self).__name__, len(self))
+
+    def action_table(self):
+        """Return a list with the action for every action code."""
+        return _table(self.actions)
+
+    def lexicon_table(self):
+        """Return a list with the lexicon for every lexicon code."""
+        return _table(self.lexicons)
+
+    def columns(self):
+        """Return a dictionary mapping the column names to the arrays."""
+        return {name: getattr(self, name) for name in self.names}
+
+    def numpy(self):
+        """Return a dictionary mapping the column names to NumPy arrays.
+
+        The NumPy arrays share the memory with our arrays, so they should not
+        be used anymore after adding more tokens. Raises ImportError if NumPy
+        is not installed.
+
+        """
+        import numpy
+        return {name: numpy.frombuffer(a, a.typecode) for name, a in self.columns().items()}
+
+    def add_events(self, events, lexicons):
+        """Add the tokens from the events of a Lexer.
+
+        The ``lexicons`` must be the list of lexicons the lexer started with,
+        the first one being the root lexicon.
+
+        """
+        stack = list(lexicons)
+        action_codes = self.actions
+        lexicon_codes = self.lexicons
+        pos_append = self.pos.append
+        end_append = self.end.append
+        action_append = self.action.append
+        lexicon_append = self.lexicon.append
+        depth_append = self.depth.append
+        lexicon_code = lexicon_codes.setdefault(stack[-1], len(lexicon_codes))
+        depth = len(stack)
+        for target, lexemes in events:
+            if target:
+                if target.pop:
+                    del stack[target.pop:]
+                for lexicon in target.push:
+                    lexicon_codes.setdefault(lexicon, len(lexicon_codes))
+                stack.extend(target.push)
+                lexicon_code = lexicon_codes[stack[-1]]
+                depth = len(stack)
+            for pos, text, action in lexemes:
+                try:
+                    action_code = action_codes[action]
+                except KeyError:
+                    action_code = action_codes[action] = len(action_codes)
+                pos_append(pos)
+                end_append(pos + len(text))
+                action_append(action_code)
+                lexicon_append(lexicon_code)
+                depth_append(depth)
+
+    def add_tree(self, context):
+        """Add all tokens from the context."""
+        action_codes = self.actions
+        lexicon_codes = self.lexicons
+        pos_append = self.pos.append
+        end_append = self.end.append
+        action_append = self.action.append
+        lexicon_append = self.lexicon.append
+        depth_append = self.depth.append
+        stack = []
+        depth = context.depth() + 1
+        lexicon_code = lexicon_codes.setdefault(context.lexicon, len(lexicon_codes))
+        nodes = iter(context)
+        while True:
+            for n in nodes:
+                if n.is_token:
+                    try:
+                        action_code = action_codes[n.action]
+                    except KeyError:
+                        action_code = action_codes[n.action] = len(action_codes)
+                    pos_append(n.pos)
+                    end_append(n.pos + len(n.text))
+                    action_append(action_code)
+                    lexicon_append(lexicon_code)
+                    depth_append(depth)
+                else:
+                    stack.append((nodes, lexicon_code))
+                    nodes = iter(n)
+                    lexicon_code = lexicon_codes.setdefault(n.lexicon, len(lexicon_codes))
+                    depth += 1
+                    break
+            else:
+                if not stack:
+                    break
+                nodes, lexicon_code = stack.pop()
+                depth -= 1
+
+
+def _table(codes):
+    """Return a list with the keys of the dictionary at the index of their value."""
+    table = [None] * len(codes)
+    for obj, code in codes.items():
+        table[code] = obj
+    return table
@@ -175,8 +175,13 @@ class StyleSheet:
 
     @classmethod
     def load_from_file(cls, filename):
-        """Return a CSS structure from filename, handling the encoding."""
-        return cls.load_from_data(open(filename, 'rb').read())
+        """Return a CSS structure from filename, handling the encoding.
+
+        The CSS structure is cached; the file is only read and parsed again
+        when its modification time has changed.
+
+        """
+        return _file_cache[filename]
 
     @classmethod
     def from_file(cls, filename, path=None, allow_import=True):
@@ -223,6 +228,7 @@ class StyleSheet:
 
         """
         filenames = {filename}
+        imported_filenames = []
 
         def get_import_rules(values):
             """Yield rules from an @import at-rule.
@@ -245,7 +251,7 @@ class StyleSheet:
                             s = cls.from_css(icss, fname, path, allow_import)
                             yield Condition("import", values, s)
                         else:
-                            self._imported_filenames.append(fname)
+                            imported_filenames.append(fname)
                             yield from get_rules(icss)
                     return
 
@@ -272,7 +278,9 @@ class StyleSheet:
                 rules.append(rule)
             return rules
 
-        return cls(get_rules(css), filename)
+        sheet = cls(get_rules(css), filename)
+        sheet._imported_filenames = imported_filenames
+        return sheet
 
     def __add__(self, other):
         """Create a new StyleSheet by appending the other's rules."""
@@ -360,6 +368,14 @@ class StyleSheet:
         return Atrules(list(get_rules(self.rules)))
 
 
+def _load_file(filename):
+    """Read and parse a CSS file, used by StyleSheet.load_from_file()."""
+    with open(filename, 'rb') as f:
+        return StyleSheet.load_from_data(f.read())
+
+_file_cache = util.file_cache(_load_file)
+
+
 class Style:
     """Represents the list of rules created by the StyleSheet object.
 
@@ -372,14 +388,48 @@ class Style:
     """
     def __init__(self, rules):
         self.rules = rules
+        self._index = None
 
     def __repr__(self):
         return '<{} ({} rules)>'.format(self.__class__.__name__, len(self.rules))
 
+    def _rule_index(self):
+        """Return a dictionary mapping selector keys to lists of rule numbers.
+
+        Every rule is stored under the key of the rightmost compound selector
+        of each of its selector lists (see :func:`selector_key`). The index is
+        rebuilt when the list of rules is changed.
+
+        """
+        rules = self.rules
+        index = self._index
+        if index is None or index[0] is not rules or index[1] != len(rules):
+            keys = collections.defaultdict(list)
+            for n, rule in enumerate(rules):
+                for key in set(selector_key(selectors[-1]) for selectors in rule.prelude):
+                    keys[key].append(n)
+            index = self._index = rules, len(rules), dict(keys)
+        return index[2]
+
     @style_query
     def select_element(self, element):
-        """Select the rules that match with Element."""
-        for rule in self.rules:
+        """Select the rules that match with Element.
+
+        Only the rules are tested that have a key of the element (its id, one
+        of its classes or its name) or no key at all in the rightmost compound
+        selector of one of the selector lists.
+
+        """
+        index = self._rule_index()
+        candidates = set(index.get(None, ()))
+        keys = [("class", c) for c in element.get_classes()]
+        keys.append(("name", element.get_name()))
+        keys.append(("id", element.get_id()))
+        for key in keys:
+            candidates.update(index.get(key, ()))
+        rules = self.rules
+        for n in sorted(candidates):
+            rule = rules[n]
             if element.match(rule.prelude):
                 yield rule
 
@@ -610,9 +660,11 @@ class AbstractElement:
 
         """
         # class
-        classes = self.get_classes()
-        if any(c not in classes for c in selector.get('class_selector', ())):
-            return False
+        class_selector = selector.get('class_selector')
+        if class_selector:
+            classes = self.get_classes()
+            if any(c not in classes for c in class_selector):
+                return False
         # element name?
         if any(n != self.get_name() for n in selector.get('element_selector', ())):
             return False
@@ -620,8 +672,9 @@ class AbstractElement:
         if any(i != self.get_id() for i in selector.get('id_selector', ())):
             return False
         # attrs?
-        attributes = self.get_attributes()
-        for attrname, operator, text, flag in selector.get('attribute_selector', ()):
+        attribute_selector = selector.get('attribute_selector', ())
+        attributes = self.get_attributes() if attribute_selector else None
+        for attrname, operator, text, flag in attribute_selector:
             try:
                 value = attributes[attrname]
             except KeyError:
@@ -650,8 +703,9 @@ class AbstractElement:
                         return False
 
         # pseudo_class?
-        pseudo_classes = self.get_pseudo_classes()
-        for c, selector_list in selector.get('pseudo_class', ()):
+        pseudo_class = selector.get('pseudo_class', ())
+        pseudo_classes = self.get_pseudo_classes() if pseudo_class else None
+        for c, selector_list in pseudo_class:
             result = self._pseudo_class(c)
             if result is None:
                 if c not in pseudo_classes:
@@ -1198,10 +1252,10 @@ class CssTransform(Transform):
         Called by :meth:`sqstring` and :meth:`dqstring`.
 
         """
-        for i in items.tokens():
-            if i.action is String:
+        for i in items:
+            if i.is_token and i.action is a.String:
                 yield i.text
-            elif i.action is a.String.Escape:
+            elif i.is_token and i.action is a.String.Escape:
                 yield self.get_escape(i.text)
 
     def get_ident_token(self, items):
@@ -1383,6 +1437,24 @@ def calculate_specificity(prelude):
     return max(specificities)
 
 
+def selector_key(selector):
+    """Return the key a rule is indexed with for the selector dictionary.
+
+    This is ``("id", id)`` if the selector has an ID selector, otherwise
+    ``("class", name)`` for the last class selector or ``("name", name)``
+    for an element selector. If the selector has none of those, None is
+    returned. An element can only match the selector if it has that key.
+
+    """
+    for key, name in (
+            ("id", "id_selector"),
+            ("class", "class_selector"),
+            ("name", "element_selector")):
+        values = selector.get(name)
+        if values:
+            return key, values[-1]
+
+
 def color2hex(color):
     """Return a hexadecimal string with '#' prepended for the Color instance."""
     r, g, b, a = color
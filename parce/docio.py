@@ -42,9 +42,9 @@ see if an encoding is defined there, and use that for I/O operations.
 import codecs
 import collections
 import io
+import mmap
 import os
 import re
-from urllib.parse import urlparse
 
 from . import util, work
 
@@ -58,6 +58,7 @@ DecodeResult.encoding.__doc__ = "The encoding that was specified or determined,
 
 DEFAULT_ENCODING = "utf-8"      #: The general default encoding, if a Language does not define another.
 TEMP_TEXT_MAXSIZE = 5000        #: The maximum size of a text snippet that is searched for an encoding.
+DECODE_CHUNK_SIZE = 1 << 20     #: The size of the pieces of binary data that are decoded at a time.
 
 
 class DocumentIOMixin:
@@ -104,9 +105,27 @@ class DocumentIOMixin:
         installed. As a convenience, you can specify ``True``, in which case a
         default Transformer is installed.
 
+        The file is memory-mapped, so it is never read into memory as a whole
+        before decoding. The encoding and language are determined from its
+        first :data:`TEMP_TEXT_MAXSIZE` bytes, and the contents are decoded in
+        pieces of :data:`DECODE_CHUNK_SIZE` bytes. (To see a tree of the first
+        part of a large document before it is parsed completely, use a
+        ``worker`` whose :class:`~.treebuilder.TreeBuilder` has a
+        :attr:`~.treebuilder.TreeBuilder.peek_threshold` set.)
+
         """
-        data = open(localfile(url), "rb").read()
-        return cls.from_bytes(data, url, root_lexicon, encoding, errors, newline, registry, mimetype, worker, transformer)
+        with open(localfile(url), "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty file or a file that can't be mapped
+                data = f.read()
+            try:
+                return cls.from_bytes(data, url, root_lexicon, encoding, errors,
+                    newline, registry, mimetype, worker, transformer)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
 
     def save(self, url=None, encoding=None, newline=None):
         """Save the document to a local file.
@@ -144,7 +163,9 @@ class DocumentIOMixin:
         worker = None,
         transformer = None,
     ):
-        """Load text from bytes or bytearray ``data`` and return a Document.
+        """Load text from binary ``data`` and return a Document.
+
+        The ``data`` may be a bytes, bytearray, memoryview or mmap object.
 
         For all the other arguments, see :meth:`load`.
 
@@ -215,6 +236,7 @@ def localfile(url):
     other than ``file:``.
 
     """
+    from urllib.parse import urlparse   # only imported when needed
     u = urlparse(url, allow_fragments=False)
     if not u.netloc:
         if u.scheme == "file":
@@ -234,7 +256,12 @@ def decode_data(
         url = None,
         mimetype = None
     ):
-    """Decode text from the binary (bytes or bytearray) ``data``.
+    """Decode text from the binary ``data``.
+
+    The ``data`` may be a bytes, bytearray, memoryview or mmap object; only its
+    first :data:`TEMP_TEXT_MAXSIZE` bytes are examined to determine the
+    language and the encoding, and then the data is decoded using
+    :func:`decode_chunks`, without copying it first.
 
     Returns a named tuple :class:`DecodeResult` (``root_lexicon``,
     ``text``, ``encoding``).
@@ -264,20 +291,22 @@ def decode_data(
     instruction is consulted, for Html the value of a ``<meta>`` tag with
     ``charset`` or ``http-equiv`` attributes, etc.
 
-    The ``errors`` and ``newline`` arguments will be passed to the underlying
-    :class:`io.TextIOWrapper` reading the file contents.
+    The ``errors`` and ``newline`` arguments have the same meaning as with
+    :class:`io.TextIOWrapper`.
 
     If no ``encoding`` was specified, the returned ``encoding`` is the encoding
     that was finally used to read the text; otherwise it is the specified
     encoding.
 
     """
-    # check and guess the encoding if needed
-    read_enc, data = util.get_bom_encoding(data)
+    # check and guess the encoding if needed, only looking at the beginning
+    head = bytes(data[:TEMP_TEXT_MAXSIZE + 4])
+    read_enc, temp_data = util.get_bom_encoding(head)
+    offset = len(head) - len(temp_data)
 
     # make a temporary piece of text to determine language and encoding
     temp_enc = "latin1" if read_enc is None else read_enc
-    temp_text = data[:TEMP_TEXT_MAXSIZE].decode(temp_enc, 'ignore')
+    temp_text = temp_data[:TEMP_TEXT_MAXSIZE].decode(temp_enc, 'ignore')
 
     if registry is None:
         from parce.registry import registry
@@ -304,10 +333,42 @@ def decode_data(
         encoding = doc_enc or read_enc
 
     # now let Python decode the text
-    text = io.TextIOWrapper(io.BytesIO(data), actual_read_enc, errors, newline).read()
+    text = "".join(decode_chunks(data, actual_read_enc, errors, newline, offset))
     return DecodeResult(root_lexicon, text, encoding)
 
 
+def decode_chunks(data, encoding, errors=None, newline=None, start=0, chunk_size=None):
+    """Yield the text decoded from binary ``data`` in pieces.
+
+    The ``data`` may be a bytes, bytearray, memoryview or mmap object, it is
+    decoded from byte position ``start`` in pieces of ``chunk_size`` bytes
+    (by default :data:`DECODE_CHUNK_SIZE`), using an incremental decoder for
+    the ``encoding``. A multibyte character that is split at a chunk boundary
+    is decoded correctly.
+
+    The ``errors`` and ``newline`` arguments have the same meaning as with
+    :class:`io.TextIOWrapper`: only if ``newline`` is None, the ``"\\r\\n"``
+    and ``"\\r"`` line endings are translated to ``"\\n"``.
+
+    """
+    chunk_size = chunk_size or DECODE_CHUNK_SIZE
+    decoder = codecs.getincrementaldecoder(encoding)(errors or "strict")
+    if newline is None:
+        decoder = io.IncrementalNewlineDecoder(decoder, True)
+    view = memoryview(data)
+    try:
+        end = len(view)
+        for pos in range(start, end, chunk_size):
+            text = decoder.decode(view[pos:pos+chunk_size])
+            if text:
+                yield text
+        text = decoder.decode(b"", True)
+        if text:
+            yield text
+    finally:
+        view.release()
+
+
 def encode_text(text, root_lexicon=None, encoding=None, newline=None):
     """Return a :class:`bytes` object with the encoded text.
 
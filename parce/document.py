@@ -36,16 +36,22 @@ You can use a Cursor to keep track of positions in a document. The position
 changed.
 
 You can use the various ``find_block()`` and ``blocks()`` methods to iterate
-over a Document on a line-by-line basis.
+over a Document on a line-by-line basis. The Document keeps an index of the
+block lengths, which is created when first needed and then updated on every
+change, so finding a block by position or number takes O(log n) time.
 
 """
 
 
+import array
+import bisect
+import collections
 import contextlib
 import itertools
 import re
 import reprlib
-import weakref
+import sys
+import zlib
 
 from . import mutablestring
 from . import util
@@ -66,8 +72,9 @@ class AbstractDocument(mutablestring.AbstractMutableString):
 
     def __init__(self, text="", url=None, encoding=None):
         mutablestring.AbstractMutableString.__init__(self)
-        self._cursors = weakref.WeakSet()
+        self._cursors = CursorRegistry()
         self._revision = 0
+        self._blocks_index = None
         if url:
             self.url = url
         if encoding:
@@ -81,30 +88,38 @@ class AbstractDocument(mutablestring.AbstractMutableString):
 
     def _update_cursors(self, changes):
         """Update the positions of the cursors."""
-        i = 0
-        cursors = sorted(self._cursors, key = lambda c: c.pos)
-        for start, end, text in changes:
-            for c in cursors[i:]:
-                ahead = c.pos > start
-                if ahead:
-                    if end >= c.pos:
-                        c.pos = start
-                    else:
-                        c.pos += start + len(text) - end
-                if c.end is not None and c.end >= start:
-                    if end >= c.end:
-                        c.end = start + len(text)
-                    else:
-                        c.end += start + len(text) - end
-                elif not ahead:
-                    i += 1  # don't consider this cursor any more
+        self._cursors.update(changes)
 
     def _update_text(self, changes):
         """Apply the changes to the text, reimplemented here to also update the Cursor positions."""
         self._update_cursors(changes)
+        self._update_block_index(changes)
         self._revision += 1
         self.modified = True
 
+    def _block_index(self):
+        """Return the :class:`BlockIndex`, creating it if needed."""
+        index = self._blocks_index
+        if index is None or index.revision != self._revision:
+            index = self._blocks_index = BlockIndex(self.text(), self.block_separator)
+            index.revision = self._revision
+        return index
+
+    def _update_block_index(self, changes):
+        """Update the block index (if any) for the changes, before the revision is incremented."""
+        index = self._blocks_index
+        if index is not None:
+            if len(changes) > 32:
+                # recreating the index when needed is faster
+                self._blocks_index = None
+            elif index.revision == self._revision and len(self.block_separator) == 1:
+                for start, end, text in reversed(changes):
+                    index.replace(start, end, text)
+                index.revision += 1
+            else:
+                # a multi-character separator could be joined or split by a change
+                self._blocks_index = None
+
     def revision(self):
         """Return the revision number.
 
@@ -116,12 +131,12 @@ class AbstractDocument(mutablestring.AbstractMutableString):
     def find_start_of_block(self, position):
         """Find the start of the block the position is in."""
         sep = self.block_separator
-        pos = self.text().rfind(sep, 0, position)
+        pos = self.rfind(sep, 0, position)
         return 0 if pos == -1 else pos + len(sep)
 
     def find_end_of_block(self, position):
         """Find the end of the block the position is in."""
-        pos = self.text().find(self.block_separator, position)
+        pos = self.find(self.block_separator, position)
         return len(self) if pos == -1 else pos
 
     def find_block(self, position):
@@ -132,9 +147,10 @@ class AbstractDocument(mutablestring.AbstractMutableString):
         block. (A document has always at least one block).
 
         """
-        pos = self.find_start_of_block(position)
-        end = self.find_end_of_block(pos)
-        return Block(self, pos, end)
+        number, pos, end = self._block_index().find(position)
+        block = Block(self, pos, end)
+        block._block_number = number
+        return block
 
     def find_block_by_number(self, number):
         """Return the :class:`Block` for text line ``number``.
@@ -143,51 +159,25 @@ class AbstractDocument(mutablestring.AbstractMutableString):
         blocks than the specified number. Negative numbers count backwards from
         the end.
 
-        Avoid this method and :meth:`block_count` where you can, they are
-        potentially expensive for large documents. Prefer :meth:`find_block`
-        and :meth:`Block.next_block` or :meth:`Block.previous_block` for
-        iteration.
-
         """
-        text = self.text()
-        sep = self.block_separator
-        l = len(sep)
-        if number >= 0:
-            end = -l
-            for n in range(number + 1):
-                if end == len(text):
-                    return
-                pos = end + l
-                end = text.find(sep, pos)
-                if end == -1:
-                    end = len(text)
-            block = Block(self, pos, end)
-            block._block_number = n
-        else:
-            pos = len(text) + l
-            for n in range(number, 0):
-                if pos == 0:
-                    return
-                end = pos - l
-                pos = text.rfind(sep, 0, end)
-                pos = 0 if pos == -1 else pos + l
+        index = self._block_index()
+        if number < 0:
+            number += index.count()
+        if 0 <= number < index.count():
+            pos, end = index.block(number)
             block = Block(self, pos, end)
-        return block
+            block._block_number = number
+            return block
 
     def block_count(self):
         """Return the number of blocks (lines) in this document.
 
-        This counts the number of occurrences of :attr:`block_separator` in the
+        This is the number of occurrences of :attr:`block_separator` in the
         full text, incremented with 1. A document has always at least one
         block.
 
-        Avoid this method and :meth:`find_block_by_number` where you can, they
-        are potentially expensive for large documents. Prefer
-        :meth:`find_block` and :meth:`Block.next_block` or
-        :meth:`Block.previous_block` for iteration.
-
         """
-        return self.text().count(self.block_separator) + 1
+        return self._block_index().count()
 
     def blocks(self, start=0, end=None):
         """Yield Blocks, starting at position start, ending at end.
@@ -195,17 +185,29 @@ class AbstractDocument(mutablestring.AbstractMutableString):
         Start defaults to 0, end to None, which means iterate to the last block.
 
         """
-        block = self.find_block(start)
-        if end is None:
-            while block:
-                yield block
-                block = block.next_block()
-        elif block:
-            while True:
-                yield block
-                block = block.next_block()
-                if not block or block.pos >= end:
-                    break
+        index = self._block_index()
+        revision = self._revision
+        number = index.find(start)[0]
+        block = None
+        for pos, block_end in index.blocks(number):
+            if block:
+                if end is not None and pos >= end:
+                    return
+                elif self._revision != revision:
+                    # the document was changed while iterating
+                    yield from self._blocks_from(block, end)
+                    return
+            block = Block(self, pos, block_end)
+            block._block_number = number
+            yield block
+            number += 1
+
+    def _blocks_from(self, block, end):
+        """Yield the Blocks following the block, ending at end, using the text."""
+        block = block.next_block()
+        while block and (end is None or block.pos < end):
+            yield block
+            block = block.next_block()
 
     def replace(self, old, new, start=0, end=None, count=0):
         """Replace occurrences of old with new in region start->end.
@@ -216,16 +218,18 @@ class AbstractDocument(mutablestring.AbstractMutableString):
         """
         if old == new:
             return
+        start, end, _ = slice(start, end).indices(len(self))
         text = self[start:end]
         length = len(old)
-        with self:
-            pos = text.find(old)
-            while pos >= 0:
-                self[start+pos:start+pos+length] = new
-                pos = text.find(old, pos + length)
-                count -= 1
-                if count == 0:
-                    break
+        changes = []
+        pos = text.find(old)
+        while pos >= 0:
+            changes.append((start + pos, start + pos + length, new))
+            pos = text.find(old, pos + length)
+            count -= 1
+            if count == 0:
+                break
+        self._apply_bulk_changes(changes)
 
     def re_sub(self, pattern, replacement, start=0, end=None, count=0, re_flags=0):
         """Replace regular expression matches of pattern with replacement.
@@ -247,12 +251,29 @@ class AbstractDocument(mutablestring.AbstractMutableString):
             pattern = re.compile(pattern, re_flags)
         if not callable(replacement):
             replacement = (lambda repl: lambda m: m.expand(repl))(replacement)
+        start, end, _ = slice(start, end).indices(len(self))
         text = self[start:end]
-        with self:
-            for i, m in enumerate(pattern.finditer(text), 1):
-                self[start+m.start():start+m.end()] = replacement(m)
-                if i == count:
-                    break
+        changes = []
+        for i, m in enumerate(pattern.finditer(text), 1):
+            new = replacement(m)
+            if new != m.group():
+                changes.append((start + m.start(), start + m.end(), new))
+            if i == count:
+                break
+        self._apply_bulk_changes(changes)
+
+    def _apply_bulk_changes(self, changes):
+        """Apply a sorted list of non-overlapping (start, end, text) changes.
+
+        Outside an edit context, the changes are applied at once, otherwise
+        they are added to the pending changes.
+
+        """
+        if self._edit_context:
+            for start, end, text in changes:
+                self[start:end] = text
+        elif changes:
+            self._apply_change_list(changes)
 
     def trim(self, start=0, end=None):
         """Remove trialing whitespace in the specified region."""
@@ -307,19 +328,34 @@ class Document(AbstractDocument, mutablestring.MutableString, util.Observable):
     ``"redo_available" (bool)``:
         emitted when the availability of :meth:`redo` changes.
 
+    The undo history can be tuned using some class (or instance) attributes.
+    Consecutive single-character insertions or deletions (typing) are merged
+    into one undo step if ``undo_merge`` is True. Removed text longer than
+    ``undo_compress_size`` characters is stored compressed. If
+    ``undo_limit`` or ``undo_memory_limit`` is set, the oldest undo steps
+    are discarded when there are more steps or when the undo history uses
+    more bytes (see :meth:`undo_memory`).
+
     """
     _in_undo = util.Switch()
     _in_redo = util.Switch()
 
     undo_redo_enabled = True
+    undo_merge = True           #: merge consecutive typing in one undo step
+    undo_compress_size = 16384  #: compress removed text longer than this
+    undo_limit = 0              #: maximum number of undo steps (0: unlimited)
+    undo_memory_limit = 0       #: maximum undo/redo memory in bytes (0: unlimited)
 
     def __init__(self, text="", url=None, encoding=None):
         AbstractDocument.__init__(self, text, url, encoding)
-        mutablestring.MutableString.__init__(self, text)
+        # the storage class follows AbstractDocument in the MRO, by default
+        # MutableString, but a subclass can e.g. mix in RopeString
+        super(AbstractDocument, self).__init__(text)
         util.Observable.__init__(self)
         self._modified = False
-        self._undo_stack = []
-        self._redo_stack = []
+        self._undo_stack = collections.deque()
+        self._redo_stack = collections.deque()
+        self._undo_memory = 0
 
     @property
     def modified(self):
@@ -340,30 +376,108 @@ class Document(AbstractDocument, mutablestring.MutableString, util.Observable):
         """Apply the changes to the text."""
         with self._check_undo_state():
             if self.undo_redo_enabled:
-                self._store_undo(self._reverse_changes(changes))
+                self._store_undo(self._reverse_changes(changes), changes)
             AbstractDocument._update_text(self, changes)
-            mutablestring.MutableString._update_text(self, changes)
+            super(AbstractDocument, self)._update_text(changes)
 
     def _reverse_changes(self, changes):
         """Return the changes that would be needed to undo the given list of changes."""
         def reverse_changes():
+            # get the full text at once if there are many changes
+            current_text = self.text() if len(changes) > 16 else None
             head = 0
-            current_text = self.text()
             for start, end, text in changes:
                 head += start
-                yield (head, head + len(text), current_text[start:end])
+                removed = self._get_text(start, end) if current_text is None \
+                    else current_text[start:end]
+                yield (head, head + len(text), removed)
                 head += len(text) - end
         return list(reverse_changes())
 
-    def _store_undo(self, changes):
-        """Store changes needed to reconstruct the previous state."""
-        state = [changes, self.modified]
+    def _store_undo(self, changes, applied=()):
+        """Store changes needed to reconstruct the previous state.
+
+        A state is a list [changes, modified, size]. Long texts in the changes
+        are compressed, and typing is merged with the previous state if
+        possible, using the ``applied`` changes. Then the oldest states are
+        discarded if the history is too large.
+
+        """
+        if len(changes) > 16:
+            changes = ChangeList(changes, self.undo_compress_size)
+            size = changes.size()
+        else:
+            changes = [(start, end, self._compress_undo_text(text))
+                       for start, end, text in changes]
+            size = _undo_size(changes)
+        state = [changes, self.modified, size]
         if self._in_undo:
             self._redo_stack.append(state)
+        elif self._in_redo:
+            self._undo_stack.append(state)
         else:
+            self._undo_memory -= sum(s[2] for s in self._redo_stack)
+            self._redo_stack.clear()
+            if self._undo_stack and self.undo_merge and self._merge_undo(state, applied):
+                return
             self._undo_stack.append(state)
-            if not self._in_redo:
-                self._redo_stack.clear()
+        self._undo_memory += state[2]
+        self._limit_undo()
+
+    def _merge_undo(self, state, applied):
+        """Merge single-character typing with the last undo state, if possible.
+
+        Returns True if the state was merged. Only merges if the document is
+        modified, so nothing is merged across saving the document. Typing or
+        removing a block separator is never merged.
+
+        """
+        changes, modified, size = state
+        last = self._undo_stack[-1]
+        if not modified or len(changes) != 1 or len(applied) != 1 or len(last[0]) != 1:
+            return False
+        start, end, text = changes[0]
+        lstart, lend, ltext = last[0][0]
+        if type(text) is not str or type(ltext) is not str:
+            return False
+        sep = self.block_separator
+        if end - start == 1 and not text and not ltext and lend == start:
+            # typing: undo removes the inserted text
+            if applied[0][2] == sep:
+                return False
+            merged = (lstart, end, "")
+        elif start == end and len(text) == 1 and text != sep and lstart == lend:
+            if start + 1 == lstart:
+                merged = (start, start, text + ltext)   # backspace
+            elif start == lstart:
+                merged = (start, start, ltext + text)   # delete
+            else:
+                return False
+        else:
+            return False
+        last[0] = [merged]
+        self._undo_memory -= last[2]
+        last[2] = _undo_size(last[0])
+        self._undo_memory += last[2]
+        return True
+
+    def _compress_undo_text(self, text):
+        """Return the text, compressed to bytes if it is long."""
+        if len(text) > self.undo_compress_size:
+            return zlib.compress(text.encode('utf-8', 'surrogatepass'))
+        return text
+
+    def _limit_undo(self):
+        """Discard the oldest undo states if there are too many or they are too large."""
+        stack = self._undo_stack
+        while len(stack) > 1 and (
+                (self.undo_limit and len(stack) > self.undo_limit) or
+                (self.undo_memory_limit and self._undo_memory > self.undo_memory_limit)):
+            self._undo_memory -= stack.popleft()[2]
+
+    def undo_memory(self):
+        """Return the approximate number of bytes used by the undo/redo history."""
+        return self._undo_memory
 
     def _apply_undo_redo(self, switch, stack):
         """Apply changes from the specified stack (undo or redo).
@@ -374,10 +488,11 @@ class Document(AbstractDocument, mutablestring.MutableString, util.Observable):
         if self._edit_context > 0:
             raise RuntimeError("can't undo or redo while in edit context")
         if stack:
-            changes, modified = stack.pop()
-            with switch, self:
-                for start, end, text in changes:
-                    self[start:end] = text
+            changes, modified, size = stack.pop()
+            self._undo_memory -= size
+            with switch:
+                self._apply_change_list([(start, end, _decompress(text))
+                                         for start, end, text in changes])
             self.modified = modified
 
     @contextlib.contextmanager
@@ -417,6 +532,7 @@ class Document(AbstractDocument, mutablestring.MutableString, util.Observable):
         with self._check_undo_state():
             self._undo_stack.clear()
             self._redo_stack.clear()
+            self._undo_memory = 0
 
     def can_undo(self):
         """Return True if undo is possible."""
@@ -437,6 +553,270 @@ class Document(AbstractDocument, mutablestring.MutableString, util.Observable):
         self.emit("text_changed")
 
 
+def _decompress(text):
+    """Return the text, decompressed if it is bytes."""
+    if type(text) is bytes:
+        return zlib.decompress(text).decode('utf-8', 'surrogatepass')
+    return text
+
+
+class ChangeList:
+    """A compact, read-only list of (start, end, text) changes.
+
+    The positions are stored in an array and the texts are joined into one
+    string, which is compressed if it is longer than ``compress_size``.
+    Used by :class:`Document` to store undo information for many changes.
+
+    """
+    __slots__ = ("_positions", "_text")
+
+    def __init__(self, changes, compress_size=16384):
+        positions = array.array('q')
+        texts = []
+        for start, end, text in changes:
+            positions.extend((start, end, len(text)))
+            texts.append(text)
+        text = "".join(texts)
+        if len(text) > compress_size:
+            text = zlib.compress(text.encode('utf-8', 'surrogatepass'))
+        self._positions = positions
+        self._text = text
+
+    def __len__(self):
+        return len(self._positions) // 3
+
+    def __iter__(self):
+        text = _decompress(self._text)
+        positions = self._positions
+        pos = 0
+        for i in range(0, len(positions), 3):
+            length = positions[i+2]
+            yield positions[i], positions[i+1], text[pos:pos+length]
+            pos += length
+
+    def size(self):
+        """Return the approximate size in bytes."""
+        return sys.getsizeof(self._positions) + sys.getsizeof(self._text)
+
+
+def _undo_size(changes):
+    """Return the approximate size in bytes of a list of undo changes."""
+    return sys.getsizeof(changes) + sum(sys.getsizeof(c) + sys.getsizeof(c[2]) for c in changes)
+
+
+class CursorRegistry:
+    """Keeps the positions of all Cursors of a Document sorted.
+
+    Every position is a :class:`Mark`, and the marks are kept sorted in
+    buckets of about :attr:`bucket_size` marks. Every bucket has a ``delta``
+    that is added to the positions of its marks. A change in the text only
+    recomputes the marks in the buckets touching the changed range; the marks
+    in the buckets after it are shifted by adjusting the delta of those
+    buckets.
+
+    A mark for the start of a Cursor stays at the start of an insertion or
+    replacement, a mark for the end of a Cursor moves to the end of it.
+
+    """
+    bucket_size = 128
+
+    def __init__(self):
+        self._buckets = []
+
+    def __len__(self):
+        """Return the number of marks."""
+        return sum(len(b.marks) for b in self._buckets)
+
+    def positions(self):
+        """Return the sorted list of all positions (mainly for debugging)."""
+        return [m.raw + b.delta for b in self._buckets for m in b.marks]
+
+    def _find_bucket(self, pos, inclusive=False):
+        """Return the index of the last bucket starting before pos (or at pos
+        if ``inclusive`` is True); 0 if there is no such bucket."""
+        buckets = self._buckets
+        lo, hi = 0, len(buckets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            b = buckets[mid]
+            first = b.marks[0].raw + b.delta
+            if first < pos or (inclusive and first == pos):
+                lo = mid + 1
+            else:
+                hi = mid
+        return max(lo - 1, 0)
+
+    def add(self, pos, right=False):
+        """Add and return a new :class:`Mark` at pos.
+
+        If ``right`` is True, the mark moves to the end of text inserted at
+        its position.
+
+        """
+        mark = Mark(right)
+        if not self._buckets:
+            mark.raw = pos
+            self._buckets.append(_Bucket([mark], 0))
+        else:
+            index = self._find_bucket(pos)
+            bucket = self._buckets[index]
+            mark.raw = raw = pos - bucket.delta
+            marks = bucket.marks
+            lo, hi = 0, len(marks)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if marks[mid].raw < raw:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            marks.insert(lo, mark)
+            mark.bucket = bucket
+            if len(marks) > 2 * self.bucket_size:
+                self._buckets[index:index+1] = self._split(marks, bucket.delta)
+        return mark
+
+    def remove(self, mark):
+        """Remove the mark. Does nothing if the mark is not registered."""
+        bucket = mark.bucket
+        marks = bucket.marks
+        for i, m in enumerate(marks):
+            if m is mark:
+                del marks[i]
+                break
+        else:
+            return
+        if not marks:
+            self._buckets.remove(bucket)
+
+    def _split(self, marks, delta):
+        """Return a list of new buckets for the marks."""
+        size = self.bucket_size
+        return [_Bucket(marks[i:i+size], delta) for i in range(0, len(marks), size)]
+
+    def update(self, changes):
+        """Update the positions for the changes.
+
+        The changes are a sorted iterable of (start, end, text) tuples, with
+        all positions referring to the original text.
+
+        """
+        if len(changes) > len(self._buckets):
+            return self._sweep(changes)
+        offset = 0
+        for start, end, text in changes:
+            delta = len(text) - end + start
+            self._change(start + offset, end + offset, len(text), delta)
+            offset += delta
+
+    def _sweep(self, changes):
+        """Update all marks for the changes in one pass."""
+        marks = []
+        for bucket in self._buckets:
+            delta = bucket.delta
+            for mark in bucket.marks:
+                mark.raw += delta
+                marks.append(mark)
+        result = []
+        pending = []    # right marks at the end of the previous change
+        i, total = 0, len(marks)
+        offset = 0
+        prev_end = None
+        for start, end, text in changes:
+            if i == total and not pending:
+                break
+            if pending and start != prev_end:
+                result.extend(pending)
+                pending = []
+            while i < total and marks[i].raw < start:
+                marks[i].raw += offset
+                result.append(marks[i])
+                i += 1
+            left, right = [], pending
+            while i < total and marks[i].raw <= end:
+                mark = marks[i]
+                if mark.right:
+                    right.append(mark)
+                elif mark.raw > start:
+                    left.append(mark)
+                else:
+                    mark.raw += offset
+                    result.append(mark)
+                i += 1
+            new_start = start + offset
+            for mark in left:
+                mark.raw = new_start
+            new_end = new_start + len(text)
+            for mark in right:
+                mark.raw = new_end
+            result.extend(left)
+            pending = right
+            prev_end = end
+            offset += len(text) - end + start
+        result.extend(pending)
+        for mark in marks[i:]:
+            mark.raw += offset
+            result.append(mark)
+        self._buckets[:] = self._split(result, 0)
+
+    def _change(self, start, end, added, delta):
+        """Update the positions for one change (in current positions)."""
+        buckets = self._buckets
+        if not buckets:
+            return
+        first = self._find_bucket(start)
+        last = max(first, self._find_bucket(end, True))
+        before, left, right, after = [], [], [], []
+        for bucket in buckets[first:last+1]:
+            for mark in bucket.marks:
+                pos = mark.raw + bucket.delta
+                if pos > end:
+                    mark.raw = pos + delta
+                    after.append(mark)
+                elif mark.right:
+                    if pos < start:
+                        mark.raw = pos
+                        before.append(mark)
+                    else:
+                        mark.raw = start + added
+                        right.append(mark)
+                elif pos > start:
+                    mark.raw = start
+                    left.append(mark)
+                else:
+                    mark.raw = pos
+                    before.append(mark)
+        new = self._split(before + left + right + after, 0)
+        buckets[first:last+1] = new
+        if delta:
+            for bucket in buckets[first+len(new):]:
+                bucket.delta += delta
+
+
+class Mark:
+    """A position in a :class:`CursorRegistry`.
+
+    The position is ``raw + bucket.delta``.
+
+    """
+    __slots__ = ("raw", "bucket", "right")
+
+    def __init__(self, right=False):
+        self.raw = 0
+        self.bucket = None
+        self.right = right
+
+
+class _Bucket:
+    """A sorted list of marks with a delta for their positions."""
+    __slots__ = ("marks", "delta")
+
+    def __init__(self, marks, delta):
+        self.marks = marks
+        self.delta = delta
+        for mark in marks:
+            mark.bucket = self
+
+
 class AbstractTextRange:
     """Base class for :class:`Cursor` and :class:`Block`.
 
@@ -570,12 +950,55 @@ class Cursor(AbstractTextRange):
         (0, None)
 
     """
-    __slots__ = ("__weakref__",)
+    __slots__ = ("__weakref__", "_pos_mark", "_end_mark")
 
     def __init__(self, document, pos=0, end=-1):
         """Init with document. ``pos`` defaults to 0 and ``end`` defaults to pos."""
+        self._pos_mark = self._end_mark = None
         super().__init__(document, pos, end if end != -1 else pos)
-        document._cursors.add(self)
+
+    def __copy__(self):
+        return type(self)(self._document, self.pos, self.end)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def __reduce__(self):
+        return type(self), (self._document, self.pos, self.end)
+
+    def __del__(self):
+        registry = self._document._cursors
+        if self._pos_mark:
+            registry.remove(self._pos_mark)
+        if self._end_mark:
+            registry.remove(self._end_mark)
+
+    @property
+    def pos(self):
+        """The (start) position."""
+        mark = self._pos_mark
+        return mark.raw + mark.bucket.delta
+
+    @pos.setter
+    def pos(self, pos):
+        registry = self._document._cursors
+        if self._pos_mark:
+            registry.remove(self._pos_mark)
+        self._pos_mark = registry.add(pos)
+
+    @property
+    def end(self):
+        """The end position, may be None (the end of the document)."""
+        mark = self._end_mark
+        if mark:
+            return mark.raw + mark.bucket.delta
+
+    @end.setter
+    def end(self, end):
+        registry = self._document._cursors
+        if self._end_mark:
+            registry.remove(self._end_mark)
+        self._end_mark = None if end is None else registry.add(end, True)
 
     def block(self):
         """Return the :class:`Block` our ``pos`` is in."""
@@ -727,8 +1150,7 @@ class Block(AbstractTextRange):
         try:
             n = self._block_number
         except AttributeError:
-            d = self.document()
-            n = self._block_number = d[:self.pos].count(d.block_separator)
+            n = self._block_number = self.document()._block_index().find(self.pos)[0]
         return n
 
     def next_block(self):
@@ -767,3 +1189,118 @@ class Block(AbstractTextRange):
         return tuple(super().tokens())
 
 
+
+
+class BlockIndex:
+    """An index of the lengths of all blocks in a text.
+
+    The block lengths (including the separator) are stored in chunks of at
+    most ``2 * chunk_size`` blocks, together with the start position and the
+    number of the first block of each chunk. Finding a block by position or
+    number uses bisection, and replacing text only changes the chunks
+    containing the affected blocks.
+
+    This class is used internally by :class:`AbstractDocument`.
+
+    """
+    chunk_size = 512
+    revision = 0    #: the document revision this index is valid for
+
+    def __init__(self, text, separator):
+        self._separator = separator
+        self._sep = len(separator)
+        lengths = [len(line) + self._sep for line in text.split(separator)]
+        lengths[-1] -= self._sep
+        size = self.chunk_size
+        self._chunks = [lengths[i:i+size] for i in range(0, len(lengths), size)]
+        self._lengths = [sum(chunk) for chunk in self._chunks]
+        self._update_offsets()
+
+    def _update_offsets(self):
+        """Compute the start position and number of the first block of every chunk."""
+        self._starts = [0]
+        self._starts.extend(itertools.accumulate(self._lengths))
+        self._numbers = [0]
+        self._numbers.extend(itertools.accumulate(map(len, self._chunks)))
+
+    def count(self):
+        """Return the number of blocks."""
+        return self._numbers[-1]
+
+    def _last(self, number):
+        """Return True if the block is the last block."""
+        return number == self._numbers[-1] - 1
+
+    def find(self, pos):
+        """Return a tuple(number, pos, end) for the block at position ``pos``.
+
+        A position beyond the end of the text returns the last block.
+
+        """
+        c = min(bisect.bisect_right(self._starts, pos), len(self._chunks)) - 1
+        chunk = self._chunks[c]
+        starts = list(itertools.accumulate(itertools.chain((self._starts[c],), chunk)))
+        i = min(bisect.bisect_right(starts, pos), len(chunk)) - 1
+        number = self._numbers[c] + i
+        end = starts[i + 1] if self._last(number) else starts[i + 1] - self._sep
+        return number, starts[i], end
+
+    def block(self, number):
+        """Return a tuple(pos, end) for the block with the number."""
+        c = bisect.bisect_right(self._numbers, number) - 1
+        i = number - self._numbers[c]
+        chunk = self._chunks[c]
+        pos = self._starts[c] + sum(chunk[:i])
+        end = pos + chunk[i] if self._last(number) else pos + chunk[i] - self._sep
+        return pos, end
+
+    def blocks(self, number=0):
+        """Yield tuples(pos, end) for all blocks, starting with block ``number``."""
+        c = bisect.bisect_right(self._numbers, number) - 1
+        i = number - self._numbers[c]
+        pos = self._starts[c] + sum(self._chunks[c][:i])
+        last = self.count() - 1
+        for chunk in itertools.islice(self._chunks, c, None):
+            for length in itertools.islice(chunk, i, None):
+                end = pos + length
+                yield pos, (end if number == last else end - self._sep)
+                pos = end
+                number += 1
+            i = 0
+
+    def replace(self, start, end, text):
+        """Update the index for replacing the text from start to end with text.
+
+        The text is split on the separator, which must be one character long.
+
+        """
+        first, first_pos, _ = self.find(start)
+        last, last_pos, last_end = self.find(end)
+        if not self._last(last):
+            last_end += self._sep
+        prefix = start - first_pos
+        suffix = last_end - end
+        lines = text.split(self._separator)
+        if len(lines) == 1:
+            new = [prefix + len(text) + suffix]
+        else:
+            new = [prefix + len(lines[0]) + self._sep]
+            new.extend(len(line) + self._sep for line in lines[1:-1])
+            new.append(len(lines[-1]) + suffix)
+        self._replace_blocks(first, last + 1, new)
+
+    def _replace_blocks(self, first, last, lengths):
+        """Replace the blocks from number first to last (exclusive) with new lengths."""
+        c0 = bisect.bisect_right(self._numbers, first) - 1
+        c1 = bisect.bisect_right(self._numbers, last - 1) - 1
+        blocks = self._chunks[c0][:first - self._numbers[c0]]
+        blocks += lengths
+        blocks += self._chunks[c1][last - self._numbers[c1]:]
+        size = self.chunk_size
+        if len(blocks) > 2 * size:
+            chunks = [blocks[i:i+size] for i in range(0, len(blocks), size)]
+        else:
+            chunks = [blocks]
+        self._chunks[c0:c1+1] = chunks
+        self._lengths[c0:c1+1] = map(sum, chunks)
+        self._update_offsets()
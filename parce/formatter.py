@@ -310,7 +310,7 @@ class AbstractFormatter:
                 doc.text(), doc.get_root(True), cursor.pos, cursor.end, format_context)
 
 
-class Formatter(AbstractFormatter):
+class Formatter(AbstractFormatter, util.Observable):
     """A Formatter is used to format or highlight text according to a Theme.
 
     Supply the theme, and an optional factory that converts a TextFormat to
@@ -348,12 +348,19 @@ class Formatter(AbstractFormatter):
     added coupled to a specific language. This allows the formatter to switch
     theme based on the language of the text.
 
+    When a :class:`~parce.theme.Theme` is reloaded and formats change, the
+    formatter drops the affected cached formats and emits the ``"changed"``
+    event, so that you can re-highlight the text. See
+    :meth:`slot_theme_changed`.
+
     """
     def __init__(self, theme=None, factory=None):
+        super().__init__()
         if factory is None:
             factory = lambda f: f or None
         self._factory = factory
         self._format_caches = {}
+        self._theme_caches = {}
         if theme is not None:
             self.add_theme(theme)
 
@@ -380,22 +387,51 @@ class Formatter(AbstractFormatter):
         if add_baseformat:
             base_ = theme.baseformat()
             base = self._factory(base_)
-            @util.cached_func
             def factory(action):
                 return self._factory(base_ + theme.textformat(action))
         else:
             base = None
-            @util.cached_func
             def factory(action):
                 return self._factory(theme.textformat(action))
 
-        @util.cached_func
         def baseformat(role, state):
             return self._factory(theme.baseformat(role, state))
 
+        textformats = util.caching_dict(factory)
+        baseformats = util.caching_dict(baseformat, True)
+        self._theme_caches[language] = textformats, baseformats, add_baseformat
         unparsed = self._factory(theme.textformat(_Unparsed))
-        self.format_caches()[language] = \
-            FormatCache(theme, base, factory, baseformat, unparsed)
+        self.format_caches()[language] = FormatCache(theme,
+            base, textformats.__getitem__, lambda role, state: baseformats[role, state], unparsed)
+        if isinstance(theme, util.Observable):
+            theme.connect("changed", self.slot_theme_changed, prepend_self=True)
+
+    def slot_theme_changed(self, theme, actions, baseformats):
+        """Called when a Theme emits the ``"changed"`` event.
+
+        Only the cached formats for the changed actions and base formats are
+        dropped. Then the ``"changed"`` event is emitted, with the set of
+        actions whose format changed, or None if all formats may have changed.
+
+        """
+        changed = False
+        all_changed = False
+        for language, fc in list(self.format_caches().items()):
+            if fc.theme is theme:
+                changed = True
+                textformats, bases, add_baseformat = self._theme_caches[language]
+                if add_baseformat and ("window", "default") in baseformats:
+                    self.add_theme(theme, language, True)
+                    all_changed = True
+                    continue
+                for action in actions:
+                    textformats.pop(action, None)
+                for key in baseformats:
+                    bases.pop(key, None)
+                self.format_caches()[language] = fc._replace(
+                    unparsed = self._factory(theme.textformat(_Unparsed)))
+        if changed:
+            self.emit("changed", None if all_changed else actions)
 
     def get_theme(self, language=None):
         """Return the theme for the specified language.
@@ -412,10 +448,12 @@ class Formatter(AbstractFormatter):
     def remove_theme(self, language):
         """Remove the theme for the specified language."""
         del self.format_caches()[language]
+        del self._theme_caches[language]
 
     def copy_themes(self, formatter):
         """Copy all themes from the other formatter."""
         self.format_caches().clear()
+        self._theme_caches.clear()
         for language, fc in formatter.format_caches().items():
             self.add_theme(fc.theme, language, fc.base is not None)
 
@@ -450,6 +488,418 @@ class SimpleFormatter(AbstractFormatter):
         return {None: FormatCache(None, None, css_class, baseformat, None)}
 
 
+class MultiFormatter(AbstractFormatter):
+    """A formatter that formats text for several formatters at once.
+
+    The textformat of every FormatRange is a tuple with the formats of each of
+    the ``formatters``, in the same order. The tree is traversed only once,
+    and the ranges are merged and clipped only once, e.g. to render a document
+    with a light and a dark theme in one pass::
+
+        >>> f = MultiFormatter([Formatter(light), Formatter(dark)])
+        >>> for pos, end, (light_format, dark_format) in f.format_ranges(tree):
+        ...     # etc
+
+    An item of the tuple is None where the corresponding formatter has no
+    format. Taking all the ranges with a non-None format at some index (and
+    merging adjacent ranges with the same format) gives the ranges the
+    formatter at that index would yield itself.
+
+    """
+    def __init__(self, formatters):
+        self.formatters = list(formatters)  #: The list of formatters.
+        self._key = None
+        self._format_caches = None
+
+    def __repr__(self):
+        return '<{} {}>'.format(self.__class__.__name__, self.formatters)
+
+    def format_caches(self):
+        """Reimplemented to return FormatCaches combining those of the formatters.
+
+        The combined caches are reused as long as the formatters' caches do
+        not change.
+
+        """
+        caches = [f.format_caches() for f in self.formatters]
+        key = [(lang, fc) for c in caches for lang, fc in c.items()]
+        if self._key is None or len(key) != len(self._key) or \
+                any(k[0] is not l[0] or k[1] is not l[1] for k, l in zip(key, self._key)):
+            languages = set(lang for c in caches for lang in c)
+            if None in languages:
+                self._format_caches = {lang: _combine_format_caches(
+                        [c.get(lang, c.get(None)) for c in caches])
+                    for lang in languages}
+            else:
+                self._format_caches = {}
+            self._key = key
+        return self._format_caches
+
+
+def _combine_format_caches(caches):
+    """Return one FormatCache combining the caches. A cache may be None."""
+    none = lambda *args: None
+    caches = [fc or FormatCache(None, None, none, none, None) for fc in caches]
+    bases = tuple(fc.base for fc in caches)
+    base = bases if any(b is not None for b in bases) else None
+    if any(fc.unparsed is not None for fc in caches):
+        unparsed = tuple(b if fc.unparsed is None else fc.unparsed
+            for fc, b in zip(caches, bases))
+        def textformat(action):
+            formats = tuple(b if f is None else f
+                for f, b in zip((fc.textformat(action) for fc in caches), bases))
+            if any(f is not None for f in formats):
+                return formats
+    else:
+        unparsed = None
+        def textformat(action):
+            formats = tuple(fc.textformat(action) for fc in caches)
+            if any(f is not None for f in formats):
+                return formats
+    def baseformat(role, state):
+        return tuple(fc.baseformat(role, state) for fc in caches)
+    return FormatCache(None, base, util.caching_dict(textformat).__getitem__,
+        baseformat, unparsed)
+
+
+class FormatRangeCache:
+    """Keeps the FormatRanges of a document, and updates them incrementally.
+
+    After a (re)build of the tree by a :class:`~parce.treebuilder.TreeBuilder`,
+    call :meth:`update` with the updated range (e.g. from the ``"updated"``
+    event) and the text change. The formatter then only formats the updated
+    range, and :meth:`update` returns the FormatRanges of only the spans that
+    actually differ from the previous highlighting. For example::
+
+        >>> cache = FormatRangeCache(formatter)
+        >>> cache.rebuild(tree)     # returns all ranges
+        >>> # ... text and tree are changed ...
+        >>> for r in cache.update(tree, start, end, position, removed, added):
+        ...     # re-highlight r.pos to r.end with r.textformat
+        ...     # (textformat None means: no formatting)
+
+    The returned ranges tile the changed spans: between formatted ranges
+    ranges with a ``None`` textformat are inserted, so you know the
+    formatting of that text needs to be cleared.
+
+    The ranges after the updated region are not shifted immediately, but the
+    shift is stored and applied lazily, so that sequential edits (like
+    typing) do not touch the ranges of the whole document.
+
+    """
+    def __init__(self, formatter):
+        self.formatter = formatter      #: The formatter to use.
+        self._ranges = []
+        self._shift_index = 0   # ranges from this index on are shifted by:
+        self._shift = 0
+
+    def ranges(self):
+        """Return a list of all current FormatRanges."""
+        self._move_shift(len(self._ranges))
+        return list(self._ranges)
+
+    def rebuild(self, tree):
+        """Format the whole tree and return the list of all FormatRanges."""
+        self._ranges = list(self.formatter.format_ranges(tree))
+        self._shift_index = self._shift = 0
+        return list(self._ranges)
+
+    def update(self, tree, start, end, position, removed, added):
+        """Format the range start→end of the tree, and return the differences.
+
+        The ``start`` and ``end`` denote the updated range in the tree, and
+        ``position``, ``removed`` and ``added`` the text change that caused
+        the update. (If multiple changes were made, combine them to one change
+        spanning all, like the TreeBuilder does.) The ranges beyond the updated
+        region are shifted accordingly.
+
+        Returns a list of FormatRanges that differ from the previous
+        formatting, see above. The inserted text is always included.
+
+        """
+        ranges = self._ranges
+        offset = added - removed
+        old_end = end - offset
+        i = self._find_end(start)
+        j = self._find_pos(old_end, i)
+
+        # the old ranges in the old region, clipped
+        old = [self._get(n) for n in range(i, j)]
+        head = tail = None
+        if old:
+            r = old[0]
+            if r.pos < start:
+                head = FormatRange(r.pos, start, r.textformat)
+                old[0] = FormatRange(start, r.end, r.textformat)
+            r = old[-1]
+            if r.end > old_end:
+                tail = FormatRange(end, r.end + offset, r.textformat)
+                old[-1] = FormatRange(r.pos, old_end, r.textformat)
+        new = list(self.formatter.format_ranges(tree, start, end))
+
+        # move the lazy shift to the new region; afterwards all ranges before
+        # i are real and the ranges from j on are shifted by self._shift
+        if self._shift_index < i:
+            self._move_shift(i)
+        elif self._shift_index > j:
+            self._move_shift(j)
+        shift = self._shift
+
+        middle = new[:]
+        if head:
+            middle.insert(0, head)
+        if tail:
+            middle.append(tail)
+        middle = list(util.merge_adjacent(middle, FormatRange))
+        if middle:
+            # merge with the adjacent ranges if needed
+            if i > 0:
+                r = ranges[i-1]
+                if r.end == middle[0].pos and r.textformat == middle[0].textformat:
+                    middle[0] = FormatRange(r.pos, middle[0].end, r.textformat)
+                    i -= 1
+            if j < len(ranges):
+                r = ranges[j]
+                if r.pos + shift + offset == middle[-1].end and r.textformat == middle[-1].textformat:
+                    middle[-1] = FormatRange(middle[-1].pos, r.end + shift + offset, r.textformat)
+                    j += 1
+        elif 0 < i and j < len(ranges):
+            # nothing left in between, the adjacent ranges may touch now
+            r1, r2 = ranges[i-1], ranges[j]
+            if r1.end == r2.pos + shift + offset and r1.textformat == r2.textformat:
+                middle = [FormatRange(r1.pos, r2.end + shift + offset, r1.textformat)]
+                i -= 1
+                j += 1
+        ranges[i:j] = middle
+        self._shift_index = i + len(middle)
+        self._shift = shift + offset
+        return _diff(old, new, start, end, position, position + added, offset)
+
+    def _get(self, index):
+        """Return the FormatRange at index, with the shift applied."""
+        r = self._ranges[index]
+        if index >= self._shift_index and self._shift:
+            return FormatRange(r.pos + self._shift, r.end + self._shift, r.textformat)
+        return r
+
+    def _move_shift(self, index):
+        """Move the lazy shift to index, shifting the ranges in between."""
+        ranges, k, shift = self._ranges, self._shift_index, self._shift
+        if shift:
+            if k < index:
+                ranges[k:index] = [FormatRange(r.pos + shift, r.end + shift, r.textformat)
+                                   for r in ranges[k:index]]
+            elif k > index:
+                ranges[index:k] = [FormatRange(r.pos - shift, r.end - shift, r.textformat)
+                                   for r in ranges[index:k]]
+        if index >= len(ranges):
+            self._shift = 0
+        self._shift_index = index
+
+    def _find_end(self, pos):
+        """Return the index of the first range ending after pos."""
+        lo, hi = 0, len(self._ranges)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get(mid).end <= pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find_pos(self, pos, lo=0):
+        """Return the index of the first range starting at or after pos."""
+        hi = len(self._ranges)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._get(mid).pos < pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+
+class BlockFormatCache:
+    """Caches the FormatRanges per text block (line) of a Document.
+
+    This is meant for editors that repaint line by line. The ``document``
+    must be a :class:`parce.Document` (or another Document that emits the
+    ``"text_change"`` and ``"tree_updated"`` events). For every block the
+    FormatRanges are stored, with positions relative to the start of the block,
+    together with the state at the start of the block: the lexicons of the
+    contexts the tree is in at that position.
+
+    Getting the ranges for a block that was already formatted is a simple
+    lookup. A text change only invalidates the changed blocks; a tree update
+    invalidates the blocks in the updated range and the following blocks until
+    the state at the start of a block matches the stored state again. For
+    example::
+
+        >>> cache = BlockFormatCache(formatter, document)
+        >>> for block, ranges in cache.block_ranges(first_visible, last_visible):
+        ...     for r in ranges:
+        ...         # paint block.pos + r.pos to block.pos + r.end with r.textformat
+
+    """
+    def __init__(self, formatter, document):
+        self.formatter = formatter      #: The formatter to use.
+        self._document = document
+        self._lengths = [len(t) for t in document.text().split(document.block_separator)]
+        self._entries = [None] * len(self._lengths)
+        self._revision = document.revision()
+        self._pending = []
+        document.connect("text_change", self.slot_text_change)
+        document.connect("tree_updated", self.slot_tree_updated)
+
+    def disconnect(self):
+        """Stop following the changes in the document."""
+        self._document.disconnect("text_change", self.slot_text_change)
+        self._document.disconnect("tree_updated", self.slot_tree_updated)
+
+    def invalidate(self):
+        """Forget all cached ranges, e.g. after changing the formatter's theme."""
+        self._entries = [None] * len(self._lengths)
+
+    def ranges(self, block):
+        """Return the list of FormatRanges for the :class:`~.document.Block`.
+
+        The positions of the ranges are relative to the start of the block.
+        Returns None if the tree is not yet up to date.
+
+        """
+        n = block.block_number
+        entries = self._entries
+        try:
+            entry = entries[n]
+        except IndexError:
+            entry = None
+        if entry:
+            return entry[1]
+        root = self._document.get_root()
+        if root is None:
+            return
+        pos = block.pos
+        ranges = [FormatRange(p - pos, e - pos, f)
+            for p, e, f in self.formatter.format_ranges(root, pos, block.end)]
+        if n < len(entries) and self._lengths[n] == len(block):
+            entries[n] = (_block_state(root, pos), ranges)
+        return ranges
+
+    def state(self, block):
+        """Return the stored state at the start of the block, or None."""
+        try:
+            entry = self._entries[block.block_number]
+        except IndexError:
+            return
+        if entry:
+            return entry[0]
+
+    def block_ranges(self, start=0, end=None):
+        """Yield (block, ranges) tuples for the blocks from start to end.
+
+        See :meth:`ranges`.
+
+        """
+        for block in self._document.blocks(start, end):
+            yield block, self.ranges(block)
+
+    def slot_text_change(self, position, removed, added):
+        """Called on a text change, invalidates the changed blocks."""
+        doc = self._document
+        sep_len = len(doc.block_separator)
+        lengths = self._lengths
+        block = doc.find_block(position)
+        first = last = block.block_number
+        old_end = block.pos + lengths[first]
+        while old_end < position + removed:
+            last += 1
+            old_end += sep_len + lengths[last]
+        new_end = old_end - removed + added
+        new = [len(t) for t in doc.text()[block.pos:new_end].split(doc.block_separator)]
+        lengths[first:last+1] = new
+        self._entries[first:last+1] = [None] * len(new)
+        self._revision = doc.revision()
+        pending, self._pending = self._pending, []
+        for start, end in pending:
+            self._invalidate(start, end)
+
+    def slot_tree_updated(self, start, end):
+        """Called on a tree update, invalidates the affected blocks."""
+        if self._revision != self._document.revision():
+            # the text change is not yet handled
+            self._pending.append((start, end))
+        else:
+            self._invalidate(start, end)
+
+    def _invalidate(self, start, end):
+        """Invalidate the blocks from start to end, and then the blocks with a different state."""
+        doc = self._document
+        sep_len = len(doc.block_separator)
+        lengths, entries = self._lengths, self._entries
+        block = doc.find_block(start)
+        n, pos = block.block_number, block.pos
+        count = len(entries)
+        while n < count and pos <= end:
+            entries[n] = None
+            pos += lengths[n] + sep_len
+            n += 1
+        root = doc.get_root()
+        while n < count and entries[n] and root is not None:
+            if entries[n][0] == _block_state(root, pos):
+                break
+            entries[n] = None
+            pos += lengths[n] + sep_len
+            n += 1
+
+
+def _block_state(tree, pos):
+    """Return the state of the tree at pos, the tuple of lexicons we're in.
+
+    If a token crosses the position, its action is appended.
+
+    """
+    t = tree.find_token(pos) or tree.find_token_left(pos)
+    if t is None:
+        return ()
+    state = [p.lexicon for p in t.ancestors()]
+    state.reverse()
+    if t.pos < pos < t.end:
+        state.append(t.action)
+    return tuple(state)
+
+
+def _diff(old, new, start, end, changed_start, changed_end, offset):
+    """Return the FormatRanges in new that differ from those in old.
+
+    The ranges in old end at ``end - offset``. Ranges before ``changed_start``
+    are compared on the same position, ranges after ``changed_end`` on the
+    position shifted by ``offset``. The returned ranges span the whole changed
+    region, unformatted text gets a None textformat.
+
+    """
+    p = 0
+    for a, b in zip(old, new):
+        if a != b or b.end > changed_start:
+            break
+        p += 1
+    q = 0
+    for a, b in zip(reversed(old[p:]), reversed(new[p:])):
+        if (a.pos + offset, a.end + offset, a.textformat) != b or b.pos < changed_end:
+            break
+        q += 1
+    lo = new[p-1].end if p else start
+    hi = new[len(new)-q].pos if q else end
+    result = []
+    for r in new[p:len(new)-q]:
+        if r.pos > lo:
+            result.append(FormatRange(lo, r.pos, None))
+        result.append(r)
+        lo = r.end
+    if hi > lo:
+        result.append(FormatRange(lo, hi, None))
+    return result
+
+
 class FormatContext:
     """FormatContext can be used to track theme changes during formatting.
 
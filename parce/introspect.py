@@ -92,4 +92,21 @@ def languages(lang):
             if isinstance(i, Lexicon) and i.language is not lang)
 
 
+def all_standardactions(registry=None):
+    """Return the set of all StandardAction instances in all registered languages.
 
+    Languages that are referred to by the registered languages are also
+    followed. If ``registry`` is not given, the global :mod:`~parce.registry`
+    is used. The parent actions of the found actions are included as well.
+
+    """
+    if registry is None:
+        from .registry import registry
+    langs = set(registry.lexicon(qualname).language for qualname in registry)
+    todo = list(langs)
+    while todo:
+        for lang in languages(todo.pop()):
+            if lang not in langs:
+                langs.add(lang)
+                todo.append(lang)
+    return set(a for lang in langs for action in standardactions(lang) for a in action)
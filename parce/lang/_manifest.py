@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Generates the manifest of the bundled languages and measures import times.
+
+Every module in ``parce.lang`` that defines languages that should be found in
+the registry, has a ``registry`` dictionary, mapping the name of the root
+lexicon (e.g. ``"Css.root"``) to a dictionary with the keyword arguments for
+:meth:`.Registry.add`. This module collects all those entries and writes them
+to :mod:`parce.lang._registry`, which is imported by :mod:`parce.registry`
+without importing any language module.
+
+Word lists in the ``*_words`` modules that a language module turns into a
+regular expression using :func:`~parce.rule.words` (e.g.
+``words(python_words.keywords)``) get their regular expression precomputed
+at the end of their module, so that no trie needs to be built at runtime (see
+:func:`~parce.regex.precompute_words2regexp`).
+
+Run from the command line::
+
+    $ python -m parce.lang._manifest            # show the import time per module
+    $ python -m parce.lang._manifest --write    # update the generated files
+    $ python -m parce.lang._manifest --check    # exit 1 if one is out of date
+
+"""
+
+import ast
+import importlib
+import os
+import pkgutil
+import subprocess
+import sys
+import types
+
+from parce import regex
+
+
+#: The order in which the keyword arguments are written
+KEYWORDS = ("name", "desc", "section", "author", "aliases", "filenames", "mimetypes", "guesses")
+
+
+HEADER = '''\
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Registry of built-in language definitions.
+
+This file is imported by the :mod:`~parce.registry` module, so that the global
+registry contains all the language definitions listed below, without importing
+the language modules themselves.
+
+Generated by ``python -m parce.lang._manifest --write`` -- do not edit!
+
+If you add a language definition, add its entry to the ``registry`` dictionary
+of its module and run the command above. Carefully check the weights of the
+guesses in order to to maximize the guessing accuracy.
+
+"""
+
+
+from parce.registry import register
+'''
+
+
+def modules():
+    """Return the sorted names of the language modules in ``parce.lang``."""
+    path = os.path.dirname(__file__)
+    return sorted(name for finder, name, ispkg in pkgutil.iter_modules([path])
+                  if not name.startswith('_'))
+
+
+def entries():
+    """Yield (qualname, arguments) tuples for all root lexicons to register.
+
+    All language modules are imported, and the entries of their ``registry``
+    dictionary are yielded in module order.
+
+    """
+    for name in modules():
+        module = importlib.import_module("parce.lang." + name)
+        registry = getattr(module, "registry", None)
+        if isinstance(registry, dict):
+            for lexicon_name, arguments in registry.items():
+                yield "parce.lang.{}.{}".format(name, lexicon_name), arguments
+
+
+def generate():
+    """Return the contents of the generated :mod:`parce.lang._registry` module."""
+    output = [HEADER]
+    for qualname, arguments in entries():
+        output.append('\nregister("{}",\n'.format(qualname))
+        for key in KEYWORDS:
+            if arguments.get(key):
+                output.append(_format_argument(key, arguments[key]))
+        output.append(')\n')
+    return ''.join(output)
+
+
+def filename():
+    """Return the filename of the :mod:`parce.lang._registry` module."""
+    return os.path.join(os.path.dirname(__file__), "_registry.py")
+
+
+WORDS_MARKER = "## Generated by python -m parce.lang._manifest --write -- do not edit below!\n"
+
+
+def word_lists():
+    """Return a dict mapping word list modules to the sorted names of their
+    tuples that are used with :func:`~parce.rule.words`.
+
+    The source code of all language modules is searched for calls like
+    ``words(module.name, ...)``, where ``module`` refers to a module in
+    ``parce.lang``.
+
+    """
+    result = {}
+    for name in modules():
+        module = importlib.import_module("parce.lang." + name)
+        with open(module.__file__, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                    and node.func.id == "words" and node.args
+                    and isinstance(node.args[0], ast.Attribute)
+                    and isinstance(node.args[0].value, ast.Name)):
+                words_module = getattr(module, node.args[0].value.id, None)
+                if (isinstance(words_module, types.ModuleType)
+                        and words_module.__name__.startswith("parce.lang.")
+                        and isinstance(getattr(words_module, node.args[0].attr, None), tuple)):
+                    result.setdefault(words_module, set()).add(node.args[0].attr)
+    return {module: sorted(names) for module, names in result.items()}
+
+
+def generate_words(module, names):
+    """Return the contents of the word list ``module`` with the precomputed
+    regular expressions for the tuples with the specified ``names`` at the end.
+
+    """
+    with open(module.__file__, encoding="utf-8") as f:
+        text = f.read().split(WORDS_MARKER)[0].rstrip() + "\n"
+    output = [text, "\n\n", WORDS_MARKER, "\n",
+              "from parce.regex import precompute_words2regexp\n\n"]
+    for name in names:
+        output.append("precompute_words2regexp({}, {})\n".format(name,
+            _format_value(regex._words2regexp(getattr(module, name)))))
+    return "".join(output)
+
+
+def outputs():
+    """Yield (filename, text) tuples for all generated files."""
+    yield filename(), generate()
+    for module, names in sorted(word_lists().items(), key=lambda item: item[0].__name__):
+        yield module.__file__, generate_words(module, names)
+
+
+def import_times(names=None, repeat=3, preload=("parce", "parce.registry")):
+    """Return a list of (name, seconds) tuples with the import time of modules.
+
+    Every module is imported in a fresh Python interpreter that already
+    imported the ``preload`` modules (by default :mod:`parce` and
+    :mod:`parce.registry`), so the time includes only the language module
+    itself and the other language modules it imports. The fastest of
+    ``repeat`` runs is used. By default all language modules are measured,
+    but you can specify other module names.
+
+    """
+    if names is None:
+        names = ["parce.lang." + name for name in modules()]
+    script = "".join("import {}\n".format(name) for name in ("importlib", "time") + tuple(preload))
+    script += ("t = time.perf_counter()\n"
+               "importlib.import_module({!r})\n"
+               "print(time.perf_counter() - t)\n")
+    path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (path, env.get('PYTHONPATH'))))
+    result = []
+    for name in names:
+        times = []
+        for i in range(repeat):
+            output = subprocess.check_output([sys.executable, "-c", script.format(name)], env=env)
+            times.append(float(output))
+        result.append((name, min(times)))
+    return result
+
+
+def _format_argument(key, value):
+    """Return a line (or lines) with one keyword argument."""
+    line = "    {} = {},\n".format(key, _format_value(value))
+    if len(line) > 80 and isinstance(value, (list, tuple)) and len(value) > 1:
+        items = "".join("        {},\n".format(_format_value(v)) for v in value)
+        line = "    {} = [\n{}    ],\n".format(key, items)
+    return line
+
+
+def _format_value(value):
+    """Return a Python literal for a string, number, or list or tuple of those.
+
+    Strings with backslashes are written as raw strings, when possible.
+
+    """
+    if isinstance(value, list):
+        return "[{}]".format(", ".join(map(_format_value, value)))
+    elif isinstance(value, tuple):
+        return "({})".format(", ".join(map(_format_value, value)))
+    elif isinstance(value, str):
+        if not any(c in value for c in '\n\r\t') and not value.endswith('\\'):
+            for quote in '"\'':
+                if quote not in value:
+                    return ("r" if '\\' in value else "") + quote + value + quote
+        return repr(value)
+    return repr(value)
+
+
+def main(args=None):
+    """Write the manifest or show the import time of the language modules."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m parce.lang._manifest",
+        description="Show the import time of the bundled language modules, "
+                    "or generate the parce/lang/_registry.py manifest and the "
+                    "regular expressions of the word lists.")
+    parser.add_argument("-w", "--write", action="store_true",
+        help="write the manifest and the precomputed word list regexps")
+    parser.add_argument("-c", "--check", action="store_true",
+        help="check whether the generated files are up to date")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+        help="the number of times each import is measured (default: %(default)s)")
+    parser.add_argument("module", nargs="*",
+        help="the modules to measure (default: all modules in parce.lang)")
+    args = parser.parse_args(args)
+
+    if args.write or args.check:
+        outdated = []
+        for path, text in outputs():
+            with open(path, encoding="utf-8") as f:
+                if f.read() != text:
+                    outdated.append(path)
+                    if args.write:
+                        with open(path, "w", encoding="utf-8") as f:
+                            f.write(text)
+        if args.check and outdated:
+            sys.exit("\n".join(path + " is out of date" for path in outdated))
+        return
+
+    names = [name if '.' in name else "parce.lang." + name for name in args.module] or None
+    ((name, seconds),) = import_times(["parce.registry"], args.repeat, ())
+    print("{:32} {:8.1f} ms".format("parce and parce.registry", seconds * 1000))
+    for name, seconds in import_times(names, args.repeat):
+        print("{:32} {:8.1f} ms".format(name, seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
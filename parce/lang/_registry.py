@@ -21,29 +21,28 @@
 Registry of built-in language definitions.
 
 This file is imported by the :mod:`~parce.registry` module, so that the global
-registry contains all the language definitions listed below.
+registry contains all the language definitions listed below, without importing
+the language modules themselves.
 
-This file is manually updated.
+Generated by ``python -m parce.lang._manifest --write`` -- do not edit!
 
-If you add a language definition, add a listing here. The order is not
-significant, although it is comfortable to keep the listing here in sorted
-order. Carefully check the weights of the guesses in order to to maximize the
-guessing accuracy.
+If you add a language definition, add its entry to the ``registry`` dictionary
+of its module and run the command above. Carefully check the weights of the
+guesses in order to to maximize the guessing accuracy.
 
 """
 
 
 from parce.registry import register
 
-
 register("parce.lang.bash.Bash.root",
     name = "Bash",
     desc = "Bash shell language",
     section = "Shell",
     aliases = ["sh"],
-    filenames = [("*.sh", .7), ("*.bash", 1)],
+    filenames = [("*.sh", 0.7), ("*.bash", 1)],
     mimetypes = [("text/x-shellscript", 1)],
-    guesses = [(r'^#!.*?/(ba)?sh', .5)],
+    guesses = [("^#!.*?/(ba)?sh", 0.5)],
 )
 
 register("parce.lang.c.C.root",
@@ -51,9 +50,14 @@ register("parce.lang.c.C.root",
     desc = "C/C++ programming language",
     section = "Programming",
     aliases = ["c", "cpp"],
-    filenames = [("*.[ch]", .7), ("*.[ch]pp", .7), ("*.cc", .7), ("*.hh", .7)],
+    filenames = [
+        ("*.[ch]", 0.7),
+        ("*.[ch]pp", 0.7),
+        ("*.cc", 0.7),
+        ("*.hh", 0.7),
+    ],
     mimetypes = [("text/x-c", 1)],
-    guesses = [(r'#include <[\w\.]+>', .5), (r'\busing namespace ', .5)],
+    guesses = [(r"#include <[\w\.]+>", 0.5), (r"\busing namespace ", 0.5)],
 )
 
 register("parce.lang.css.Css.root",
@@ -62,7 +66,7 @@ register("parce.lang.css.Css.root",
     section = "Markup",
     filenames = [("*.css", 1)],
     mimetypes = [("text/css", 1)],
-    guesses = [(r'\b@media\b', 0.5), (r'\bdiv\b', 0.1), (r'\bbody\s*\{', 0.4)],
+    guesses = [(r"\b@media\b", 0.5), (r"\bdiv\b", 0.1), (r"\bbody\s*\{", 0.4)],
 )
 
 register("parce.lang.csv.Csv.root",
@@ -71,25 +75,48 @@ register("parce.lang.csv.Csv.root",
     section = "Other",
     filenames = [("*.csv", 1)],
     mimetypes = [("text/csv", 1)],
-    guesses = [(r'([^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*)(,([^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*))+(\n|$)', 0.1)],
+    guesses = [(r'((?<![^\n,"])[^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*)(,([^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*))+(\n|$)', 0.1)],
 )
 
 register("parce.lang.docbook.DocBook.root",
     name = "DocBook",
     desc = "DocBook XMl/SGML computer documentation",
     section = "Markup",
-    filenames = [("*.docbook", 1), ("*.dbk", 1), ("*.xml", .1)],
-    mimetypes = [("text/docbook", 1), ("application/sgml", .1)],
-    guesses = [(r'^\s*<\?xml ', .2), (r'OASIS.*?DocBook', 1), (r'<book\b', .8)],
+    filenames = [("*.docbook", 1), ("*.dbk", 1), ("*.xml", 0.1)],
+    mimetypes = [("text/docbook", 1), ("application/sgml", 0.1)],
+    guesses = [
+        (r"^\s*<\?xml ", 0.2),
+        ("OASIS.*?DocBook", 1),
+        (r"<book\b", 0.8),
+    ],
 )
 
-register("parce.lang.xml.Dtd.root",
-    name = "DTD",
-    desc = "Document Type Definition",
+register("parce.lang.html.Html.root",
+    name = "HTML",
+    desc = "HTML 4 or 5",
     section = "Markup",
-    filenames = [("*.dtd", 1)],
-    mimetypes = [("application/xml-dtd", 1)],
-    guesses = [(r'<!ENTITY\b', 0.5)],
+    filenames = [("*.html", 1), ("*.htm", 1)],
+    mimetypes = [("text/html", 1)],
+    guesses = [
+        ("(?i)<!DOCTYPE html", 0.9),
+        (r"\bXHTML.*?\bTransitional/", 0.9),
+        (r"(?i)<html\b", 0.9),
+        (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', 0.1),
+    ],
+)
+
+register("parce.lang.html.XHtml.root",
+    name = "XHTML",
+    desc = "XHTML strict",
+    section = "Markup",
+    filenames = [("*.html", 1), ("*.htm", 1), ("*.xhtml", 1)],
+    mimetypes = [("text/html", 1), ("application/xhtml+xml", 1)],
+    guesses = [
+        ("(?i)<!DOCTYPE html", 0.8),
+        (r"\bXHTML.*?\bStrict/", 0.9),
+        (r"(?i)<html\b", 0.8),
+        (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', 0.05),
+    ],
 )
 
 register("parce.lang.ini.Ini.root",
@@ -99,7 +126,7 @@ register("parce.lang.ini.Ini.root",
     aliases = ["config"],
     filenames = [("*.ini", 1), ("*.cfg", 0.6), ("*.conf", 0.6)],
     mimetypes = [("text/plain", 0.1)],
-    guesses = [(r'^\s*\[\w+\]', 0.5), (r"^\s*[#;]", 0.1)],
+    guesses = [(r"^\s*\[\w+\]", 0.5), (r"^\s*[#;]", 0.1)],
 )
 
 register("parce.lang.javascript.JavaScript.root",
@@ -107,9 +134,13 @@ register("parce.lang.javascript.JavaScript.root",
     desc = "JavaScript programming language",
     section = "Scripting",
     aliases = ["js", "ecmascript"],
-    filenames = [("*.js", 1), ("*.jsm", .8)],
-    mimetypes = [("application/javascript", 1), ("application/x-javascript", 1),
-             ("text/x-javascript", 1), ("text/javascript", 1)],
+    filenames = [("*.js", 1), ("*.jsm", 0.8)],
+    mimetypes = [
+        ("application/javascript", 1),
+        ("application/x-javascript", 1),
+        ("text/x-javascript", 1),
+        ("text/javascript", 1),
+    ],
 )
 
 register("parce.lang.json.Json.root",
@@ -118,43 +149,16 @@ register("parce.lang.json.Json.root",
     section = "Other",
     filenames = [("*.json", 1)],
     mimetypes = [("application/json", 1)],
-    guesses = [(r'^\s*\{\s*"\w+"\s*:', .7)],
-)
-
-register("parce.lang.html.Html.root",
-    name = "HTML",
-    desc = "HTML 4 or 5",
-    section = "Markup",
-    filenames = [("*.html", 1), ("*.htm", 1)],
-    mimetypes = [("text/html", 1)],
-    guesses = [
-        (r'(?i)<!DOCTYPE html', .9),
-        (r'\bXHTML.*?\bTransitional/', .9),
-        (r'(?i)<html\b', .9),
-        (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', .1),
-    ],
-)
-
-register("parce.lang.tex.Latex.root",
-    name = "LaTeX",
-    desc = "TeX and LaTeX",
-    section = "Markup",
-    aliases = ["TeX"],
-    filenames = [("*.tex", 1), ("*.sty", .8), ("*.cls", .1)],
-    mimetypes = [("text/x-latex", .8), ("application/x-latex", .8)],
-    guesses = [(r'\\document(class|style)[\{\[]', .8)],
+    guesses = [(r'^\s*\{\s*"\w+"\s*:', 0.7)],
 )
 
 register("parce.lang.lilypond.LilyPond.root",
     name = "LilyPond",
     desc = "LilyPond music",
     section = "Music",
-    filenames = [("*.ly", 1), ("*.ily", .8), ("*.lyi", .5)],
-    mimetypes = [("text/x-lilypond", .8)],
-    guesses = [
-        (r'\\version\s*"\d', .8),
-        (r'\\relative ', .1)
-    ],
+    filenames = [("*.ly", 1), ("*.ily", 0.8), ("*.lyi", 0.5)],
+    mimetypes = [("text/x-lilypond", 0.8)],
+    guesses = [(r'\\version\s*"\d', 0.8), (r"\\relative ", 0.1)],
 )
 
 register("parce.lang.numbers.Deutsch.root",
@@ -182,15 +186,25 @@ register("parce.lang.python.Python.root",
     desc = "Python programming language",
     section = "Scripting",
     filenames = [("*.py", 1)],
-    mimetypes = [("text/x-python", .8)],
-    guesses = [(r'^#!.{,20}python', .8), (r'\bimport\s+[a-z]+\b', .3)],
+    mimetypes = [("text/x-python", 0.8)],
+    guesses = [("^#!.{,20}python", 0.8), (r"\bimport\s+[a-z]+\b", 0.3)],
 )
 
 register("parce.lang.python.PythonConsole.root",
     name = "Python Console",
     desc = "Python console session",
     section = "Scripting",
-    guesses = [(r'^>>> ', .3)],
+    guesses = [("^>>> ", 0.3)],
+)
+
+register("parce.lang.scheme.Scheme.root",
+    name = "Scheme",
+    desc = "Scheme programming language",
+    section = "Scripting",
+    aliases = ["guile"],
+    filenames = [("*.scm", 1)],
+    mimetypes = [("text/x-script.scheme", 1), ("text/x-script.guile", 1)],
+    guesses = [(r"^\s*[;(]", 0.5), (r"\(define\b", 0.7)],
 )
 
 register("parce.lang.tcl.Tcl.root",
@@ -198,79 +212,88 @@ register("parce.lang.tcl.Tcl.root",
     desc = "Tool command language",
     section = "Scripting",
     filenames = [("*.tcl", 1)],
-    mimetypes = [("text/tcl", .8), ("text/x-tcl", .8), ("text/x-script.tcl", .8)],
-    guesses = [(r'^#!.*?(wi|tcl)sh', .8), (r'^namespace eval', .1)],
+    mimetypes = [
+        ("text/tcl", 0.8),
+        ("text/x-tcl", 0.8),
+        ("text/x-script.tcl", 0.8),
+    ],
+    guesses = [("^#!.*?(wi|tcl)sh", 0.8), ("^namespace eval", 0.1)],
+)
+
+register("parce.lang.tex.Latex.root",
+    name = "LaTeX",
+    desc = "TeX and LaTeX",
+    section = "Markup",
+    aliases = ["TeX"],
+    filenames = [("*.tex", 1), ("*.sty", 0.8), ("*.cls", 0.1)],
+    mimetypes = [("text/x-latex", 0.8), ("application/x-latex", 0.8)],
+    guesses = [(r"\\document(class|style)[\{\[]", 0.8)],
 )
 
 register("parce.lang.texinfo.Texinfo.root",
     name = "Texinfo",
     desc = "GNU Texinfo",
     section = "Markup",
-    filenames = [("*.texi", 1), ("*.texinfo", 1), ("*.txi", .5), ("*.itexi", .3), ("*.tex", .1)],
+    filenames = [
+        ("*.texi", 1),
+        ("*.texinfo", 1),
+        ("*.txi", 0.5),
+        ("*.itexi", 0.3),
+        ("*.tex", 0.1),
+    ],
     mimetypes = [("application/x-texinfo", 1)],
-    guesses = [(r'^@c\b', .8), (r'^\\input\s+texinfo\b', 1)],
-)
-
-register("parce.lang.troff.Troff.root",
-    name = "Troff",
-    desc = "Troff document processing language",
-    section = "Markup",
-    aliases = ["groff", "nroff", "roff", "man"],
-    filenames = [("*.man", .8), ("*.[12345678]", .8)],
-    mimetypes = [("application/x-troff", .8), ("text/troff", .8)],
-    guesses = [(r'^\.', .5), (r'^\.TH\b', 1), (r'^\.\\"', 1)],
-)
-
-register("parce.lang.scheme.Scheme.root",
-    name = "Scheme",
-    desc = "Scheme programming language",
-    section = "Scripting",
-    aliases = ["guile"],
-    filenames = [("*.scm", 1)],
-    mimetypes = [("text/x-script.scheme", 1), ("text/x-script.guile", 1)],
-    guesses = [(r'^\s*[;(]', .5), (r'\(define\b', .7)],
+    guesses = [(r"^@c\b", 0.8), (r"^\\input\s+texinfo\b", 1)],
 )
 
 register("parce.lang.toml.Toml.root",
     name = "TOML",
     desc = "Tom's Obvious, Minimal Language",
     section = "Other",
-    filenames = [("*.toml", 1), ("*.tml", .5)],
+    filenames = [("*.toml", 1), ("*.tml", 0.5)],
     mimetypes = [("application/toml", 1)],
-    guesses = [(r'^\s*\[\\w+(\.(w+))*\]', 0.5), (r"^\s*#", 0.05)],
+    guesses = [(r"^\s*\[\\w+(\.(w+))*\]", 0.5), (r"^\s*#", 0.05)],
 )
 
-register("parce.lang.html.XHtml.root",
-    name = "XHTML",
-    desc = "XHTML strict",
+register("parce.lang.troff.Troff.root",
+    name = "Troff",
+    desc = "Troff document processing language",
     section = "Markup",
-    filenames = [("*.html", 1), ("*.htm", 1), ("*.xhtml", 1)],
-    mimetypes = [("text/html", 1), ("application/xhtml+xml", 1)],
-    guesses = [
-        (r'(?i)<!DOCTYPE html', .8),
-        (r'\bXHTML.*?\bStrict/', .9),
-        (r'(?i)<html\b', .8),
-        (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', .05),
-    ],
+    aliases = ["groff", "nroff", "roff", "man"],
+    filenames = [("*.man", 0.8), ("*.[12345678]", 0.8)],
+    mimetypes = [("application/x-troff", 0.8), ("text/troff", 0.8)],
+    guesses = [(r"^\.", 0.5), (r"^\.TH\b", 1), (r'^\.\\"', 1)],
+)
+
+register("parce.lang.xml.Dtd.root",
+    name = "DTD",
+    desc = "Document Type Definition",
+    section = "Markup",
+    filenames = [("*.dtd", 1)],
+    mimetypes = [("application/xml-dtd", 1)],
+    guesses = [(r"<!ENTITY\b", 0.5)],
 )
 
 register("parce.lang.xml.Xml.root",
     name = "XML",
     desc = "Extensible Markup Language",
     section = "Markup",
-    aliases = ['sgml'],
+    aliases = ["sgml"],
     filenames = [("*.xml", 1)],
     mimetypes = [("text/xml", 1), ("application/xml", 1)],
-    guesses = [(r'^\s*<\?xml ', 1)],
+    guesses = [(r"^\s*<\?xml ", 1)],
 )
 
 register("parce.lang.xslt.Xslt.root",
     name = "XSLT",
     desc = "Extensible Stylesheet Language Transformations",
     section = "Markup",
-    aliases = ['xslt', 'xsl'],
-    filenames = [("*.xsl", 1), ("*.xslt", 1), ("*.xpl", .5)],
-    mimetypes = [("application/xsl+xml", 1), ("application/xslt+xml", 1), ("text/xsl", 1), ("text/xslt", 1)],
-    guesses = [(r'^\s*<\?xml ', .1), (r'<xsl:stylesheet\b', 1)],
+    aliases = ["xslt", "xsl"],
+    filenames = [("*.xsl", 1), ("*.xslt", 1), ("*.xpl", 0.5)],
+    mimetypes = [
+        ("application/xsl+xml", 1),
+        ("application/xslt+xml", 1),
+        ("text/xsl", 1),
+        ("text/xslt", 1),
+    ],
+    guesses = [(r"^\s*<\?xml ", 0.1), (r"<xsl:stylesheet\b", 1)],
 )
-
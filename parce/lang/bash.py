@@ -31,6 +31,19 @@ from parce.action import *
 from parce.rule import *
 
 
+registry = {
+    "Bash.root": dict(
+        name = "Bash",
+        desc = "Bash shell language",
+        section = "Shell",
+        aliases = ["sh"],
+        filenames = [("*.sh", .7), ("*.bash", 1)],
+        mimetypes = [("text/x-shellscript", 1)],
+        guesses = [(r'^#!.*?/(ba)?sh', .5)],
+    ),
+}
+
+
 # Main source of information: man bash :-)
 
 
@@ -30,6 +30,19 @@ from parce import Language, lexicon, default_action, default_target, skip
 from parce.action import *
 from parce.rule import *
 
+
+registry = {
+    "C.root": dict(
+        name = "C",
+        desc = "C/C++ programming language",
+        section = "Programming",
+        aliases = ["c", "cpp"],
+        filenames = [("*.[ch]", .7), ("*.[ch]pp", .7), ("*.cc", .7), ("*.hh", .7)],
+        mimetypes = [("text/x-c", 1)],
+        guesses = [(r'#include <[\w\.]+>', .5), (r'\busing namespace ', .5)],
+    ),
+}
+
 # support C/C++ UCN
 RE_C_IDENT_ESCAPE = _E_ = r'\\u[0-9a-fA-F]{4}|\\U[0-9a-fA-F]{8}'
 RE_C_IDENT_START  = fr'[^\W\d]|\$|{_E_}'
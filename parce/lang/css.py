@@ -42,6 +42,18 @@ from parce.indent import Indent, INDENT, DEDENT
 from parce import docio
 
 
+registry = {
+    "Css.root": dict(
+        name = "CSS",
+        desc = "Cascading Style Sheet",
+        section = "Markup",
+        filenames = [("*.css", 1)],
+        mimetypes = [("text/css", 1)],
+        guesses = [(r'\b@media\b', 0.5), (r'\bdiv\b', 0.1), (r'\bbody\s*\{', 0.4)],
+    ),
+}
+
+
 RE_CSS_ESCAPE = r"\\(?:[0-9A-Fa-f]{1,6} ?|.)"
 RE_CSS_NUMBER = (
     r"[+-]?"               # sign
@@ -32,6 +32,18 @@ from parce.util import split_list
 import parce.action as a
 
 
+registry = {
+    "Csv.root": dict(
+        name = "CSV",
+        desc = "Comma-separated values",
+        section = "Other",
+        filenames = [("*.csv", 1)],
+        mimetypes = [("text/csv", 1)],
+        guesses = [(r'((?<![^\n,"])[^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*)(,([^\n,"]+|[ \t]*"(""|[^"])*"[ \t]*))+(\n|$)', 0.1)],
+    ),
+}
+
+
 class Csv(Language):
     """RFC-4180 compliant CSV format."""
     @lexicon
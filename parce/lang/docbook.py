@@ -32,6 +32,18 @@ from parce.rule import TEXT, ifmember
 from parce.action import Delimiter, Keyword, Name
 
 
+registry = {
+    "DocBook.root": dict(
+        name = "DocBook",
+        desc = "DocBook XMl/SGML computer documentation",
+        section = "Markup",
+        filenames = [("*.docbook", 1), ("*.dbk", 1), ("*.xml", .1)],
+        mimetypes = [("text/docbook", 1), ("application/sgml", .1)],
+        guesses = [(r'^\s*<\?xml ', .2), (r'OASIS.*?DocBook', 1), (r'<book\b', .8)],
+    ),
+}
+
+
 class DocBook(Xml):
     """DocBook is also valid Xml."""
     @classmethod
@@ -37,6 +37,36 @@ from parce.lang.css import Css
 from parce.lang.javascript import JavaScript
 
 
+registry = {
+    "Html.root": dict(
+        name = "HTML",
+        desc = "HTML 4 or 5",
+        section = "Markup",
+        filenames = [("*.html", 1), ("*.htm", 1)],
+        mimetypes = [("text/html", 1)],
+        guesses = [
+            (r'(?i)<!DOCTYPE html', .9),
+            (r'\bXHTML.*?\bTransitional/', .9),
+            (r'(?i)<html\b', .9),
+            (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', .1),
+        ],
+    ),
+    "XHtml.root": dict(
+        name = "XHTML",
+        desc = "XHTML strict",
+        section = "Markup",
+        filenames = [("*.html", 1), ("*.htm", 1), ("*.xhtml", 1)],
+        mimetypes = [("text/html", 1), ("application/xhtml+xml", 1)],
+        guesses = [
+            (r'(?i)<!DOCTYPE html', .8),
+            (r'\bXHTML.*?\bStrict/', .9),
+            (r'(?i)<html\b', .8),
+            (r'<[^\W\d]\w*(\s+[^\W\d]\w*(\s*=\s*(".*?"|\S+))?)*\s*/?>', .05),
+        ],
+    ),
+}
+
+
 # elements that do not start a new tag context
 HTML_VOID_ELEMENTS = (
     "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
@@ -35,6 +35,19 @@ from parce.action import (
 from parce.transform import Transform
 
 
+registry = {
+    "Ini.root": dict(
+        name = "INI",
+        desc = "INI file format",
+        section = "Other",
+        aliases = ["config"],
+        filenames = [("*.ini", 1), ("*.cfg", 0.6), ("*.conf", 0.6)],
+        mimetypes = [("text/plain", 0.1)],
+        guesses = [(r'^\s*\[\w+\]', 0.5), (r"^\s*[#;]", 0.1)],
+    ),
+}
+
+
 class Ini(Language):
     @lexicon
     def root(cls):
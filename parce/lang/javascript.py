@@ -36,6 +36,19 @@ from parce.unicharclass import categories
 from . import javascript_words as js
 
 
+registry = {
+    "JavaScript.root": dict(
+        name = "JavaScript",
+        desc = "JavaScript programming language",
+        section = "Scripting",
+        aliases = ["js", "ecmascript"],
+        filenames = [("*.js", 1), ("*.jsm", .8)],
+        mimetypes = [("application/javascript", 1), ("application/x-javascript", 1),
+                 ("text/x-javascript", 1), ("text/javascript", 1)],
+    ),
+}
+
+
 RE_JS_IDENT_STARTCHAR = r'$_' + ''.join(map(categories.get, ['Lu', 'Ll', 'Lt', 'Lm', 'Lo', 'Nl']))
 RE_JS_IDENT_CHAR = RE_JS_IDENT_STARTCHAR + '\u200c\u200d' + ''.join(map(categories.get, ['Mn', 'Mc', 'Nd', 'Pc']))
 RE_JS_ESCAPE_CHAR = r'\\u[0-9a-fA-F]{4}'
@@ -137,3 +137,13 @@ JAVASCRIPT_BUILTINS = (
 )
 
 
+## Generated by python -m parce.lang._manifest --write -- do not edit below!
+
+from parce.regex import precompute_words2regexp
+
+precompute_words2regexp(JAVASCRIPT_BUILTINS, "document|this|window")
+precompute_words2regexp(JAVASCRIPT_CONSTANTS, "Infinity|NaN|null|undefined|(?:fals|tru)e")
+precompute_words2regexp(JAVASCRIPT_DECLARATORS, "function|var|with|(?:cons|le)t")
+precompute_words2regexp(JAVASCRIPT_KEYWORDS, "break|new|of|return|switch|(?:els|whil)e|(?:voi|yiel)d|c(?:ontinue|a(?:se|tch))|d(?:o|e(?:fault|lete))|f(?:inally|or)|i(?:f|n(?:stanceof)?)|t(?:ry|ypeof|h(?:is|row))")
+precompute_words2regexp(JAVASCRIPT_PROTOTYPES, "Math|Object|RegExp|String|(?:Boolea|Functio|su)n|(?:Dat|netscap)e|(?:Erro|Numbe)r|P(?:ackages|ro(?:mise|xy))|decodeURI(?:Component)?|e(?:val|ncodeURI(?:Component)?)|is(?:Finite|NaN|SafeInteger)|parse(?:Floa|In)t")
+precompute_words2regexp(JAVASCRIPT_RESERVED_KEYWORDS, "a(?:bstrac|wai)t|b(?:oolean|yte)|c(?:har|lass|onst)|d(?:ebugger|ouble)|e(?:num|x(?:port|tends))|f(?:inal|loat)|goto|long|(?:nativ|volatil)e|i(?:mp(?:lements|ort)|nt(?:erface)?)|p(?:ackage|ublic|r(?:ivate|otected))|s(?:hort|tatic|uper|ynchronized)|t(?:hrows|ransient)")
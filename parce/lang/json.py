@@ -39,6 +39,18 @@ from parce.rule import chars, words
 from parce.transform import Transform
 
 
+registry = {
+    "Json.root": dict(
+        name = "JSON",
+        desc = "JavaScript Object Notation format",
+        section = "Other",
+        filenames = [("*.json", 1)],
+        mimetypes = [("application/json", 1)],
+        guesses = [(r'^\s*\{\s*"\w+"\s*:', .7)],
+    ),
+}
+
+
 JSON_CONSTANTS = {
     'true': True,
     'false': False,
@@ -39,6 +39,21 @@ from parce import docio
 from . import lilypond_words
 
 
+registry = {
+    "LilyPond.root": dict(
+        name = "LilyPond",
+        desc = "LilyPond music",
+        section = "Music",
+        filenames = [("*.ly", 1), ("*.ily", .8), ("*.lyi", .5)],
+        mimetypes = [("text/x-lilypond", .8)],
+        guesses = [
+            (r'\\version\s*"\d', .8),
+            (r'\\relative ', .1)
+        ],
+    ),
+}
+
+
 SKIP_WHITESPACE = (r"\s+", skip)
 
 RE_FRACTION = r"\d+/\d+"
@@ -55,8 +70,8 @@ RE_LILYPOND_PITCHWORD = r"(?<![^\W\d])[a-zé]+(?:[_-][a-zé]+)*(?![^\W\d_])"
 
 # all durations
 RE_LILYPOND_DURATION = (
-    words(filter(lambda w: w.startswith('\\'), lilypond_words.durations), suffix = RE_LILYPOND_ID_RIGHT_BOUND) +
-    "|" + words(filter(lambda w: not w.startswith('\\'), lilypond_words.durations), suffix = r'(?!\d)'))
+    words(lilypond_words.duration_commands, suffix = RE_LILYPOND_ID_RIGHT_BOUND) +
+    "|" + words(lilypond_words.duration_numbers, suffix = r'(?!\d)'))
 
 # Standard actions defined/used here:
 Rest = Text.Music.Rest
@@ -2278,10 +2278,9 @@ drum_pitch_names.update((short_name, drum_pitch_longnames.get(long_name))
 rests = tuple("Rrs")
 
 
-durations = (
-    '\\maxima', '\\longa', '\\breve',
-    '1', '2', '4', '8', '16', '32', '64', '128', '256', '512', '1024', '2048',
-)
+duration_commands = ('\\maxima', '\\longa', '\\breve')
+duration_numbers = ('1', '2', '4', '8', '16', '32', '64', '128', '256', '512', '1024', '2048')
+durations = duration_commands + duration_numbers
 
 
 # http://lilypond.org/doc/latest/Documentation/usage/music-fragment-options
@@ -2315,3 +2314,11 @@ lilypond_book_units = (
     "in",
     "pt",
 )
+
+
+## Generated by python -m parce.lang._manifest --write -- do not edit below!
+
+from parce.regex import precompute_words2regexp
+
+precompute_words2regexp(duration_commands, r"\\(?:breve|(?:long|maxim)a)")
+precompute_words2regexp(duration_numbers, "1(?:6|024|28)?|2(?:048|56)?|8|(?:3|51)2|6?4")
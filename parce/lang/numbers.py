@@ -92,6 +92,26 @@ from parce.rule import bygroup, words
 from parce.transform import Transform
 
 
+registry = {
+    "Deutsch.root": dict(
+        name = "Deutsch",
+        desc = "German Numbers",
+    ),
+    "English.root": dict(
+        name = "English",
+        desc = "English Numbers",
+    ),
+    "Français.root": dict(
+        name = "Français",
+        desc = "French Numbers",
+    ),
+    "Nederlands.root": dict(
+        name = "Nederlands",
+        desc = "Dutch Numbers",
+    ),
+}
+
+
 __all__ = (
     "English", "EnglishTransform", "ENGLISH_TENS", "ENGLISH_TO19",
     "Nederlands", "NederlandsTransform", "NEDERLANDS_TENS", "NEDERLANDS_TO19",
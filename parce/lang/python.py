@@ -37,6 +37,24 @@ from parce.rule import (
 from . import python_words
 
 
+registry = {
+    "Python.root": dict(
+        name = "Python",
+        desc = "Python programming language",
+        section = "Scripting",
+        filenames = [("*.py", 1)],
+        mimetypes = [("text/x-python", .8)],
+        guesses = [(r'^#!.{,20}python', .8), (r'\bimport\s+[a-z]+\b', .3)],
+    ),
+    "PythonConsole.root": dict(
+        name = "Python Console",
+        desc = "Python console session",
+        section = "Scripting",
+        guesses = [(r'^>>> ', .3)],
+    ),
+}
+
+
 RE_PYTHON_IDENTIFIER = _I_ = r'[^\W\d]\w*'
 RE_PYTHON_HORIZ_SPACE = _S_ = r'[^\S\n]'
 RE_PYTHON_LINE_CONTINUATION = _N_ = r'\\\n'
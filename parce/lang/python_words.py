@@ -66,3 +66,11 @@ exceptions = (
     'UnicodeError', 'UnicodeTranslateError', 'UnicodeWarning', 'UserWarning',
     'ValueError', 'Warning', 'ZeroDivisionError',
 )
+
+
+## Generated by python -m parce.lang._manifest --write -- do not edit below!
+
+from parce.regex import precompute_words2regexp
+
+precompute_words2regexp(constants, "(?:Fals|Non|Tru)e")
+precompute_words2regexp(keywords, "break|global|lambda|or|pass|try|yield|a(?:nd|wait|s(?:sert|ync)?)|c(?:lass|ontinue)|de[fl]|e(?:xcept|l(?:if|se))|f(?:inally|or|rom)|i(?:[fns]|mport)|no(?:t|nlocal)|r(?:aise|eturn)|w(?:hile|ith)")
@@ -50,6 +50,19 @@ from parce.rule import (
 )
 
 
+registry = {
+    "Scheme.root": dict(
+        name = "Scheme",
+        desc = "Scheme programming language",
+        section = "Scripting",
+        aliases = ["guile"],
+        filenames = [("*.scm", 1)],
+        mimetypes = [("text/x-script.scheme", 1), ("text/x-script.guile", 1)],
+        guesses = [(r'^\s*[;(]', .5), (r'\(define\b', .7)],
+    ),
+}
+
+
 RE_SCHEME_RIGHT_BOUND = r"(?=$|[()\s;]|#\()"
 
 RE_SCHEME_ID_SPECIAL_INITIAL = r'!$%&*/:<=>?^_~'
@@ -33,6 +33,18 @@ from parce.action import (
 from parce.rule import MATCH, bygroup, ifgroup, findmember, gselect
 
 
+registry = {
+    "Tcl.root": dict(
+        name = "Tcl",
+        desc = "Tool command language",
+        section = "Scripting",
+        filenames = [("*.tcl", 1)],
+        mimetypes = [("text/tcl", .8), ("text/x-tcl", .8), ("text/x-script.tcl", .8)],
+        guesses = [(r'^#!.*?(wi|tcl)sh', .8), (r'^namespace eval', .1)],
+    ),
+}
+
+
 RE_TCL_NUMBER = (r'[-+]?(?:'
     r'0(?:([oO]?[0-7]+)'                            # 1 octal
         r'|([bB][01]+)'                             # 2 binary
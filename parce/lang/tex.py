@@ -31,6 +31,19 @@ from parce.action import (
 from parce.rule import arg, MATCH, bygroup, ifgroup, ifmember
 
 
+registry = {
+    "Latex.root": dict(
+        name = "LaTeX",
+        desc = "TeX and LaTeX",
+        section = "Markup",
+        aliases = ["TeX"],
+        filenames = [("*.tex", 1), ("*.sty", .8), ("*.cls", .1)],
+        mimetypes = [("text/x-latex", .8), ("application/x-latex", .8)],
+        guesses = [(r'\\document(class|style)[\{\[]', .8)],
+    ),
+}
+
+
 MATH_ENVIRONMENTS = (
     "math", "displaymath", "equation", "eqnarray", "aqnarray*")
 
@@ -35,6 +35,18 @@ from parce.action import (
 from parce.rule import bygroup, ifgroup
 
 
+registry = {
+    "Texinfo.root": dict(
+        name = "Texinfo",
+        desc = "GNU Texinfo",
+        section = "Markup",
+        filenames = [("*.texi", 1), ("*.texinfo", 1), ("*.txi", .5), ("*.itexi", .3), ("*.tex", .1)],
+        mimetypes = [("application/x-texinfo", 1)],
+        guesses = [(r'^@c\b', .8), (r'^\\input\s+texinfo\b', 1)],
+    ),
+}
+
+
 class Texinfo(Language):
 
     @lexicon
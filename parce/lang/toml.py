@@ -33,6 +33,18 @@ from parce.action import (
 from parce.rule import TEXT, bygroup, call, select
 
 
+registry = {
+    "Toml.root": dict(
+        name = "TOML",
+        desc = "Tom's Obvious, Minimal Language",
+        section = "Other",
+        filenames = [("*.toml", 1), ("*.tml", .5)],
+        mimetypes = [("application/toml", 1)],
+        guesses = [(r'^\s*\[\\w+(\.(w+))*\]', 0.5), (r"^\s*#", 0.05)],
+    ),
+}
+
+
 # https://tools.ietf.org/html/rfc3339#section-5.6
 RE_FULL_DATE = r"\d{4}-\d\d-\d\d"
 RE_PARTIAL_TIME = r"\d\d:\d\d:\d\d(?:\.\d+)?"
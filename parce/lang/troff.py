@@ -33,6 +33,19 @@ from parce.action import (
 from parce.rule import bygroup
 
 
+registry = {
+    "Troff.root": dict(
+        name = "Troff",
+        desc = "Troff document processing language",
+        section = "Markup",
+        aliases = ["groff", "nroff", "roff", "man"],
+        filenames = [("*.man", .8), ("*.[12345678]", .8)],
+        mimetypes = [("application/x-troff", .8), ("text/troff", .8)],
+        guesses = [(r'^\.', .5), (r'^\.TH\b', 1), (r'^\.\\"', 1)],
+    ),
+}
+
+
 class Troff(Language):
     @lexicon(re_flags=re.MULTILINE)
     def root(cls):
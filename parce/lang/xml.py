@@ -34,6 +34,27 @@ from parce.rule import (
     MATCH, TEXT, bygroup, call, dselect, ifgroup, select, words)
 
 
+registry = {
+    "Dtd.root": dict(
+        name = "DTD",
+        desc = "Document Type Definition",
+        section = "Markup",
+        filenames = [("*.dtd", 1)],
+        mimetypes = [("application/xml-dtd", 1)],
+        guesses = [(r'<!ENTITY\b', 0.5)],
+    ),
+    "Xml.root": dict(
+        name = "XML",
+        desc = "Extensible Markup Language",
+        section = "Markup",
+        aliases = ['sgml'],
+        filenames = [("*.xml", 1)],
+        mimetypes = [("text/xml", 1), ("application/xml", 1)],
+        guesses = [(r'^\s*<\?xml ', 1)],
+    ),
+}
+
+
 # source: https://www.w3.org/TR/xml/#NT-NameStartChar
 RE_XML_NAME_START_CHAR = (
     '_:A-Za-z\xC0-\xD6\xD8-\xF6'
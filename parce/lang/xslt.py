@@ -29,6 +29,19 @@ from parce.rule import TEXT, ifeq, ifmember
 from parce.action import Keyword
 
 
+registry = {
+    "Xslt.root": dict(
+        name = "XSLT",
+        desc = "Extensible Stylesheet Language Transformations",
+        section = "Markup",
+        aliases = ['xslt', 'xsl'],
+        filenames = [("*.xsl", 1), ("*.xslt", 1), ("*.xpl", .5)],
+        mimetypes = [("application/xsl+xml", 1), ("application/xslt+xml", 1), ("text/xsl", 1), ("text/xslt", 1)],
+        guesses = [(r'^\s*<\?xml ', .1), (r'<xsl:stylesheet\b', 1)],
+    ),
+}
+
+
 class Xslt(Xml):
     """Xslt is also valid Xml, give Xslt tags the Keyword action."""
     @classmethod
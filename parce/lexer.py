@@ -171,6 +171,20 @@ class Lexer:
             else:
                 break   # done
 
+    def columns(self, text, pos=0, columns=None):
+        """Parse text and return a :class:`~.columns.TokenColumns` object.
+
+        The columns are filled directly from the events, no tokens are
+        created. If you specify an existing TokenColumns object, the tokens
+        are added to it and it is returned.
+
+        """
+        from .columns import TokenColumns
+        if columns is None:
+            columns = TokenColumns()
+        columns.add_events(self.events(text, pos), self.lexicons[:])
+        return columns
+
     def filter_actions(self, action, pos, text, match):
         """Handle filtering via DynamicAction instances."""
         if isinstance(action, Item):
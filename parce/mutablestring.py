@@ -28,6 +28,11 @@ If you make modifications while inside a context (using the Python context
 manager protocol), the modifications (that may not overlap then) are only
 applied when the context exits for the last time.
 
+Two implementations are provided: :class:`MutableString` stores the text in a
+plain Python string, and :class:`RopeString` stores the text in a balanced
+tree of string pieces (a rope), so that changes to a large text do not copy the
+full text.
+
 """
 
 
@@ -60,6 +65,8 @@ class AbstractMutableString:
     * ``_get_text()`` called by ``__getitem__`` to get a slice or single
       character
 
+    * ``find()`` and ``rfind()`` to search for a substring
+
     """
     def __init__(self, text=""):
         self._edit_context = 0
@@ -163,18 +170,35 @@ class AbstractMutableString:
         """
         return self.text()[start:end]
 
+    def find(self, sub, start=0, end=None):
+        """Return the lowest index where substring ``sub`` is found, like str.find()."""
+        return self.text().find(sub, start, end)
+
+    def rfind(self, sub, start=0, end=None):
+        """Return the highest index where substring ``sub`` is found, like str.rfind()."""
+        return self.text().rfind(sub, start, end)
+
     def _apply_changes(self):
         """(Internal.) Check, sort and apply the changes."""
         if self._changes:
             changes = list(self._get_changes())
-            head = old = changes[0][0]
-            added = 0
-            for start, end, text in changes:
-                added += start - old + len(text)
-                old = end
-            self._update_text(changes)
             self._changes.clear()
-            self.text_changed(head, end - head, added)
+            self._apply_change_list(changes)
+
+    def _apply_change_list(self, changes):
+        """(Internal.) Apply a sorted list of non-overlapping (start, end, text) changes.
+
+        This bypasses the edit context and the checks in ``__setitem__``, and
+        can be used to apply many changes at once.
+
+        """
+        head = old = changes[0][0]
+        added = 0
+        for start, end, text in changes:
+            added += start - old + len(text)
+            old = end
+        self._update_text(changes)
+        self.text_changed(head, end - head, added)
 
     def _get_changes(self):
         """(Internal.) Yield the changes.
@@ -238,3 +262,205 @@ class MutableString(AbstractMutableString):
         self._text = "".join(generate_text())
 
 
+
+
+class RopeString(MutableString):
+    """A Mutable string, storing the string contents in a rope.
+
+    The rope is a balanced binary tree of string pieces. A change only
+    replaces the pieces along the path to the changed range, so it takes
+    O(log n) time, regardless of the length of the text. The full text is only
+    created when :meth:`text` is called, and then cached until the next change;
+    :meth:`_get_text`, :meth:`find` and :meth:`rfind` use the pieces directly.
+
+    To use a rope for the text of a Document, inherit from a Document class
+    and this class, in that order::
+
+        class RopeDocument(parce.Document, RopeString):
+            pass
+
+    """
+    def __init__(self, text=""):
+        AbstractMutableString.__init__(self)
+        self._rope = _rope_from_text(text)
+        self._text = text
+
+    def text(self):
+        """Return the text, joining the pieces if the text was changed."""
+        if self._text is None:
+            self._text = "".join(_rope_pieces(self._rope, 0, _rope_length(self._rope)))
+        return self._text
+
+    def __len__(self):
+        """Return the length of the text."""
+        return _rope_length(self._rope)
+
+    def _get_text(self, start, end):
+        """Return the selected range of the text."""
+        if self._text is not None:
+            return self._text[start:end]
+        return "".join(_rope_pieces(self._rope, start, end))
+
+    def find(self, sub, start=0, end=None):
+        """Return the lowest index where substring ``sub`` is found, like str.find()."""
+        if self._text is not None or not sub:
+            return self.text().find(sub, start, end)
+        start, end, _ = slice(start, end).indices(len(self))
+        overlap = len(sub) - 1
+        pos = start     # position of the text in the search buffer
+        tail = ""
+        for piece in _rope_pieces(self._rope, start, end):
+            text = tail + piece
+            index = text.find(sub)
+            if index != -1:
+                return pos + index
+            tail = text[max(len(text) - overlap, 0):] if overlap else ""
+            pos += len(text) - len(tail)
+        return -1
+
+    def rfind(self, sub, start=0, end=None):
+        """Return the highest index where substring ``sub`` is found, like str.rfind()."""
+        if self._text is not None or not sub:
+            return self.text().rfind(sub, start, end)
+        start, end, _ = slice(start, end).indices(len(self))
+        overlap = len(sub) - 1
+        pos = end       # end position of the text in the search buffer
+        head = ""
+        for piece in _rope_pieces(self._rope, start, end, True):
+            text = piece + head
+            pos -= len(piece)
+            index = text.rfind(sub)
+            if index != -1:
+                return pos + index
+            head = text[:overlap]
+        return -1
+
+    def _update_text(self, changes):
+        """Apply the changes to the rope."""
+        rope = self._rope
+        for start, end, text in reversed(changes):
+            left, rest = _rope_split(rope, start)
+            right = _rope_split(rest, end - start)[1]
+            rope = _rope_join(_rope_join(left, _rope_from_text(text)), right)
+        self._rope = rope
+        self._text = None
+
+
+# A rope node is either a str (a leaf) or a tuple(left, right, length, depth).
+_LEAF_SIZE = 2048
+
+
+def _rope_length(node):
+    """Return the length of the text in the node."""
+    return len(node) if type(node) is str else node[2]
+
+
+def _rope_depth(node):
+    """Return the depth of the node, 0 for a leaf."""
+    return 0 if type(node) is str else node[3]
+
+
+def _rope_node(left, right):
+    """Return a new node with left and right child."""
+    return (left, right, _rope_length(left) + _rope_length(right),
+            max(_rope_depth(left), _rope_depth(right)) + 1)
+
+
+def _rope_from_text(text):
+    """Return a balanced rope for the text."""
+    if len(text) <= _LEAF_SIZE:
+        return text
+    nodes = [text[i:i+_LEAF_SIZE] for i in range(0, len(text), _LEAF_SIZE)]
+    while len(nodes) > 1:
+        paired = [_rope_node(nodes[i], nodes[i+1]) for i in range(0, len(nodes) - 1, 2)]
+        if len(nodes) & 1:
+            paired[-1] = _rope_node(paired[-1], nodes[-1])
+        nodes = paired
+    return nodes[0]
+
+
+def _rope_balance(left, right):
+    """Return a node for left and right, whose depths may differ by at most 2.
+
+    Performs a single or double rotation if needed, like in an AVL tree.
+
+    """
+    dl, dr = _rope_depth(left), _rope_depth(right)
+    if dl > dr + 1:
+        ll, lr = left[0], left[1]
+        if _rope_depth(ll) >= _rope_depth(lr):
+            return _rope_node(ll, _rope_node(lr, right))
+        return _rope_node(_rope_node(ll, lr[0]), _rope_node(lr[1], right))
+    elif dr > dl + 1:
+        rl, rr = right[0], right[1]
+        if _rope_depth(rr) >= _rope_depth(rl):
+            return _rope_node(_rope_node(left, rl), rr)
+        return _rope_node(_rope_node(left, rl[0]), _rope_node(rl[1], rr))
+    return _rope_node(left, right)
+
+
+def _rope_join(left, right):
+    """Return a balanced rope with the text of left followed by right.
+
+    Small adjacent leaves are combined, so typing does not create many tiny
+    pieces.
+
+    """
+    if not _rope_length(left):
+        return right
+    elif not _rope_length(right):
+        return left
+    lstr, rstr = type(left) is str, type(right) is str
+    if lstr and rstr:
+        if len(left) + len(right) <= _LEAF_SIZE:
+            return left + right
+    elif rstr:
+        if type(left[1]) is str and len(left[1]) + len(right) <= _LEAF_SIZE:
+            return _rope_node(left[0], left[1] + right)
+    elif lstr:
+        if type(right[0]) is str and len(left) + len(right[0]) <= _LEAF_SIZE:
+            return _rope_node(left + right[0], right[1])
+    dl, dr = _rope_depth(left), _rope_depth(right)
+    if dl > dr + 1:
+        return _rope_balance(left[0], _rope_join(left[1], right))
+    elif dr > dl + 1:
+        return _rope_balance(_rope_join(left, right[0]), right[1])
+    return _rope_node(left, right)
+
+
+def _rope_split(node, pos):
+    """Split the rope at pos, return two balanced ropes (left, right)."""
+    if type(node) is str:
+        return node[:pos], node[pos:]
+    left, right = node[0], node[1]
+    length = _rope_length(left)
+    if pos < length:
+        a, b = _rope_split(left, pos)
+        return a, _rope_join(b, right)
+    elif pos > length:
+        a, b = _rope_split(right, pos - length)
+        return _rope_join(left, a), b
+    return left, right
+
+
+def _rope_pieces(node, start, end, reverse=False):
+    """Yield the pieces of text from start to end, in reverse order if desired."""
+    stack = [(node, 0)]
+    while stack:
+        node, offset = stack.pop()
+        length = _rope_length(node)
+        if offset >= end or offset + length <= start:
+            continue
+        if type(node) is str:
+            if start <= offset and offset + length <= end:
+                yield node
+            else:
+                yield node[max(start - offset, 0):end - offset]
+        else:
+            right = (node[1], offset + _rope_length(node[0]))
+            if reverse:
+                stack.append((node[0], offset))
+                stack.append(right)
+            else:
+                stack.append(right)
+                stack.append((node[0], offset))
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+r"""
+Formatter for terminal output using ANSI escape sequences.
+
+The :class:`AnsiFormatter` converts the text formats from a theme to SGR
+(Select Graphic Rendition) escape sequences. Two color modes are supported:
+``"truecolor"`` (24-bit colors) and ``"256"`` (the xterm 256-color palette).
+
+The escape sequence for every action is computed only once per theme. The
+output is generated line by line, and every line ends with a reset sequence,
+so that output can safely be piped into a pager. Usage example::
+
+    >>> from parce import Cursor, Document, find, theme_by_name
+    >>> from parce.out.ansi import AnsiFormatter
+    >>> d = Document(find("css"), "h1 { color: red; }\n")
+    >>> f = AnsiFormatter(theme_by_name('terminal'), "256")
+    >>> f.ansi(Cursor(d, 0, None))
+    '\x1b[1;38;5;30mh1\x1b[0m \x1b[1;38;5;250m{\x1b[0m \x1b[1mcolor\x1b[0m\x1b[38;5;25
+    0m:\x1b[0m \x1b[38;5;100mred\x1b[0m\x1b[38;5;250m;\x1b[0m \x1b[1;38;5;250m}\x1b[0m\n'
+
+Use :meth:`~AnsiFormatter.write_ansi` to write the lines to a file or a
+terminal.
+
+This module can also be run from the command line, writing the highlighted
+contents of a file to standard output::
+
+    $ python -m parce.out.ansi [-t THEME] [-l LANGUAGE] [-m MODE] FILE | less -R
+
+"""
+
+import io
+import os
+import sys
+
+import parce
+import parce.formatter
+
+
+RESET = "\x1b[0m"   #: the escape sequence that resets all attributes
+
+_cube_levels = (0, 95, 135, 175, 215, 255)
+
+
+class AnsiFormatter(parce.formatter.Formatter):
+    """A Formatter to output text with ANSI escape sequences.
+
+    The ``mode`` can be ``"truecolor"`` (the default) or ``"256"``. A
+    ``factory`` can be given to convert a TextFormat to an escape sequence
+    yourself; by default :func:`sgr` is used.
+
+    """
+    def __init__(self, theme=None, mode="truecolor", factory=None):
+        if mode not in ("truecolor", "256"):
+            raise ValueError("unknown color mode: {}".format(mode))
+        self.mode = mode
+        if factory is None:
+            factory = lambda tf: sgr(tf, mode) or None
+        super().__init__(theme, factory)
+
+    def ansi_lines(self, cursor):
+        """Yield the text of the cursor's selection line by line.
+
+        Every line contains the escape sequences for the highlighting and
+        ends with the newline, if there is one. Formatting never continues
+        after the end of a line.
+
+        """
+        if not cursor.has_selection():
+            return
+        doc = cursor.document()
+        text = doc.text()
+        start, end = cursor.pos, cursor.end
+        if end is None:
+            end = len(text)
+
+        def pieces():
+            prev_end = start
+            for pos, end_, code in self.format_ranges(doc.get_root(True), start, end):
+                if pos > prev_end:
+                    yield text[prev_end:pos], None
+                yield text[pos:end_], code
+                prev_end = end_
+            if end > prev_end:
+                yield text[prev_end:end], None
+
+        line = []
+        for t, code in pieces():
+            lines = t.split("\n")
+            for l in lines[:-1]:
+                if l:
+                    line.append(code + l + RESET if code else l)
+                line.append("\n")
+                yield "".join(line)
+                line.clear()
+            l = lines[-1]
+            if l:
+                line.append(code + l + RESET if code else l)
+        if line:
+            yield "".join(line)
+
+    def ansi(self, cursor):
+        """Return the text of the cursor's selection with escape sequences."""
+        return "".join(self.ansi_lines(cursor))
+
+    def write_ansi(self, cursor, file, encoding="utf-8"):
+        """Write the text of the cursor's selection line by line to ``file``.
+
+        The ``file`` can be a text or a binary file object; to a binary file
+        the text is written using the specified ``encoding``.
+
+        """
+        if isinstance(file, io.TextIOBase):
+            for line in self.ansi_lines(cursor):
+                file.write(line)
+        else:
+            for line in self.ansi_lines(cursor):
+                file.write(line.encode(encoding, "replace"))
+
+
+def sgr(textformat, mode="truecolor"):
+    """Return the SGR escape sequence for the :class:`~.theme.TextFormat`.
+
+    The ``mode`` can be ``"truecolor"`` or ``"256"``. Returns an empty string
+    if the textformat has no properties that can be displayed in a terminal.
+
+    """
+    codes = []
+    weight = textformat.font_weight
+    if weight in ("bold", "bolder") or (isinstance(weight, (int, float)) and weight >= 600):
+        codes.append("1")
+    elif weight == "lighter" or (isinstance(weight, (int, float)) and weight <= 300):
+        codes.append("2")
+    if textformat.font_style in ("italic", "oblique"):
+        codes.append("3")
+    decorations = textformat.text_decoration_line
+    if "underline" in decorations:
+        codes.append("4")
+    if "line-through" in decorations:
+        codes.append("9")
+    if "overline" in decorations:
+        codes.append("53")
+    if textformat.color and textformat.color.a:
+        codes.append("38;" + _color(textformat.color, mode))
+    if textformat.background_color and textformat.background_color.a:
+        codes.append("48;" + _color(textformat.background_color, mode))
+    if codes:
+        return "\x1b[{}m".format(";".join(codes))
+    return ""
+
+
+def color256(color):
+    """Return the index of the xterm 256-color palette entry nearest to ``color``.
+
+    Only the 6x6x6 color cube and the grayscale ramp are used, because the
+    first 16 colors are often changed by the user.
+
+    """
+    r, g, b = color[:3]
+    def level(v):
+        return min(range(6), key=lambda i: abs(_cube_levels[i] - v))
+    ri, gi, bi = level(r), level(g), level(b)
+    cube = _cube_levels[ri], _cube_levels[gi], _cube_levels[bi]
+    n = min(23, max(0, round(((r + g + b) / 3 - 8) / 10)))
+    gray = (8 + 10 * n,) * 3
+    def distance(c):
+        return (c[0] - r) ** 2 + (c[1] - g) ** 2 + (c[2] - b) ** 2
+    if distance(gray) < distance(cube):
+        return 232 + n
+    return 16 + 36 * ri + 6 * gi + bi
+
+
+def _color(color, mode):
+    """Return the color part of a SGR sequence, without the 38 or 48 prefix."""
+    if mode == "256":
+        return "5;{}".format(color256(color))
+    return "2;{};{};{}".format(*color[:3])
+
+
+def main(args=None):
+    """Write the contents of a file with ANSI highlighting to standard output."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m parce.out.ansi",
+        description="Write a file with ANSI highlighting to standard output.")
+    parser.add_argument("-t", "--theme", default="terminal",
+        help="the name of the theme to use (default: %(default)s)")
+    parser.add_argument("-l", "--language",
+        help="the name of the language (guessed by default)")
+    parser.add_argument("-e", "--encoding",
+        help="the encoding of the file (guessed by default)")
+    parser.add_argument("-m", "--mode", choices=("truecolor", "256"),
+        help="the color mode (truecolor if $COLORTERM says so, otherwise 256)")
+    parser.add_argument("file", help="the file to highlight")
+    args = parser.parse_args(args)
+
+    mode = args.mode
+    if not mode:
+        mode = "truecolor" if os.environ.get("COLORTERM") in ("truecolor", "24bit") else "256"
+    root_lexicon = parce.find(args.language) if args.language else True
+    if root_lexicon is None:
+        parser.error("unknown language: {}".format(args.language))
+    d = parce.Document.load(args.file, root_lexicon, args.encoding)
+    f = AnsiFormatter(parce.theme_by_name(args.theme), mode)
+    try:
+        f.write_ansi(parce.Cursor(d, 0, None), sys.stdout)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # the pager or head exited; don't complain when Python flushes stdout
+        # at exit (see "Note on SIGPIPE" in the signal module documentation)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
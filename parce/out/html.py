@@ -21,10 +21,12 @@
 r"""
 Formatter for HTML output.
 
-This module contains two formatters that can create HTML output:
-:class:`HtmlFormatter` and :class:`SimpleHtmlFormatter`. The first converts
-format settings from a theme to inline CSS style attributes; the latter just
-puts the class names in the HTML and you should link to a CSS file yourself.
+This module contains three formatters that can create HTML output:
+:class:`HtmlFormatter`, :class:`CompactHtmlFormatter` and
+:class:`SimpleHtmlFormatter`. The first converts format settings from a theme
+to inline CSS style attributes; the second uses short generated class names and
+writes only the used formats in a ``<style>`` element; the latter just puts the
+class names in the HTML and you should link to a CSS file yourself.
 
 Usage example::
 
@@ -50,15 +52,35 @@ Usage example::
       </body>
     </html>
 
+To write large documents, use :meth:`~HtmlMixin.write_html` or
+:meth:`~HtmlMixin.write_full_html`, which write the HTML in chunks to a text or
+binary file object, without building the full HTML string in memory. Giving
+them a :class:`~concurrent.futures.ThreadPoolExecutor` formats the text in
+parallel threads, split at block boundaries. (The pieces of text are formatted
+using the document tree, which can't be sent to other processes, so a
+ProcessPoolExecutor can't be used. Note that on a Python with a global
+interpreter lock, the threads do not make formatting faster.)
+
+This module can also be run from the command line, writing a HTML document
+with the highlighted contents of a file to standard output::
+
+    $ python -m parce.out.html [-c] [-j JOBS] [-t THEME] [-l LANGUAGE] FILE > out.html
+
 
 """
 
+import collections
+import io
+import sys
+
+import parce
 import parce.formatter
+from parce import util
 
 FULL_HTML_TEMPLATE = """<!DOCTYPE html>
 <html>
   <head>
-    <meta charset="{charset}"/>
+    <meta charset="{charset}"/>{style}
   </head>
   <body>
     <div class="parce">
@@ -68,10 +90,173 @@ FULL_HTML_TEMPLATE = """<!DOCTYPE html>
 </html>
 """
 
+CHUNK_SIZE = 65536  #: the default size of the chunks written by write_html()
+
+_escape_table = str.maketrans({'&': "&amp;", '<': "&lt;", '>': "&gt;"})
+_attrescape_table = str.maketrans({'&': "&amp;", '<': "&lt;", '>': "&gt;", '"': "&quot;"})
 
 
 class HtmlMixin:
-    """Helper class containing extra methods to generate HTML output."""
+    """Helper class containing extra methods to generate HTML output.
+
+    The ``span_tag`` attribute is the opening tag for a span, in which the
+    format is filled in. The ``split_size`` attribute is the approximate size
+    of the pieces the text is split in when formatting in parallel.
+
+    """
+    span_tag = '<span style="{}">'
+    split_size = 100000
+
+    def html(self, cursor):
+        """Return HTML output for the selected range of the cursor."""
+        return "".join(self.html_chunks(cursor))
+
+    def html_chunks(self, cursor, executor=None):
+        """Yield the HTML for the selected range of the cursor in pieces.
+
+        The opening tag is only created once for every distinct format.
+
+        If an ``executor`` is given, it must be a
+        :class:`concurrent.futures.ThreadPoolExecutor`; the text is then
+        split at block boundaries in pieces of about :attr:`split_size`
+        characters, which are formatted in parallel threads. The output is
+        exactly the same as without an executor. Another executor raises a
+        TypeError.
+
+        """
+        if executor is not None:
+            _check_executor(executor)
+        if cursor.has_selection():
+            doc = cursor.document()
+            tree = doc.get_root(True)
+            if executor is None:
+                ranges = self.format_ranges(tree, cursor.pos, cursor.end)
+                yield from self._html_chunks(doc.text(), ranges, cursor.pos, cursor.end)
+            else:
+                yield from self._parallel_html_chunks(doc, tree, cursor.pos, cursor.end, executor)
+
+    def _parallel_html_chunks(self, doc, tree, start, end, executor, textformats=None):
+        """Format the text in pieces using the executor, and yield the HTML per piece.
+
+        A piece is formatted without giving its end to format_ranges(), so no
+        format is added to the end of the piece that would not be added when
+        formatting the text as a whole. Adjacent ranges that have the same
+        format at the boundary of two pieces are merged, so the FormatRanges
+        are exactly the same as those of the text as a whole.
+
+        If a set is given as ``textformats``, the used textformats are added
+        to it, before the HTML containing them is yielded.
+
+        """
+        text = doc.text()
+        sep = doc.block_separator
+        splits = [start]
+        text_end = len(text) if end is None else end
+        pos = start
+        while True:
+            pos = text.find(sep, pos + self.split_size, text_end)
+            if pos == -1:
+                break
+            pos += len(sep)
+            splits.append(pos)
+        pieces = list(zip(splits, splits[1:] + [end]))
+        last = len(pieces) - 1
+
+        def format_piece(i):
+            piece_start, piece_end = pieces[i]
+            if i == last:
+                return list(self.format_ranges(tree, piece_start, end))
+            ranges = []
+            for r in self.format_ranges(tree, piece_start, None):
+                if r.pos >= piece_end:
+                    break
+                elif r.end > piece_end:
+                    r = r._replace(end=piece_end)
+                ranges.append(r)
+            return ranges
+
+        def html_piece(ranges, piece_start, piece_end):
+            return "".join(self._html_chunks(text, ranges, piece_start, piece_end))
+
+        window = 16
+        format_jobs = collections.deque(executor.submit(format_piece, i)
+            for i in range(min(window, len(pieces))))
+        html_jobs = collections.deque()
+        current = None      # [ranges, start, end] not yet submitted
+        for i, (piece_start, piece_end) in enumerate(pieces):
+            ranges = format_jobs.popleft().result()
+            if i + window < len(pieces):
+                format_jobs.append(executor.submit(format_piece, i + window))
+            if current:
+                prev = current[0]
+                if prev and ranges and prev[-1].end == ranges[0].pos \
+                        and prev[-1].textformat == ranges[0].textformat:
+                    prev[-1] = prev[-1]._replace(end=ranges[0].end)
+                    piece_start = ranges[0].end
+                    del ranges[0]
+                    if not ranges:
+                        current[2] = piece_end
+                        continue
+                current[2] = piece_start
+                if textformats is not None:
+                    textformats.update(r.textformat for r in current[0])
+                html_jobs.append(executor.submit(html_piece, *current))
+                while len(html_jobs) > window or (html_jobs and html_jobs[0].done()):
+                    yield html_jobs.popleft().result()
+            current = [ranges, piece_start, piece_end]
+        if current:
+            if textformats is not None:
+                textformats.update(r.textformat for r in current[0])
+            html_jobs.append(executor.submit(html_piece, *current))
+        while html_jobs:
+            yield html_jobs.popleft().result()
+
+    def _html_chunks(self, text, ranges, start, end):
+        """Yield the HTML for the text from start to end in pieces, using the FormatRanges."""
+        tags = {}
+        prev_end = start
+        for pos, end_, fmt in ranges:
+            if pos > prev_end:
+                yield text[prev_end:pos].translate(_escape_table)
+            if fmt:
+                try:
+                    tag = tags[fmt]
+                except KeyError:
+                    tag = tags[fmt] = self.span_tag.format(fmt.translate(_attrescape_table))
+                yield tag
+                yield text[pos:end_].translate(_escape_table)
+                yield "</span>"
+            else:
+                yield text[pos:end_].translate(_escape_table)
+            prev_end = end_
+        if end is None:
+            end = len(text)
+        if end > prev_end:
+            yield text[prev_end:end].translate(_escape_table)
+
+    def write_html(self, cursor, file, encoding="utf-8", chunk_size=CHUNK_SIZE, executor=None):
+        """Write HTML output for the selected range of the cursor to ``file``.
+
+        The ``file`` can be a text or a binary file object; to a binary file the
+        HTML is written using the specified ``encoding``, and characters that
+        can't be encoded are written as character references. The HTML is
+        written in chunks of at least ``chunk_size`` characters. If an
+        ``executor`` is given, the text is formatted in parallel, see
+        :meth:`html_chunks`.
+
+        """
+        _write_chunks(self.html_chunks(cursor, executor), file, encoding, chunk_size)
+
+    def write_full_html(self, cursor, file, charset="utf-8", chunk_size=CHUNK_SIZE, executor=None):
+        """Write the selected text as a complete HTML document to ``file``.
+
+        The ``file`` can be a text or a binary file object; to a binary file
+        the HTML is written using the ``charset`` as encoding. See
+        :meth:`write_html`.
+
+        """
+        _write_chunks(self.full_html_chunks(cursor, charset, executor), file, charset, chunk_size)
+
     def full_html(self, cursor, charset="utf-8"):
         """Returns the selected text as a complete HTML document.
 
@@ -80,10 +265,26 @@ class HtmlMixin:
         when writing the HTML to an output device.
 
         """
-        return FULL_HTML_TEMPLATE.format(
-            charset = charset,
-            baseformat = self.baseformat() or "",
-            html = self.html(cursor))
+        return "".join(self.full_html_chunks(cursor, charset))
+
+    def full_html_chunks(self, cursor, charset="utf-8", executor=None):
+        """Yield the selected text as a complete HTML document in pieces."""
+        return self._full_html_chunks(self.html_chunks(cursor, executor), charset)
+
+    def _full_html_chunks(self, html_chunks, charset, style="", baseformat=None):
+        """Yield the HTML document in pieces, with the ``html_chunks`` in the PRE block.
+
+        The ``baseformat`` is the inline CSS for the PRE block, by default our
+        :meth:`~parce.formatter.Formatter.baseformat`.
+
+        """
+        if baseformat is None:
+            baseformat = self.baseformat() or ""
+        head, tail = FULL_HTML_TEMPLATE.split("{html}")
+        fmt = dict(charset=charset, style=style, baseformat=baseformat)
+        yield head.format(**fmt)
+        yield from html_chunks
+        yield tail.format(**fmt)
 
 
 class HtmlFormatter(HtmlMixin, parce.formatter.Formatter):
@@ -113,10 +314,7 @@ class HtmlFormatter(HtmlMixin, parce.formatter.Formatter):
             <span style="font-weight: bold;">}</span>'
 
         """
-        span = '<span style="{}">{}</span>'.format
-        return "".join(
-            span(attrescape(fmt), escape(text)) if fmt else escape(text)
-            for text, fmt in self.format_document(cursor))
+        return super().html(cursor)
 
 
 class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
@@ -126,6 +324,8 @@ class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
     highlighting.
 
     """
+    span_tag = '<span class="{}">'
+
     def html(self, cursor):
         """Return HTML output for the selected range of the cursor.
 
@@ -149,20 +349,111 @@ class SimpleHtmlFormatter(HtmlMixin, parce.formatter.SimpleFormatter):
             ss="delimiter">;</span> <span class="delimiter bracket">}</span>'
 
         """
-        span = '<span class="{}">{}</span>'.format
-        return "".join(
-            span(attrescape(fmt), escape(text)) if fmt else escape(text)
-            for text, fmt in self.format_document(cursor))
+        return super().html(cursor)
+
+
+class CompactHtmlFormatter(HtmlMixin, parce.formatter.Formatter):
+    """A Formatter that produces compact HTML with short generated class names.
+
+    Every distinct text format gets a short class name, consisting of the
+    ``prefix`` and a number. Actions that have identical formats share the
+    same class name. The full HTML document contains a ``<style>`` element with
+    only the formats that are actually used. For example::
+
+        >>> from parce.out.html import CompactHtmlFormatter
+        >>> from parce import Cursor, Document, find, theme_by_name
+        >>> d = Document(find('css'), "h1 { color: red; }")
+        >>> f = CompactHtmlFormatter(theme_by_name())
+        >>> f.html(Cursor(d, 0, None))
+        '<span class="p0">h1</span> <span class="p1">{</span> <span class="p2
+        ">color</span>: <span class="p3">red</span>; <span class="p1">}</span>'
+        >>> print(f.style())
+        .p0 { color: #00008b; font-weight: bold; }
+        .p1 { font-weight: bold; }
+        .p2 { color: #4169e1; font-weight: bold; }
+        .p3 { color: #2e8b57; }
+
+    The class names remain the same for the lifetime of the formatter, so
+    they can be shared by multiple documents.
+
+    """
+    span_tag = '<span class="{}">'
+
+    def __init__(self, theme=None, prefix="p"):
+        self.prefix = prefix    #: The prefix for the generated class names.
+        self._class_names = util.caching_dict(self._new_class_name)
+        self._css = {}
+        super().__init__(theme, lambda tf: self.class_name(inline_css(tf)))
+
+    def _new_class_name(self, css):
+        """Return a new class name for the css."""
+        name = "{}{}".format(self.prefix, len(self._css))
+        self._css[name] = css
+        return name
+
+    def class_name(self, css):
+        """Return the class name for the inline ``css`` string.
+
+        Returns None if the string is empty.
+
+        """
+        if css:
+            return self._class_names[css]
+
+    def style(self, class_names=None):
+        """Return the CSS rules for the class names (by default for all)."""
+        if class_names is None:
+            class_names = self._css
+        return "".join(".{} {{ {} }}\n".format(name, self._css[name])
+            for name in sorted(class_names, key=lambda name: int(name[len(self.prefix):])))
+
+    def full_html_chunks(self, cursor, charset="utf-8", executor=None):
+        """Reimplemented to add a ``<style>`` element with the used classes."""
+        if executor is not None:
+            _check_executor(executor)
+        # our baseformat() returns a class name, but the PRE block needs CSS
+        theme = self.get_theme()
+        baseformat = inline_css(theme.baseformat()) if theme else ""
+        if not cursor.has_selection():
+            return self._full_html_chunks((), charset, baseformat=baseformat)
+        doc = cursor.document()
+        tree = doc.get_root(True)
+        if executor is None:
+            ranges = list(self.format_ranges(tree, cursor.pos, cursor.end))
+            class_names = set(r.textformat for r in ranges)
+            chunks = self._html_chunks(doc.text(), ranges, cursor.pos, cursor.end)
+        else:
+            class_names = set()
+            chunks = list(self._parallel_html_chunks(doc, tree, cursor.pos,
+                                    cursor.end, executor, class_names))
+        style = self.style(class_names)
+        if style:
+            style = "\n    <style>\n{}    </style>".format(
+                "".join("      " + line for line in style.splitlines(True)))
+        return self._full_html_chunks(chunks, charset, style, baseformat)
+
+
+def _check_executor(executor):
+    """Raise TypeError if the executor does not run its jobs in threads.
+
+    The jobs use the document tree and the formatter, which can't be pickled
+    and sent to other processes.
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if not isinstance(executor, ThreadPoolExecutor):
+        raise TypeError("the executor must be a ThreadPoolExecutor, "
+                        "not {}".format(type(executor).__name__))
 
 
 def escape(text):
     r"""Escape &, < and > to use text in HTML."""
-    return text.replace('&', "&amp;").replace('<', "&lt;").replace('>', "&gt;")
+    return text.translate(_escape_table)
 
 
 def attrescape(text):
     r"""Escape &, <, > and ", to use text in HTML."""
-    return escape(text).replace('"', "&quot;")
+    return text.translate(_attrescape_table)
 
 
 def inline_css(textformat):
@@ -175,3 +466,141 @@ def inline_css(textformat):
     return " ".join("{}: {};".format(prop, value)
         for prop, value in sorted(props.items()))
 
+
+
+def write_html_multi(formatters, cursor, files, encoding="utf-8", chunk_size=CHUNK_SIZE):
+    """Write HTML output for the cursor's selection for several formatters at once.
+
+    The ``formatters`` are HTML formatters (e.g. :class:`HtmlFormatter`
+    instances with different themes), and for every formatter the HTML is
+    written to the file object at the same index in ``files``, exactly like
+    :meth:`~HtmlMixin.write_html` would. But the tree is traversed only once,
+    using a :class:`~parce.formatter.MultiFormatter`, and every piece of text
+    is escaped only once.
+
+    """
+    if not cursor.has_selection():
+        return
+    doc = cursor.document()
+    text = doc.text()
+    start, end = cursor.pos, cursor.end
+    writers = [_ChunkWriter(file, encoding, chunk_size) for file in files]
+    outputs = [(w.write, f.span_tag, {}) for w, f in zip(writers, formatters)]
+    current = [None] * len(outputs)  # the currently open span per output
+
+    def close_all():
+        for i, fmt in enumerate(current):
+            if fmt:
+                outputs[i][0]("</span>")
+                current[i] = None
+
+    multi = parce.formatter.MultiFormatter(formatters)
+    prev_end = start
+    for pos, end_, formats in multi.format_ranges(doc.get_root(True), start, end):
+        if pos > prev_end:
+            close_all()
+            gap = text[prev_end:pos].translate(_escape_table)
+            for write, span_tag, tags in outputs:
+                write(gap)
+        piece = text[pos:end_].translate(_escape_table)
+        for i, ((write, span_tag, tags), fmt) in enumerate(zip(outputs, formats)):
+            if fmt != current[i]:
+                if current[i]:
+                    write("</span>")
+                if fmt:
+                    try:
+                        tag = tags[fmt]
+                    except KeyError:
+                        tag = tags[fmt] = span_tag.format(fmt.translate(_attrescape_table))
+                    write(tag)
+                current[i] = fmt
+            write(piece)
+        prev_end = end_
+    close_all()
+    if end is None:
+        end = len(text)
+    if end > prev_end:
+        gap = text[prev_end:end].translate(_escape_table)
+        for write, span_tag, tags in outputs:
+            write(gap)
+    for w in writers:
+        w.flush()
+
+
+class _ChunkWriter:
+    """Collects strings and writes them to a file in chunks.
+
+    Strings are collected until their length reaches ``chunk_size``, and then
+    written at once. If ``file`` is not a text file, the strings are encoded.
+
+    """
+    def __init__(self, file, encoding, chunk_size):
+        if isinstance(file, io.TextIOBase):
+            self._write = file.write
+        else:
+            self._write = lambda text: file.write(text.encode(encoding, "xmlcharrefreplace"))
+        self._chunk_size = chunk_size
+        self._buf = []
+        self._size = 0
+
+    def write(self, text):
+        """Add text, and write the collected text if the chunk size is reached."""
+        self._buf.append(text)
+        self._size += len(text)
+        if self._size >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the collected text."""
+        if self._buf:
+            self._write("".join(self._buf))
+            self._buf.clear()
+            self._size = 0
+
+
+def _write_chunks(chunks, file, encoding, chunk_size):
+    """Write the strings from the ``chunks`` iterable to ``file``, see _ChunkWriter."""
+    w = _ChunkWriter(file, encoding, chunk_size)
+    for chunk in chunks:
+        w.write(chunk)
+    w.flush()
+
+
+def main(args=None):
+    """Write the contents of a file as highlighted HTML to standard output."""
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m parce.out.html",
+        description="Write a file as highlighted HTML to standard output.")
+    parser.add_argument("-t", "--theme", default="default",
+        help="the name of the theme to use (default: %(default)s)")
+    parser.add_argument("-l", "--language",
+        help="the name of the language (guessed by default)")
+    parser.add_argument("-e", "--encoding",
+        help="the encoding of the file (guessed by default)")
+    parser.add_argument("-c", "--compact", action="store_true",
+        help="use short class names and a style element instead of inline styles")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+        help="the number of threads to format the text with; this only makes "
+             "it faster on a Python without a global interpreter lock "
+             "(default: %(default)s)")
+    parser.add_argument("file", help="the file to highlight")
+    args = parser.parse_args(args)
+
+    root_lexicon = parce.find(args.language) if args.language else True
+    if root_lexicon is None:
+        parser.error("unknown language: {}".format(args.language))
+    d = parce.Document.load(args.file, root_lexicon, args.encoding)
+    formatter = CompactHtmlFormatter if args.compact else HtmlFormatter
+    f = formatter(parce.theme_by_name(args.theme))
+    c = parce.Cursor(d, 0, None)
+    if args.jobs > 1:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(args.jobs) as executor:
+            f.write_full_html(c, sys.stdout.buffer, executor=executor)
+    else:
+        f.write_full_html(c, sys.stdout.buffer)
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
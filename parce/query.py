@@ -194,6 +194,34 @@ first, the action should exactly match, with the latter the tokens are
 selected when the action exactly matches, or is a descendant of the given
 action.
 
+
+How queries are evaluated:
+^^^^^^^^^^^^^^^^^^^^^^^^^^
+
+A query is built lazily: every step only appends to a plan, and nothing is
+computed until you iterate over the query. Before the first iteration the plan
+is optimized once:
+
+* consecutive selectors are fused into one predicate, so a chain like
+  ``.tokens.action(Name).containing("x")`` does not stack three generators;
+
+* selectors that only accept tokens or contexts following :attr:`~Query.all`
+  narrow the traversal itself, e.g. ``.all.action(Name)`` does not yield
+  contexts at all;
+
+* an :meth:`~Query.in_range` step following :attr:`~Query.all` is pushed down
+  into the traversal, which then uses :meth:`Context.nodes_in
+  <parce.tree.Context.nodes_in>` and friends to skip whole subtrees outside
+  the range;
+
+* when the nodes are known to be in document order (e.g. after ``.all``
+  on a single node), :attr:`~Query.uniq` is dropped and
+  :attr:`~Query.remove_descendants` is evaluated in one streaming pass.
+
+To repeatedly get the results of the same queries on a tree that is updated
+by a :class:`~parce.treebuilder.TreeBuilder`, use a :class:`QueryCache`,
+which only re-evaluates the queries for the contexts that changed.
+
 """
 
 
@@ -202,12 +230,41 @@ import functools
 import itertools
 import re
 import sys
+import weakref
 
 from .lexicon import Lexicon
+from .treeindex import get_index
+
+
+# kinds of steps in a query plan
+_MAP = "map"            # navigate: (kind, func, order)
+_FILTER = "filter"      # select: (kind, predicate, what, key)
+_ALL = "all"            # traverse: (kind, what)
+_RANGE = "range"        # in_range: (kind, start, end)
+_UNIQ = "uniq"          # (kind,)
+_REMOVE_DESCENDANTS = "remove_descendants"  # (kind,)
+
+# what kind of nodes a selector or traversal yields
+_TOKENS = "tokens"
+_CONTEXTS = "contexts"
+_NOTHING = "nothing"
+
+# what we know about the order of the nodes in the stream
+_SINGLE = "single"      # at most one node
+_ORDERED = "ordered"    # document order, no duplicates
+
+# how a navigating step changes the order
+_KEEP = "keep"          # the order is kept (e.g. slicing)
+_ONE = "one"            # yields at most one node per node
+_SPREAD = "spread"      # yields nodes in document order from a single node
 
 
 def query(func):
-    """Make a method result (generator) into a new Query object."""
+    """Make a method result (generator) into a new Query object.
+
+    The method's result is not part of the query plan and thus not optimized.
+
+    """
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         return Query(lambda: func(self, *args, **kwargs))
@@ -219,6 +276,30 @@ def pquery(func):
     return property(query(func))
 
 
+def navigator(order=None):
+    """Make a generator function into a Query method adding a step to the plan.
+
+    The function is called with an iterable of nodes (and the arguments given
+    to the method) and should yield the resulting nodes. The ``order``
+    describes how the step changes the order of the nodes, which enables
+    some optimizations.
+
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            return self._append(_MAP, lambda nodes: func(nodes, *args, **kwargs), order)
+        return wrapper
+    return decorator
+
+
+def pnavigator(order=None):
+    """Make a generator function into a Query property adding a step to the plan."""
+    def decorator(func):
+        return property(navigator(order)(func))
+    return decorator
+
+
 class Query:
     """A Query navigates and filters a node tree.
 
@@ -227,15 +308,42 @@ class Query:
     or by calling :meth:`Query.from_nodes` on a list of nodes (tokens and/or
     contexts).
 
+    The ``gen`` is a callable returning an iterable of the initial nodes. If
+    ``single`` is True, the caller guarantees that it yields at most one node,
+    which helps optimizing the query.
+
     """
-    __slots__ = '_gen', '_inv'
+    __slots__ = '_gen', '_inv', '_steps', '_single', '_plan'
 
-    def __init__(self, gen, invert=False):
+    def __init__(self, gen, invert=False, steps=(), single=False):
         self._gen = gen
         self._inv = invert
+        self._steps = steps
+        self._single = single
+        self._plan = None
 
     def __iter__(self):
-        return self._gen()
+        plan = self._plan
+        if plan is None:
+            plan = self._plan = _compile(self._steps, self._single)
+        nodes = self._gen()
+        for func in plan:
+            nodes = func(nodes)
+        return iter(nodes)
+
+    def _append(self, *step):
+        """Return a new Query with the step added to the plan."""
+        return type(self)(self._gen, False, self._steps + (step,), self._single)
+
+    def _filter(self, predicate=None, what=None, key=None):
+        """Return a new Query selecting the nodes that match the predicate.
+
+        If ``what`` is _TOKENS or _CONTEXTS, the predicate is only called
+        for those nodes. If ``key`` is given, it is a tuple (attribute,
+        values) that allows looking up the nodes in a tree index.
+
+        """
+        return self._append(_FILTER, predicate, what, key)
 
     @classmethod
     def from_nodes(cls, nodes):
@@ -353,7 +461,6 @@ class Query:
         return count
 
     # navigators
-    @query
     def __getitem__(self, key):
         """Get the specified item or items of every context node.
 
@@ -363,216 +470,163 @@ class Query:
         """
         # slicing or itemgetting with integers are not invertible selectors
         if isinstance(key, slice):
-            for n in self:
-                if n.is_context:
-                    yield from n[key]
+            def getitem(nodes):
+                for n in nodes:
+                    if n.is_context:
+                        yield from n[key]
+            order = _SPREAD if key.step is None or key.step > 0 else None
         else:
-            for n in self:
-                if n.is_context:
-                    k = key + len(n) if key < 0 else key
-                    if 0 <= k < len(n):
-                        yield n[k]
-
-    @pquery
-    def children(self):
+            def getitem(nodes):
+                for n in nodes:
+                    if n.is_context:
+                        k = key + len(n) if key < 0 else key
+                        if 0 <= k < len(n):
+                            yield n[k]
+            order = _ONE
+        return self._append(_MAP, getitem, order)
+
+    @pnavigator(_SPREAD)
+    def children(nodes):
         """All direct children of the current nodes."""
-        for n in self:
+        for n in nodes:
             if n.is_context:
                 yield from n
 
-    @pquery
+    @property
     def all(self):
         """All descendants, contexts and their nodes."""
-        def innergen(n):
-            stack = []
-            j = 0
-            while True:
-                for i in range(j, len(n)):
-                    m = n[i]
-                    yield m
-                    if m.is_context:
-                        stack.append(i)
-                        j = 0
-                        n = m
-                        break
-                else:
-                    if stack:
-                        n = n.parent
-                        j = stack.pop() + 1
-                    else:
-                        break
-        for n in self:
-            yield n
-            if n.is_context:
-                yield from innergen(n)
+        return self._append(_ALL, None)
 
-    @pquery
+    @property
     def alltokens(self):
         """Shortcut for all.tokens."""
-        for n in self:
-            if n.is_token:
-                yield n
-            else:
-                yield from n.tokens()
+        return self._append(_ALL, _TOKENS)
 
-    @pquery
+    @property
     def allcontexts(self):
         """Shortcut for all.contexts."""
-        def innergen(n):
-            stack = []
-            j = 0
-            while True:
-                for i in range(j, len(n)):
-                    m = n[i]
-                    if m.is_context:
-                        yield m
-                        stack.append(i)
-                        j = 0
-                        n = m
-                        break
-                else:
-                    if stack:
-                        n = n.parent
-                        j = stack.pop() + 1
-                    else:
-                        break
-        for n in self:
-            if n.is_context:
-                yield n
-                yield from innergen(n)
+        return self._append(_ALL, _CONTEXTS)
 
-    @pquery
-    def parent(self):
+    @pnavigator(_ONE)
+    def parent(nodes):
         """Yield the parent of every node.
 
         This can lead to many double occurrences of the same node in the
         result set; use :attr:`~Query.uniq` to fix that.
 
         """
-        for n in self:
+        for n in nodes:
             if n.parent:
                 yield n.parent
 
-    @pquery
-    def ancestors(self):
+    @pnavigator()
+    def ancestors(nodes):
         """Yield the ancestor contexts of every node."""
-        for n in self:
+        for n in nodes:
             yield from n.ancestors()
 
-    @pquery
-    def first(self):
+    @pnavigator(_ONE)
+    def first(nodes):
         """Yield the first node of every context node, same as [0]."""
-        for n in self:
+        for n in nodes:
             if n and n.is_context:
                 yield n[0]
 
-    @pquery
-    def last(self):
+    @pnavigator(_ONE)
+    def last(nodes):
         """Yield the last node of every context node, same as [-1]."""
-        for n in self:
+        for n in nodes:
             if n and n.is_context:
                 yield n[-1]
 
-    @pquery
-    def next(self):
+    @pnavigator(_ONE)
+    def next(nodes):
         """Yield the next token, if any."""
-        for n in self:
+        for n in nodes:
             t = n.next_token()
             if t:
                 yield t
 
-    @pquery
-    def previous(self):
+    @pnavigator(_ONE)
+    def previous(nodes):
         """Yield the previous token, if any."""
-        for n in self:
+        for n in nodes:
             t = n.previous_token()
             if t:
                 yield t
 
-    @pquery
-    def forward(self):
+    @pnavigator(_SPREAD)
+    def forward(nodes):
         """Yield Tokens in forward direction."""
-        for n in self:
+        for n in nodes:
             yield from n.forward()
 
-    @pquery
-    def backward(self):
+    @pnavigator()
+    def backward(nodes):
         """Yield Tokens in backward direction."""
-        for n in self:
+        for n in nodes:
             yield from n.backward()
 
-    @pquery
-    def right(self):
+    @pnavigator(_ONE)
+    def right(nodes):
         """Yield the right sibling, if any."""
-        for n in self:
+        for n in nodes:
             n = n.right_sibling()
             if n:
                 yield n
 
-    @pquery
-    def left(self):
+    @pnavigator(_ONE)
+    def left(nodes):
         """Yield the left sibling, if any."""
-        for n in self:
+        for n in nodes:
             n = n.left_sibling()
             if n:
                 yield n
 
-    @pquery
-    def right_siblings(self):
+    @pnavigator(_SPREAD)
+    def right_siblings(nodes):
         """Yield the right siblings, if any."""
-        for n in self:
+        for n in nodes:
             yield from n.right_siblings()
 
-    @pquery
-    def left_siblings(self):
+    @pnavigator()
+    def left_siblings(nodes):
         """Yield the left siblings, if any."""
-        for n in self:
+        for n in nodes:
             yield from n.left_siblings()
 
-    @query
-    def map(self, function):
+    @navigator()
+    def map(nodes, function):
         """Call the function on every node and yield its results, which should be zero or more nodes as well."""
-        for n in self:
+        for n in nodes:
             yield from function(n)
 
     # selectors
-    @query
     def filter(self, predicate):
         """Yield nodes for which the predicate returns a value that evaluates to True."""
-        for n in self:
-            if predicate(n):
-                yield n
+        return self._filter(predicate)
 
-    @pquery
+    @property
     def tokens(self):
         """Get only the tokens."""
-        for n in self:
-            if n.is_token:
-                yield n
+        return self._filter(None, _TOKENS)
 
-    @pquery
+    @property
     def contexts(self):
         """Get only the contexts."""
-        for n in self:
-            if n.is_context:
-                yield n
+        return self._filter(None, _CONTEXTS)
 
-    @pquery
+    @property
     def uniq(self):
         """Remove double occurrences of the same node from the result set.
 
         This can happen e.g. when you find the parent of multiple nodes.
 
         """
-        seen = set()
-        for n in self:
-            i = id(n)
-            if i not in seen:
-                seen.add(i)
-                yield n
+        return self._append(_UNIQ)
 
-    @query
-    def slice(self, *args):
+    @navigator(_KEEP)
+    def slice(nodes, *args):
         """Slice the full result set, using :py:func:`itertools.islice`.
 
         This can help narrowing down the result set. For example::
@@ -586,58 +640,46 @@ class Query:
         were matched.
 
         """
-        yield from itertools.islice(self, *args)
+        return itertools.islice(nodes, *args)
 
-    @pquery
+    @property
     def remove_descendants(self):
         """Remove nodes that have ancestors in the current node list."""
-        ids = set(map(id, self))
-        for n in self:
-            if not any(id(p) in ids for p in n.ancestors()):
-                yield n
+        return self._append(_REMOVE_DESCENDANTS)
 
-    @pquery
-    def remove_ancestors(self):
+    @pnavigator(_KEEP)
+    def remove_ancestors(nodes):
         """Remove nodes that have descendants in the current node list."""
-        ids = set(map(id, self)) & set(map(id, (p for n in self for p in n.ancestors())))
-        for n in self:
+        nodes = list(nodes)
+        ids = set(map(id, nodes)) & set(id(p) for n in nodes for p in n.ancestors())
+        for n in nodes:
             if id(n) not in ids:
                 yield n
 
     @property
     def is_not(self):
         """Invert the next query."""
-        return type(self)(self._gen, not self._inv)
+        return type(self)(self._gen, not self._inv, self._steps, self._single)
 
     # invertible selectors
-    @query
     def len(self, min_length, max_length=None):
         """Only yield contexts, with min_length, or with length between min and max."""
+        inv = self._inv
         if max_length is None:
-            for n in self:
-                if n.is_context and self._inv ^ (len(n) == min_length):
-                    yield n
+            predicate = lambda n: inv ^ (len(n) == min_length)
         else:
-            for n in self:
-                if n.is_context and self._inv ^ (min_length <= len(n) <= max_length):
-                    yield n
+            predicate = lambda n: inv ^ (min_length <= len(n) <= max_length)
+        return self._filter(predicate, _CONTEXTS)
 
-    @query
     def in_range(self, start=0, end=None):
         """Yield a restricted set, tokens and/or contexts must fall in start→end"""
         if end is None:
             end = sys.maxsize
         # don't assume the tokens are in source order
         if self._inv:
-            for n in self:
-                if n.end <= start or n.pos >= end:
-                    yield n
-        else:
-            for n in self:
-                if n.pos >= start and n.end <= end:
-                    yield n
+            return self._filter(lambda n: n.end <= start or n.pos >= end)
+        return self._append(_RANGE, start, end)
 
-    @query
     def __call__(self, *what):
         """Yield token if token has that text, or context if context has that lexicon.
 
@@ -650,32 +692,28 @@ class Query:
         Lang.comment lexicon.
 
         """
-        for n in self:
-            if self._inv ^ ((n.text if n.is_token else n.lexicon) in what):
-                yield n
+        inv = self._inv
+        if not inv and all(isinstance(w, Lexicon) for w in what):
+            return self._filter(lambda n: n.lexicon in what, _CONTEXTS, ("lexicon", what))
+        elif not inv and all(isinstance(w, str) for w in what):
+            return self._filter(lambda n: n.text in what, _TOKENS, ("text", what))
+        return self._filter(lambda n: inv ^ ((n.text if n.is_token else n.lexicon) in what))
 
-    @query
     def startingwith(self, text):
         """Yield tokens that start with text."""
-        for t in self:
-            if t.is_token and self._inv ^ t.text.startswith(text):
-                yield t
+        inv = self._inv
+        return self._filter(lambda t: inv ^ t.text.startswith(text), _TOKENS)
 
-    @query
     def endingwith(self, text):
         """Yield tokens that end with text."""
-        for t in self:
-            if t.is_token and self._inv ^ t.text.endswith(text):
-                yield t
+        inv = self._inv
+        return self._filter(lambda t: inv ^ t.text.endswith(text), _TOKENS)
 
-    @query
     def containing(self, text):
         """Yield tokens that contain the specified text."""
-        for t in self:
-            if t.is_token and self._inv ^ (text in t.text):
-                yield t
+        inv = self._inv
+        return self._filter(lambda t: inv ^ (text in t.text), _TOKENS)
 
-    @query
     def matching(self, pattern, flags=0):
         """Yield tokens matching the regular expression.
 
@@ -684,21 +722,330 @@ class Query:
 
         """
         search = re.compile(pattern, flags).search
-        for t in self:
-            if t.is_token and self._inv ^ bool(search(t.text)):
-                yield t
+        inv = self._inv
+        return self._filter(lambda t: inv ^ bool(search(t.text)), _TOKENS)
 
-    @query
     def action(self, *actions):
         """Yield those tokens whose action *is* one of the given actions."""
-        for t in self:
-            if t.is_token and self._inv ^ (t.action in actions):
-                yield t
+        if self._inv:
+            return self._filter(lambda t: t.action not in actions, _TOKENS)
+        return self._filter(lambda t: t.action in actions, _TOKENS, ("action", actions))
 
-    @query
     def in_action(self, *actions):
         """Yield those tokens whose action *is or inherits from* one of the given actions."""
-        for t in self:
-            if t.is_token and self._inv ^ any(t.action in a for a in actions):
-                yield t
+        inv = self._inv
+        return self._filter(lambda t: inv ^ any(t.action in a for a in actions), _TOKENS)
+
+
+class QueryCache:
+    """Caches the results of named queries on a tree.
+
+    Named queries are added using :meth:`add`, and the results are retrieved
+    using :meth:`get`. A named query is a selector: a function that is called
+    with a Query yielding the children of a context, and should return a Query
+    (or iterable) yielding a subset of those nodes, e.g.::
+
+        >>> cache = QueryCache(tree)
+        >>> cache.add("todo", lambda q: q.action(Comment).containing("TODO"))
+        >>> cache.get("todo")   # all tokens in the tree matching the selector
+
+    The results are cached per context. When the tree is modified, call
+    :meth:`invalidate_node` with the youngest context that changed, which
+    happens automatically when the cache is connected to a
+    :class:`~parce.treebuilder.TreeBuilder` using
+    :meth:`connect_treebuilder`. On the next :meth:`get`, only the invalidated
+    contexts are evaluated again, the cached results of unchanged subtrees are
+    reused.
+
+    """
+    def __init__(self, tree):
+        self.tree = tree    #: The root context.
+        self._queries = {}
+        self._cache = {}
+
+    def add(self, name, selector):
+        """Add a named query, replacing an existing one with the same name."""
+        self._queries[name] = selector
+        self._cache[name] = weakref.WeakKeyDictionary()
+
+    def remove(self, name):
+        """Remove the named query."""
+        del self._queries[name]
+        del self._cache[name]
+
+    def names(self):
+        """Return the names of the added queries."""
+        return list(self._queries)
+
+    def get(self, name):
+        """Return the list of all nodes in the tree selected by the named query.
 
+        The nodes are in document order; the root context itself is never
+        included. Don't modify the returned list.
+
+        """
+        cache = self._cache[name]
+        result = cache.get(self.tree)
+        if result is None:
+            result = self._evaluate(self._queries[name], cache)
+        return result
+
+    def invalidate_node(self, node):
+        """Remove the cached results for this node and its ancestors."""
+        for cache in self._cache.values():
+            n = node
+            while n is not None:
+                cache.pop(n, None)
+                n = n.parent
+
+    def clear(self):
+        """Remove all cached results."""
+        for cache in self._cache.values():
+            cache.clear()
+
+    def connect_treebuilder(self, builder):
+        """Connect to the ``invalidate`` event of the TreeBuilder."""
+        builder.connect("invalidate", self.invalidate_node)
+
+    def disconnect_treebuilder(self, builder):
+        """Disconnects from the events of the TreeBuilder."""
+        builder.disconnect("invalidate", self.invalidate_node)
+
+    def _evaluate(self, selector, cache):
+        """Evaluate the selector for all contexts that are not in the cache."""
+        def select(context):
+            return set(map(id, selector(Query.from_nodes(context))))
+        stack = []
+        n, i, result, selected = self.tree, 0, [], select(self.tree)
+        while True:
+            for i in range(i, len(n)):
+                m = n[i]
+                if id(m) in selected:
+                    result.append(m)
+                if m.is_context:
+                    r = cache.get(m)
+                    if r is None:
+                        stack.append((n, i + 1, result, selected))
+                        n, i, result, selected = m, 0, [], select(m)
+                        break
+                    result.extend(r)
+            else:
+                cache[n] = result
+                if not stack:
+                    return result
+                r = result
+                n, i, result, selected = stack.pop()
+                result.extend(r)
+
+
+def _narrow(what, other):
+    """Return the kind of nodes that both ``what`` and ``other`` accept."""
+    if what is None or what == other:
+        return other
+    elif other is None:
+        return what
+    return _NOTHING
+
+
+def _fuse(predicates):
+    """Return one predicate calling all predicates (None if there are none)."""
+    if not predicates:
+        return None
+    elif len(predicates) == 1:
+        return predicates[0]
+    elif len(predicates) == 2:
+        p, q = predicates
+        return lambda n: p(n) and q(n)
+    return lambda n: all(p(n) for p in predicates)
+
+
+def _range_predicate(start, end):
+    """Return a predicate that is True for nodes that fall in start→end."""
+    return lambda n: n.pos >= start and n.end <= end
+
+
+def _compile(steps, single=False):
+    """Optimize the steps of a query and return a list of functions.
+
+    Every function is called with an iterable of nodes and returns an iterable
+    of nodes, the first is called with the initial nodes of the query.
+
+    """
+    plan = []
+    order = _SINGLE if single else None
+    for step in steps:
+        kind = step[0]
+        last = plan[-1] if plan else None
+        if kind == _RANGE:
+            _, start, end = step
+            if last and last[0] == _ALL:
+                last[3] = max(last[3], start)
+                last[4] = min(last[4], end)
+                continue
+            kind, step = _FILTER, (_FILTER, _range_predicate(start, end), None, None)
+        if kind == _FILTER:
+            _, predicate, what, key = step
+            if key and last and last[0] == _ALL and not last[2] and not last[5] \
+                    and last[1] in (None, what):
+                # the traversal can be looked up in a tree index, if present
+                last[5] = key
+            if last and last[0] in (_FILTER, _ALL):
+                last[1] = _narrow(last[1], what)
+                if predicate:
+                    last[2].append(predicate)
+            else:
+                plan.append([_FILTER, what, [predicate] if predicate else []])
+        elif kind == _ALL:
+            # [kind, what, predicates, start, end, index key]
+            plan.append([_ALL, step[1], [], 0, sys.maxsize, None])
+            order = _ORDERED if order == _SINGLE else None
+        elif kind == _UNIQ:
+            if order is None:
+                plan.append([_MAP, _uniq])
+        elif kind == _REMOVE_DESCENDANTS:
+            if order == _ORDERED:
+                plan.append([_MAP, _remove_descendants_ordered])
+            elif order is None:
+                plan.append([_MAP, _remove_descendants])
+        else:
+            _, func, how = step
+            plan.append([_MAP, func])
+            if how == _SPREAD:
+                order = _ORDERED if order == _SINGLE else None
+            elif how != _KEEP and not (how == _ONE and order == _SINGLE):
+                order = None
+    return [_make_func(p) for p in plan]
+
+
+def _make_func(p):
+    """Return a function for a (compiled) step of the query plan."""
+    kind = p[0]
+    if kind == _MAP:
+        return p[1]
+    what, predicate = p[1], _fuse(p[2])
+    if what == _NOTHING:
+        return lambda nodes: ()
+    if kind == _FILTER:
+        if what == _TOKENS:
+            predicate = _fuse([lambda n: n.is_token] + p[2])
+        elif what == _CONTEXTS:
+            predicate = _fuse([lambda n: n.is_context] + p[2])
+        return functools.partial(filter, predicate) if predicate else iter
+    # _ALL
+    start, end = p[3], p[4]
+    tokens, contexts = what != _CONTEXTS, what != _TOKENS
+    if start > 0 or end < sys.maxsize:
+        def func(nodes):
+            for n in nodes:
+                yield from _all_in_range(n, start, end, tokens, contexts)
+    elif what == _TOKENS:
+        def func(nodes):
+            for n in nodes:
+                if n.is_token:
+                    yield n
+                else:
+                    yield from n.tokens()
+    else:
+        def func(nodes):
+            for n in nodes:
+                yield from _all(n, tokens)
+    traverse = (lambda nodes: filter(predicate, func(nodes))) if predicate else func
+    if not p[5]:
+        return traverse
+    # use the tree index if there is one, the first predicate is the one the
+    # key was derived from
+    attr, values = p[5]
+    rest = _fuse(p[2][1:])
+    index_end = None if end == sys.maxsize else end
+    def lookup(nodes):
+        for n in nodes:
+            index = get_index(n.root())
+            if index:
+                found = index.find(n, attr, values, start, index_end)
+                yield from filter(rest, found) if rest else found
+            else:
+                yield from traverse((n,))
+    return lookup
+
+
+def _all(n, tokens=True):
+    """Yield the node and all its descendants (tokens only if ``tokens``)."""
+    if n.is_context:
+        yield n
+    elif tokens:
+        yield n
+        return
+    else:
+        return
+    stack = []
+    j = 0
+    while True:
+        for i in range(j, len(n)):
+            m = n[i]
+            if m.is_context:
+                yield m
+                stack.append(i)
+                j = 0
+                n = m
+                break
+            elif tokens:
+                yield m
+        else:
+            if stack:
+                n = n.parent
+                j = stack.pop() + 1
+            else:
+                break
+
+
+def _all_in_range(n, start, end, tokens=True, contexts=True):
+    """Yield the node and all its descendants that fall in start→end.
+
+    Subtrees that are outside the range are not visited.
+
+    """
+    if n.is_token:
+        if tokens and n.pos >= start and n.end <= end:
+            yield n
+        return
+    if contexts and n.pos >= start and n.end <= end:
+        yield n
+    if tokens and contexts:
+        yield from n.nodes_in(start, end)
+    elif tokens:
+        yield from n.tokens_in(start, end)
+    else:
+        yield from n.contexts_in(start, end)
+
+
+def _uniq(nodes):
+    """Yield the nodes, skipping double occurrences."""
+    seen = set()
+    for n in nodes:
+        i = id(n)
+        if i not in seen:
+            seen.add(i)
+            yield n
+
+
+def _remove_descendants(nodes):
+    """Yield the nodes that have no ancestors among the nodes."""
+    nodes = list(nodes)
+    ids = set(map(id, nodes))
+    for n in nodes:
+        if not any(id(p) in ids for p in n.ancestors()):
+            yield n
+
+
+def _remove_descendants_ordered(nodes):
+    """Yield the nodes that have no ancestors among the nodes.
+
+    The nodes must be in document order, so a node is a descendant of any of
+    the previous nodes if it is a descendant of the last node we yielded.
+
+    """
+    last = None
+    for n in nodes:
+        if last is None or not (last.is_context and last.is_ancestor_of(n)):
+            yield n
+            last = n
@@ -23,12 +23,18 @@ Utility module with functions to construct or manipulate regular expressions.
 """
 
 
+import itertools
 import operator
 import re
 import unicodedata
 
 
-def words2regexp(words):
+#: The maximum nesting depth of the trie nodes that :func:`words2regexp`
+#: turns into nested groups
+MAX_DEPTH = 50
+
+
+def words2regexp(words, suffixes=True):
     """Convert the ``words`` iterable to an optimized regular expression.
 
     Example::
@@ -39,15 +45,56 @@ def words2regexp(words):
         >>> parce.regex.words2regexp(['car', 'cdr', 'caar', 'cadr', 'cdar', 'cddr'])
         'c[ad]{1,2}r'
 
+    If ``suffixes`` is set to False, common suffixes are not factored out::
+
+        >>> parce.regex.words2regexp(['opa', 'oma', 'mama', 'papa'], False)
+        'mama|papa|o(?:ma|pa)'
+
+    This is faster for very large word lists, although the expression
+    becomes somewhat longer. The time needed is linear in the number of
+    words, but for large word lists it is better to look up the words in a
+    set, see :func:`~parce.rule.findwords`.
+
+    If the ``words`` are a tuple for which a precomputed expression was
+    stored using :func:`precompute_words2regexp`, that expression is returned.
+
     """
-    words, suffix = common_suffix(words)
+    if suffixes and isinstance(words, tuple):
+        try:
+            return _precomputed_words[words]
+        except KeyError:
+            pass
+    return _words2regexp(words, suffixes)
+
+
+def _words2regexp(words, suffixes=True):
+    """Implementation of :func:`words2regexp`, always building a trie."""
+    if suffixes:
+        words, suffix = common_suffix(words)
+    else:
+        suffix = ''
     root = make_trie(words)
-    r = trie_to_regexp_tuple(root)
+    r = trie_to_regexp_tuple(root, suffixes=suffixes)
     if suffix:
         r += (suffix,)
     return build_regexp(r)
 
 
+def precompute_words2regexp(words, regexp=None):
+    """Store the ``regexp`` to be returned by :func:`words2regexp` for ``words``.
+
+    The ``words`` must be a tuple. If ``regexp`` is not given, it is computed.
+    The bundled languages use this in their word list modules, with regular
+    expressions generated by ``python -m parce.lang._manifest --write``, so
+    that the word lists need not to be turned into a trie at runtime.
+
+    """
+    _precomputed_words[words] = regexp or _words2regexp(words)
+
+
+_precomputed_words = {}
+
+
 def make_charclass(chars):
     """Return a string with adjacent characters grouped.
 
@@ -191,38 +238,35 @@ def make_trie(words, reverse=False):
 
     """
     if reverse:
-        chars = lambda word: word[::-1]
-        add = lambda k1, k2: k2 + k1
+        words = (w[::-1] for w in words)
+        key = lambda s: s[::-1]
     else:
-        chars = lambda word: word
-        add = lambda k1, k2: k1 + k2
+        key = lambda s: s
 
+    # The words are sorted, so every group of words with the same first
+    # character is contiguous, and its common prefix is the common prefix of
+    # its first and last word. This avoids creating a node for every
+    # character, and no recursion is needed.
+    first = operator.itemgetter(0)
     root = {}
-    for w in words:
-        d = root
-        for c in chars(w):
-            d = d.setdefault(c, {})
-        d[None] = True  # end
-
-    # merge characters that are the only child with their parents
-    def merge(node):
-        for key, node in node.items():
-            if key:
-                while len(node) == 1:
-                    k, n = next(iter(node.items()))
-                    if k:
-                        key = add(key, k)
-                        node = n
-                    else:
-                        break
-                else:
-                    node = dict(merge(node))
-            yield key, node
-
-    return dict(merge(root))
-
-
-def trie_to_regexp_tuple(node, reverse=False):
+    stack = [(root, sorted(set(words)))]
+    while stack:
+        node, words = stack.pop()
+        end = bool(words) and not words[0]
+        for c, group in itertools.groupby(words[end:], first):
+            group = list(group)
+            w1, w2 = group[0], group[-1]
+            i, length = 1, min(len(w1), len(w2))
+            while i < length and w1[i] == w2[i]:
+                i += 1
+            node[key(w1[:i])] = child = {}
+            stack.append((child, [w[i:] for w in group]))
+        if end:
+            node[None] = True
+    return root
+
+
+def trie_to_regexp_tuple(node, reverse=False, suffixes=True, max_depth=MAX_DEPTH):
     """Converts the trie node to a tuple of regular expression parts.
 
     A part is either a plain string expression or a frozenset instance.
@@ -285,6 +329,18 @@ def trie_to_regexp_tuple(node, reverse=False):
     (Note that the toplevel common suffix is handled by the
     :func:`common_suffix` function, which is called from :func:`words2regexp`.)
 
+    If ``suffixes`` is set to False, common suffixes within alternative
+    expressions are not looked for, which is faster.
+
+    Nodes that are nested deeper than ``max_depth`` levels are not turned
+    into nested groups anymore, but into one group with all the remaining
+    suffixes (see :func:`flatten_trie`), so that neither this function, nor
+    :func:`build_regexp` or the regular expression compiler, run into
+    Python's recursion limit.
+
+    The trie is traversed without recursion, and nodes with the same subtree
+    are grouped by their (hashable) tuple, so this function runs in linear
+    time.
 
     """
     if reverse:
@@ -292,51 +348,77 @@ def trie_to_regexp_tuple(node, reverse=False):
     else:
         combine = lambda r1, r2: r1 + r2
 
-    if len(node) == 1:
-        for k, n in node.items():
-            if k:
-                return combine((k,), trie_to_regexp_tuple(n, reverse))
-            return ()
-    else:
-        seen = []
-        keys = []
+    results = {}    # maps id(node) to the tuple for that node
+
+    def convert(node):
+        """Return the tuple for node, the child nodes are already converted."""
+        if len(node) == 1:
+            for k, n in node.items():
+                if k:
+                    return combine((k,), results[id(n)])
+                return ()
+        subtrees = {}
         groups = set()
 
         # group the nodes if they have the same leaf node
         for k, n in node.items():
             if k:
-                try:
-                    i = seen.index(n)
-                except ValueError:
-                    i = len(seen)
-                    seen.append(n)
-                    keys.append([k])
-                else:
-                    keys[i].append(k)
+                subtrees.setdefault(results[id(n)], []).append(k)
             else:
                 groups.add(None)    # means optional group, may end here
 
-        for keys, node in zip(keys, seen):
+        for sub, keys in subtrees.items():
             if len(keys) == 1:
-                if not any(node):
-                    groups.add(keys[0])
-                else:
-                    groups.add(combine((keys[0],), trie_to_regexp_tuple(node, reverse)))
-            else:
-                if not reverse:
-                    # try to optimize the keys backwards
-                    r = trie_to_regexp_tuple(make_trie(keys, True), True)
-                    if r == (frozenset(keys),) and not any(node):
-                        groups.update(keys)
-                        continue
-                elif not any(node):
+                groups.add(combine((keys[0],), sub) if sub else keys[0])
+            elif suffixes and not reverse and len(set(k[-1] for k in keys)) < len(keys):
+                # some keys have a common suffix, try to optimize them backwards
+                r = trie_to_regexp_tuple(make_trie(keys, True), True, max_depth=max_depth)
+                if r == (frozenset(keys),) and not sub:
                     groups.update(keys)
-                    continue
                 else:
-                    r = (frozenset(keys),)
-                groups.add(combine(r, trie_to_regexp_tuple(node, reverse)))
+                    groups.add(combine(r, sub))
+            elif not sub:
+                groups.update(keys)
+            else:
+                groups.add(combine((frozenset(keys),), sub))
         return groups.pop() if len(groups) == 1 else (frozenset(groups),)
 
+    # make a list of the nodes in depth-first order, and convert them backwards
+    nodes = []
+    stack = [(node, 0)]
+    while stack:
+        n, depth = stack.pop()
+        nodes.append((n, depth))
+        if depth < max_depth:
+            depth += 1
+            stack.extend((child, depth) for k, child in n.items() if k)
+    for n, depth in reversed(nodes):
+        results[id(n)] = convert(n) if depth < max_depth else flatten_trie(n, reverse)
+    return results[id(node)]
+
+
+def flatten_trie(node, reverse=False):
+    """Return a tuple with one group containing all words in the trie node.
+
+    This is used by :func:`trie_to_regexp_tuple` for deeply nested nodes.
+    Example::
+
+        >>> from parce.regex import *
+        >>> flatten_trie(make_trie(["a", "ab", "abc", "b"]))
+        (frozenset({'a', 'ab', 'abc', 'b'}),)
+
+    """
+    words = set()
+    stack = [((), node)]
+    while stack:
+        parts, node = stack.pop()
+        for k, n in node.items():
+            if k:
+                stack.append((parts + (k,), n))
+            else:
+                words.add(''.join(reversed(parts) if reverse else parts) or None)
+    return (frozenset(words),) if len(words) > 1 else tuple(words - {None})
+
 
 def build_regexp(r):
     """Convert a tuple to a full regular expression pattern string.
@@ -452,15 +534,21 @@ def build_regexp(r):
             for k in exprs:
                 (chars if len(k) == 1 else strings).add(k)
             group = []
+            if strings:
+                # a string must come before the strings it is a prefix of
+                group.extend(map(re.escape, sorted(strings, key=_prefix_last)))
             if chars:
                 if len(chars) == 1:
-                    group.append(re.escape(next(iter(chars))))
+                    rx = re.escape(next(iter(chars)))
                 else:
-                    group.append('[' + make_charclass(chars) + ']')
-            if strings:
-                group.extend(map(re.escape, sorted(strings)))
+                    rx = '[' + make_charclass(chars) + ']'
+                # the same holds for single characters, normally they come first
+                if any(s[0] in chars for s in strings):
+                    group.append(rx)
+                else:
+                    group.insert(0, rx)
             if tuples:
-                group.extend(map(build_regexp, tuples))
+                group.extend(sorted(map(build_regexp, tuples)))
             if chars and not strings and not tuples:
                 rx = group[0]
                 enclose = False
@@ -473,3 +561,8 @@ def build_regexp(r):
     return ''.join(result)
 
 
+def _prefix_last(s):
+    """Sort key that sorts a string after all longer strings starting with it."""
+    return s + '\U0010ffff'
+
+
@@ -47,6 +47,7 @@ import fnmatch
 import importlib
 import itertools
 import operator
+import os
 import re
 
 
@@ -97,14 +98,47 @@ class Registry(dict):
     :attr:`fallback` attribute later. The :meth:`find` method uses this
     fallback, if set.
 
+    The filename patterns, mimetypes and guesses of all entries are compiled
+    into a :class:`SuggestIndex` when :meth:`suggest` is first called; the
+    index is kept until the registry is modified.
+
     """
 
     fallback = None #: Another :class:`Registry` the :meth:`find` method can use.
+    _index = None
 
     def __init__(self, fallback=None):
         super().__init__()
         self.fallback = fallback
 
+    def __setitem__(self, key, value):
+        self._index = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._index = None
+        super().__delitem__(key)
+
+    def pop(self, *args):
+        self._index = None
+        return super().pop(*args)
+
+    def popitem(self):
+        self._index = None
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self._index = None
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self._index = None
+        super().update(*args, **kwargs)
+
+    def clear(self):
+        self._index = None
+        super().clear()
+
     def copy(self):
         """Return a copy of this Registry. Any fallback is reused, not copied."""
         copy = type(self)(self.fallback)
@@ -195,19 +229,13 @@ class Registry(dict):
         lexicon, e.g. ``"parce.lang.css.Css.root"``.
 
         """
-        weights = collections.defaultdict(int)
+        index = self.index()
+        weights = {}
         if filename:
-            for name in self:
-                weight = max((w for pat, w in self[name].filenames
-                               if fnmatch.fnmatch(filename, pat)), default=0)
-                if weight:
-                    weights[name] += weight
+            weights.update(index.filename_weights(filename))
         if mimetype:
-            for name in self:
-                weight = max((w for mtype, w in self[name].mimetypes
-                               if mtype == mimetype), default=0)
-                if weight:
-                    weights[name] += weight
+            for name, weight in index.mimetype_weights(mimetype).items():
+                weights[name] = weights.get(name, 0) + weight
 
         # check the contents only if no filename/mimetype matched
         # or there were multiple matches with the same weight
@@ -218,14 +246,24 @@ class Registry(dict):
         else:
             names = self.keys()
         if contents:
-            contents = contents[:5000]
+            guessed = index.guess_weights(contents[:5000], names)
             for name in names:
-                weight = sum(w for regex, w in self[name].guesses
-                               if re.search(regex, contents))
-                if weight:
-                    weights[name] += weight
+                if name in guessed:
+                    weights[name] = weights.get(name, 0) + guessed[name]
         return sorted(weights, key=weights.get, reverse=True)
 
+    def index(self):
+        """Return the :class:`SuggestIndex` for the current contents.
+
+        The index is created when needed, and kept until the registry is
+        modified.
+
+        """
+        index = self._index
+        if index is None:
+            index = self._index = SuggestIndex(self)
+        return index
+
     def qualname(self, name):
         """Find a fully qualified lexicon name for the specified name.
 
@@ -314,6 +352,137 @@ class Registry(dict):
         return dict(d)  # return a normal dict
 
 
+class SuggestIndex:
+    """Precompiled lookup data for :meth:`Registry.suggest`.
+
+    Filename patterns without globbing characters are stored in a dictionary,
+    just like patterns of the form ``"*.ext"``, which are looked up by the
+    possible extensions of a filename; all other patterns are combined in one
+    regular expression that reports all matching patterns at once. The guesses
+    are compiled, and a regular expression that is used by more than one entry
+    is only searched for once. If a regular expression starts with a plain
+    string (possibly after ``\\b``), it is only searched for if the contents
+    contain that string, which is much faster than letting the regular
+    expression engine try every position.
+
+    The dictionaries returned by the methods map the qualified lexicon name to
+    its weight and are ordered like the registry.
+
+    """
+    def __init__(self, registry):
+        order = {name: i for i, name in enumerate(registry)}
+        self._order = order.__getitem__
+        self._names = {}        # exact filename -> [(name, weight)]
+        self._extensions = {}   # ".ext" -> [(name, weight)]
+        self._mimetypes = {}    # mimetype -> [(name, weight)]
+        guesses = {}            # regexp -> [(name, weight)]
+        patterns = []           # (regexp, (name, weight))
+        for name, entry in registry.items():
+            for pattern, weight in entry.filenames:
+                pattern = os.path.normcase(pattern)
+                if not _glob_magic(pattern):
+                    self._names.setdefault(pattern, []).append((name, weight))
+                elif pattern.startswith("*.") and not _glob_magic(pattern[1:]):
+                    self._extensions.setdefault(pattern[1:], []).append((name, weight))
+                else:
+                    patterns.append((fnmatch.translate(pattern), (name, weight)))
+            for mimetype, weight in entry.mimetypes:
+                self._mimetypes.setdefault(mimetype, []).append((name, weight))
+            for regex, weight in entry.guesses:
+                guesses.setdefault(regex, []).append((name, weight))
+        self._patterns = [item for regex, item in patterns]
+        self._pattern_regex = re.compile("".join(
+            # every pattern is tried in a lookahead; an empty group records the match
+            "(?:(?={})(?P<_{}>))?".format(_rename_groups(regex, "_{}_".format(i)), i)
+                for i, (regex, item) in enumerate(patterns))).match if patterns else None
+        self._guesses = [(_required_literal(regex), re.compile(regex).search, items)
+                            for regex, items in guesses.items()]
+
+    def _result(self, weights):
+        """Return the weights dict ordered like the registry, without zero weights."""
+        return {name: weights[name] for name in sorted(weights, key=self._order) if weights[name]}
+
+    def filename_weights(self, filename):
+        """Return a dict with the highest weight of the matching patterns for
+        every lexicon name, for the ``filename``.
+
+        """
+        filename = os.path.normcase(filename)
+        items = list(self._names.get(filename, ()))
+        pos = filename.find(".")
+        while pos != -1:
+            items.extend(self._extensions.get(filename[pos:], ()))
+            pos = filename.find(".", pos + 1)
+        if self._pattern_regex:
+            m = self._pattern_regex(filename)
+            items.extend(self._patterns[int(key[1:])]
+                for key, value in m.groupdict().items() if value is not None)
+        return self._result(_max_weights(items))
+
+    def mimetype_weights(self, mimetype):
+        """Return a dict with the highest weight for every lexicon name that
+        lists ``mimetype``.
+
+        """
+        return self._result(_max_weights(self._mimetypes.get(mimetype, ())))
+
+    def guess_weights(self, contents, names=None):
+        """Return a dict with the summed weights of the matching guesses for
+        every lexicon name, for the ``contents``.
+
+        If ``names`` is given, only the guesses of those lexicon names are
+        tried. Every distinct regular expression is searched at most once.
+
+        """
+        if names is not None:
+            names = set(names)
+        weights = {}
+        for literal, search, items in self._guesses:
+            if names is not None:
+                items = [(name, weight) for name, weight in items if name in names]
+            if items and literal in contents and search(contents):
+                for name, weight in items:
+                    weights[name] = weights.get(name, 0) + weight
+        return self._result(weights)
+
+
+def _max_weights(items):
+    """Return a dict with the highest weight for every name in the (name, weight) items."""
+    weights = {}
+    for name, weight in items:
+        if name not in weights or weight > weights[name]:
+            weights[name] = weight
+    return weights
+
+
+def _required_literal(regex):
+    """Return a string any match of the regex starts with, or the empty string.
+
+    Only simple cases are recognized: a regex starting with plain characters,
+    possibly preceded by ``^`` or ``\\b``, without alternatives and flags.
+
+    """
+    if "|" in regex or "(?" in regex:
+        return ""
+    m = re.match(r"(?:\^|\\b)*([\w @<>#;:=!/'\"-]+)(.?)", regex)
+    if not m:
+        return ""
+    literal = m.group(1)
+    if m.group(2) in ("*", "?", "{"):
+        literal = literal[:-1]      # last character is optional
+    return literal
+
+
+def _glob_magic(pattern):
+    """Return True if the pattern contains globbing characters."""
+    return any(c in pattern for c in "*?[")
+
+
+def _rename_groups(regex, prefix):
+    """Prefix the named groups in a regex made by :func:`fnmatch.translate`."""
+    return re.sub(r"\(\?P([<=])", r"(?P\1" + prefix, regex)
+
+
 # the global Registry is in the ``registry`` module variable
 registry = Registry()
 
@@ -329,3 +498,52 @@ def register(lexicon_name, **kwargs):
 
 ## register the bundled languages
 import parce.lang._registry
+
+
+def main(args=None):
+    """Guess the language of files and print the results, or the time it took."""
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(prog="python -m parce.registry",
+        description="Guess the language of files, recursing into directories.")
+    parser.add_argument("-c", "--contents", action="store_true",
+        help="also use the first 5000 bytes of the files")
+    parser.add_argument("-b", "--benchmark", action="store_true",
+        help="only print the number of files and the time spent guessing")
+    parser.add_argument("path", nargs="+", help="files or directories")
+    args = parser.parse_args(args)
+
+    def files():
+        for path in args.path:
+            if os.path.isdir(path):
+                for root, dirs, filenames in os.walk(path):
+                    dirs.sort()
+                    for filename in sorted(filenames):
+                        yield os.path.join(root, filename)
+            else:
+                yield path
+
+    # when run as a script, this module is not the one the languages are registered in
+    from parce.registry import registry
+    count, elapsed = 0, 0
+    for path in files():
+        contents = None
+        if args.contents:
+            try:
+                with open(path, "rb") as f:
+                    contents = f.read(5000).decode("latin1")
+            except OSError:
+                continue
+        start = time.perf_counter()
+        names = registry.suggest(os.path.basename(path), None, contents)
+        elapsed += time.perf_counter() - start
+        count += 1
+        if not args.benchmark:
+            print("{}\t{}".format(path, registry[names[0]].name if names else "-"))
+    if args.benchmark:
+        print("{} files, {:.1f} ms, {:.1f} us per file".format(
+            count, elapsed * 1000, elapsed * 1e6 / count if count else 0))
+
+
+if __name__ == "__main__":
+    main()
@@ -54,8 +54,9 @@ from . import ruleitem
 
 __all__ = (
     'ARG', 'MATCH', 'TEXT', 'anyof', 'arg', 'bygroup', 'call', 'chars',
-    'derive', 'dselect', 'findmember', 'gselect', 'ifarg', 'ifeq', 'ifgroup',
-    'ifmember', 'ifneq', 'pattern', 'select', 'target', 'using', 'words',
+    'derive', 'dselect', 'findmember', 'findwords', 'gselect', 'ifarg', 'ifeq',
+    'ifgroup', 'ifmember', 'ifneq', 'pattern', 'select', 'target', 'using',
+    'words',
 )
 
 
@@ -349,6 +350,53 @@ def words(words, prefix="", suffix=""):
     return expr
 
 
+#: Word lists with more words than this are matched by :func:`findwords`
+#: using a set lookup instead of a regular expression
+WORDS_THRESHOLD = 1000
+
+
+def findwords(words, result, else_result, pattern=r"\w+", prefix=r"\b", suffix=r"\b", threshold=None):
+    r"""Return rules that yield ``result`` for text matching one of the
+    ``words`` and ``else_result`` for other text matching ``pattern``.
+
+    Use it with ``yield from`` in a lexicon::
+
+        KEYWORDS = ('if', 'else', 'for', 'while', 'return')
+
+        @lexicon
+        def root(cls):
+            yield from findwords(KEYWORDS, Keyword, Name)
+
+    When there are not more words than ``threshold`` (by default
+    :attr:`WORDS_THRESHOLD`), two rules are returned: one using the regular
+    expression created by :func:`words` and a second one matching the
+    ``pattern``. For larger word lists, building and compiling the regular
+    expression takes much time, so only one rule is returned, matching the
+    ``pattern`` and looking up the matched text in a frozen set, like
+    :func:`ifmember`.
+
+    Both give the same tokens, provided that every word fully matches the
+    ``pattern`` and the ``suffix`` does not allow a word to end halfway a
+    match of the pattern (which is the case with the default ``\b``).
+    As with :func:`select`, a ``result`` or ``else_result`` that is a tuple
+    or list is unrolled in the rule.
+
+    """
+    if not isinstance(words, (tuple, list, set, frozenset)):
+        words = tuple(words)
+    if threshold is None:
+        threshold = WORDS_THRESHOLD
+    expr = prefix + pattern + suffix
+    if len(words) > threshold:
+        return (expr, ifmember(TEXT, words, result, else_result)),
+    def rule(pattern, result):
+        if isinstance(result, (tuple, list)):
+            return (pattern, *result)
+        return pattern, result
+    words_expr = prefix + '(?:' + regex.words2regexp(words) + ')' + suffix
+    return rule(words_expr, result), rule(expr, else_result)
+
+
 def chars(chars, positive=True):
     """Return a regular expression pattern matching one of the characters in
     the specified string or iterable.
@@ -145,3 +145,5 @@ class StandardAction:
     def __deepcopy__(self, memo):
         return self
 
+    def __reduce__(self):
+        return type(self), (self._name, self._parent)
@@ -88,6 +88,9 @@ import collections
 import itertools
 import functools
 import os
+import pickle
+import threading
+import weakref
 
 from . import css
 from . import util
@@ -105,7 +108,7 @@ class AbstractTheme:
         raise NotImplementedError
 
 
-class Theme(AbstractTheme):
+class Theme(AbstractTheme, util.Observable):
     """A Theme maps a StandardAction to a TextFormat with CSS properties.
 
     Zero or more ``filenames`` can be given, which are loaded after another. If
@@ -113,37 +116,126 @@ class Theme(AbstractTheme):
     from the filename(s). (If the ``basename`` is given, it is used to resolve
     ``@import`` rules in the ``stylesheet`` text.)
 
+    The stylesheet and the text formats are cached. When a stylesheet file
+    (or a file it imports) has been changed, call :meth:`reload` (or
+    :meth:`reload_if_changed`), or use :meth:`watch` to check the files
+    periodically. Then only the changed files are parsed again. If text formats
+    changed, the Theme emits the ``"changed"`` event, with two arguments: the
+    set of actions whose text format changed, and the set of ``(role,
+    state)`` tuples whose base format changed.
+
     """
 
     def __init__(self, *filenames, stylesheet="", basename=""):
         """Instantiate the Theme from CSS file(s) and/or text."""
+        super().__init__()
         self._filenames = filenames
         self._css_text = stylesheet
         self._css_base = basename
         self.TextFormat = TextFormat
+        self._lock = threading.RLock()
+        self._loaded = None     # (stylesheet, style, mtimes)
+        self._textformats = util.caching_dict(self._get_textformat)
+        self._baseformats = util.caching_dict(self._get_baseformat, True)
+        self._watching = None
 
     def __repr__(self):
         fnames = ', '.join(map(os.path.basename, self.filenames()))
         return '<{} [{}]>'.format(self.__class__.__name__, fnames)
 
-    @util.cached_property
+    def _load(self):
+        """Load and cache the StyleSheet and Style, return a tuple (stylesheet, style, mtimes)."""
+        with self._lock:
+            if self._loaded is None:
+                sheets = [css.StyleSheet.from_file(f) for f in self._filenames]
+                if self._css_text or not self._filenames:
+                    sheets.append(css.StyleSheet.from_text(self._css_text, self._css_base))
+                sheet = sum(sheets[1:], sheets[0])
+                mtimes = [_mtime(f) for f in sheet.filenames()]
+                self._loaded = sheet, sheet.style, mtimes
+            return self._loaded
+
+    @property
     def _stylesheet(self):
-        """Load and cache the StyleSheet."""
-        sheets = [css.StyleSheet.from_file(f) for f in self._filenames]
-        if self._css_text or not self._filenames:
-            sheets.append(css.StyleSheet.from_text(self._css_text, self._css_base))
-        return sum(sheets[1:], sheets[0])
+        """The StyleSheet."""
+        return self._load()[0]
 
-    @util.cached_property
+    @property
     def style(self):
         """The stylesheet style rules (see :py:class:`css.Style <parce.css.Style>`)."""
-        return self._stylesheet.style
+        return self._load()[1]
 
     def filenames(self):
         """Return the list of filenames of the used stylesheet when instantiated"""
         return self._stylesheet.filenames()
 
-    @util.cached_method
+    def is_changed(self):
+        """Return True if one of the stylesheet files changed since loading."""
+        sheet, style, mtimes = self._load()
+        return mtimes != [_mtime(f) for f in sheet.filenames()]
+
+    def reload(self):
+        """Reload the stylesheet(s) and update the cached formats.
+
+        Files that did not change are not parsed again. Cached text formats and
+        base formats are computed again, and if they changed, the ``"changed"``
+        event is emitted. Returns True if any format changed.
+
+        """
+        with self._lock:
+            self._loaded = None
+            self._load()
+            actions = set()
+            for action, f in list(self._textformats.items()):
+                new = self._get_textformat(action)
+                if new != f:
+                    self._textformats[action] = new
+                    actions.add(action)
+            baseformats = set()
+            for key, f in list(self._baseformats.items()):
+                new = self._get_baseformat(*key)
+                if new != f:
+                    self._baseformats[key] = new
+                    baseformats.add(key)
+        if actions or baseformats:
+            self.emit("changed", actions, baseformats)
+            return True
+        return False
+
+    def reload_if_changed(self):
+        """Call :meth:`reload` if a stylesheet file changed.
+
+        Returns True if any format changed.
+
+        """
+        return self.is_changed() and self.reload()
+
+    def watch(self, interval=1.0):
+        """Check the stylesheet files every ``interval`` seconds, and reload if needed.
+
+        Checking is done in a background thread, so the ``"changed"`` event is
+        also emitted from that thread. The thread stops when :meth:`unwatch`
+        is called or the Theme is garbage collected.
+
+        """
+        self.unwatch()
+        stop = self._watching = threading.Event()
+        ref = weakref.ref(self)
+        def watch():
+            while not stop.wait(interval):
+                theme = ref()
+                if theme is None:
+                    break
+                theme.reload_if_changed()
+                del theme
+        threading.Thread(target=watch, daemon=True).start()
+
+    def unwatch(self):
+        """Stop checking the stylesheet files."""
+        if self._watching:
+            self._watching.set()
+            self._watching = None
+
     def baseformat(self, role="window", state="default"):
         """Return a TextFormat for a specific role and a state.
 
@@ -170,6 +262,14 @@ class Theme(AbstractTheme):
         If the state is "focus" or "disabled", it is added as a pseudo class.
 
         """
+        return self._baseformats[role, state]
+
+    def textformat(self, action):
+        """Return the TextFormat for the specified action."""
+        return self._textformats[action]
+
+    def _get_baseformat(self, role, state):
+        """Compute the TextFormat for a specific role and a state."""
         if role == "window":
             e = css.Element(class_="parce")
         elif role == "selection":
@@ -180,13 +280,124 @@ class Theme(AbstractTheme):
             e.pseudo_classes = [state]
         return self.TextFormat(self.style.select_element(e).properties())
 
-    @util.cached_method
-    def textformat(self, action):
-        """Return the TextFormat for the specified action."""
+    def _get_textformat(self, action):
+        """Compute the TextFormat for the specified action."""
         class_ = css_class(action)
         e = css.Element(class_=class_, parent=css.Element(class_="parce"))
         return self.TextFormat(self.style.select_element(e).properties())
 
+    def compile(self, actions=None):
+        """Return a :class:`CompiledTheme` with all text formats precomputed.
+
+        If ``actions`` is not given, the text formats are computed for all
+        standard actions used in the languages of the global registry (see
+        :func:`~parce.introspect.all_standardactions`). The base formats are
+        computed for all roles and states parce uses.
+
+        The CompiledTheme can be saved to disk and loaded in another process,
+        which is much faster than parsing the CSS and matching all the rules.
+
+        """
+        if actions is None:
+            from .introspect import all_standardactions
+            actions = all_standardactions()
+        from .formatter import _Unparsed
+        actions = set(actions)
+        actions.add(_Unparsed)
+        textformats = {action: self.textformat(action) for action in actions}
+        baseformats = {(role, state): self.baseformat(role, state)
+            for role in ("window", "selection", "current-line")
+                for state in ("default", "focus", "disabled")}
+        return CompiledTheme(textformats, baseformats, self.filenames(),
+            (self._filenames, self._css_text, self._css_base), self)
+
+
+class CompiledTheme(AbstractTheme):
+    """A Theme with precomputed text formats, created by :meth:`Theme.compile`.
+
+    Looking up a text format is just a dictionary lookup. For an action or role
+    that was not precomputed, the original Theme is consulted (and recreated
+    from the stylesheet(s), if needed) and the result is added to the table.
+
+    A CompiledTheme can be written to disk using :meth:`save` and read back
+    using :meth:`load`. Because the TextFormats are stored as well, it is not
+    needed to parse the CSS when a formatter is started::
+
+        >>> from parce.theme import CompiledTheme, Theme
+        >>> Theme(filename).compile().save("default.theme")
+        >>> # in another process:
+        >>> th = CompiledTheme.load("default.theme")
+        >>> th.uptodate()
+        True
+
+    """
+    def __init__(self, textformats, baseformats, filenames=(), source=None, theme=None):
+        self._textformats = textformats
+        self._baseformats = baseformats
+        self._filenames = list(filenames)
+        self._mtimes = [_mtime(f) for f in self._filenames]
+        self._source = source
+        self._theme = theme
+
+    def __repr__(self):
+        fnames = ', '.join(map(os.path.basename, self.filenames()))
+        return '<{} [{}]>'.format(self.__class__.__name__, fnames)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_theme'] = None
+        return state
+
+    def filenames(self):
+        """Return the list of filenames of the stylesheet this theme was compiled from."""
+        return self._filenames
+
+    def uptodate(self):
+        """Return True if none of the stylesheet files changed since compiling."""
+        return self._mtimes == [_mtime(f) for f in self._filenames]
+
+    def theme(self):
+        """Return the :class:`Theme` this theme was compiled from.
+
+        After loading from disk, the Theme is recreated. Returns None if the
+        source of the Theme is not known.
+
+        """
+        if self._theme is None and self._source:
+            filenames, stylesheet, basename = self._source
+            self._theme = Theme(*filenames, stylesheet=stylesheet, basename=basename)
+        return self._theme
+
+    def baseformat(self, role="window", state="default"):
+        """Return a TextFormat for a specific role and a state."""
+        try:
+            return self._baseformats[role, state]
+        except KeyError:
+            f = self._baseformats[role, state] = self.theme().baseformat(role, state)
+            return f
+
+    def textformat(self, action):
+        """Return the TextFormat for the specified action."""
+        try:
+            return self._textformats[action]
+        except KeyError:
+            f = self._textformats[action] = self.theme().textformat(action)
+            return f
+
+    def save(self, filename):
+        """Write the compiled theme to a file."""
+        with open(filename, 'wb') as f:
+            pickle.dump(self, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename):
+        """Load and return a compiled theme written by :meth:`save`."""
+        with open(filename, 'rb') as f:
+            theme = pickle.load(f)
+        if not isinstance(theme, cls):
+            raise TypeError("not a {}: {}".format(cls.__name__, filename))
+        return theme
+
 
 class TextFormat:
     """Simple textformat that reads CSS properties and supports a subset of those.
@@ -298,11 +509,15 @@ class TextFormat:
 
     def __eq__(self, other):
         """Return True if other has the same properties."""
-        return self.__dict__ == other.__dict__
+        if isinstance(other, TextFormat):
+            return self.__dict__ == other.__dict__
+        return NotImplemented
 
     def __ne__(self, other):
         """Return True if other has different properties."""
-        return self.__dict__ != other.__dict__
+        if isinstance(other, TextFormat):
+            return self.__dict__ != other.__dict__
+        return NotImplemented
 
     def css_properties(self):
         """Return a dict usable to write out a CSS rule with our properties."""
@@ -544,3 +759,11 @@ def css_class(action):
     return repr(action).lower().replace('.', ' ')
 
 
+def _mtime(filename):
+    """Return the mtime of the file, or None if it can't be determined."""
+    try:
+        return os.path.getmtime(filename)
+    except OSError:
+        return None
+
+
@@ -303,7 +303,7 @@ class Node:
         """Query this node in different ways; see the :mod:`~parce.query` module."""
         def gen():
             yield self
-        return query.Query(gen)
+        return query.Query(gen, single=True)
 
     def delete(self):
         """Remove this node from its parent.
@@ -930,6 +930,49 @@ class Context(list, Node):
             if node.is_token:
                 return node
 
+    def nodes_in(self, start=0, end=None):
+        """Yield all descendant nodes that are completely in start→end.
+
+        The nodes are yielded in document order. Child contexts that are
+        outside the range are not visited at all, the children to descend in
+        are found using a bisection algorithm.
+
+        """
+        return _nodes_in_range(self, start, end)
+
+    def tokens_in(self, start=0, end=None):
+        """Yield all descendant Tokens that are completely in start→end."""
+        return _nodes_in_range(self, start, end, contexts=False)
+
+    def contexts_in(self, start=0, end=None):
+        """Yield all descendant Contexts that are completely in start→end."""
+        return _nodes_in_range(self, start, end, tokens=False)
+
+    def tokens_overlapping(self, start=0, end=None):
+        """Yield all descendant Tokens that overlap with start→end.
+
+        The first and last tokens may extend beyond the range.
+
+        """
+        return _nodes_in_range(self, start, end, contexts=False, overlap=True)
+
+    def contexts_overlapping(self, start=0, end=None):
+        """Yield all descendant Contexts that overlap with start→end."""
+        return _nodes_in_range(self, start, end, tokens=False, overlap=True)
+
+    def columns(self, columns=None):
+        """Return a :class:`~.columns.TokenColumns` object with all our tokens.
+
+        If you specify an existing TokenColumns object, the tokens are added to
+        it and it is returned.
+
+        """
+        from .columns import TokenColumns
+        if columns is None:
+            columns = TokenColumns()
+        columns.add_tree(self)
+        return columns
+
     def range(self, start=0, end=None):
         """Return a :class:`Range`.
 
@@ -1000,9 +1043,9 @@ class Range:
         else:
             end_trail = []
         if start > 0:
-            start_trail = tree.find_token_with_trail(start)[1]
-            if not start_trail:
-                return
+            token, start_trail = tree.find_token_with_trail(start)
+            if not start_trail or (end_trail and token.pos >= end):
+                return  # no tokens in the range
             if end_trail:
                 # find the youngest common ancestor
                 for n, (i, j) in enumerate(zip(start_trail, end_trail)):
@@ -1070,6 +1113,42 @@ class Range:
 
 
 
+def _nodes_in_range(context, start, end, tokens=True, contexts=True, overlap=False):
+    """Yield descendants of context in document order that are in start→end.
+
+    If ``overlap`` is False, only nodes that are completely in the range are
+    yielded, otherwise also the nodes that partially overlap with the range.
+    Only children that overlap are descended in, so subtrees outside the range
+    are skipped.
+
+    """
+    if end is None:
+        end = context.end
+    n = context
+    i = n.find(start)
+    if i == -1:
+        return
+    stack = []
+    while True:
+        l = len(n)
+        while i < l:
+            m = n[i]
+            if m.pos >= end:
+                return  # all following nodes are outside the range
+            if m.is_context:
+                if contexts and (overlap or (m.pos >= start and m.end <= end)):
+                    yield m
+                stack.append((n, i + 1))
+                n, i, l = m, m.find(start), len(m)
+                continue
+            if tokens and (overlap or (m.pos >= start and m.end <= end)):
+                yield m
+            i += 1
+        if not stack:
+            return
+        n, i = stack.pop()
+
+
 def make_tokens(lexemes, parent=None):
     """Factory returning a tuple of one or more :class:`Token` instances for
     the lexemes.
@@ -48,6 +48,7 @@ from parce import util
 from parce.lexer import Lexer
 from parce.target import TargetFactory
 from parce.tree import Context, make_tokens
+from parce.treeindex import get_index
 from parce.treebuilderutil import (
     BuildResult, ReplaceResult, Changes, ancestors_with_index,
     get_prepared_lexer, new_tree)
@@ -384,10 +385,22 @@ class TreeBuilder(util.Observable):
         Additionally, this method calls :meth:`invalidate_context` with the
         youngest Context that had children removed or added.
 
+        If the tree has a :class:`~parce.treeindex.TreeIndex`, it is updated
+        for the modified region.
+
         """
         tree, start, end, offset, lexicons = result
 
-        if not tree.lexicon or tree.lexicon != self.root.lexicon:
+        whole = not tree.lexicon or tree.lexicon != self.root.lexicon
+
+        index = get_index(self.root)
+        if index:
+            # the region to re-index ends at the first reused tail token
+            tail = None if whole or lexicons is not None else self.root.find_token(end)
+            index_start = 0 if whole else start
+            index.remove_region(index_start, tail and tail.pos)
+
+        if whole:
             # whole tree update
             root = self.root
             for n in tree:
@@ -471,6 +484,9 @@ class TreeBuilder(util.Observable):
                 for p, i in context.ancestors_with_index():
                     self.replace_pos(p, i + 1, offset)
 
+        if index:
+            index.add_region(index_start, tail and tail.pos)
+
         return ReplaceResult(start, end + offset, lexicons)
 
     def replace_nodes(self, context, slice_, nodes):
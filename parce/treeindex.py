@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+"""
+Secondary indexes on a tree, to quickly find tokens by action or text, and
+contexts by lexicon.
+
+Create a :class:`TreeIndex` for the root context of a tree to attach an
+index to it::
+
+    >>> from parce.treeindex import TreeIndex
+    >>> index = TreeIndex(tree)
+    >>> list(index.tokens_with_action(Name.Tag))
+
+When a tree has an index, the :mod:`~parce.query` module uses it
+automatically for queries like ``tree.query.all.action(Name.Tag)``,
+``tree.query.all("text")`` and ``tree.query.all(MyLang.lexicon)``, which then
+run in O(results) instead of visiting all nodes of the tree.
+
+When the tree is updated by a :class:`~parce.treebuilder.TreeBuilder` (e.g.
+of a :class:`~parce.Document`), the index is updated incrementally: only the
+region of the tree that was re-tokenized is re-indexed.
+
+If you modify a tree manually, call :meth:`TreeIndex.rebuild` afterwards.
+
+"""
+
+import heapq
+import itertools
+import weakref
+
+
+_indexes = weakref.WeakKeyDictionary()
+
+
+def get_index(tree):
+    """Return the TreeIndex attached to the tree root context, or None."""
+    return _indexes.get(tree)
+
+
+class TreeIndex:
+    """Maps actions, token texts and lexicons to nodes of a tree.
+
+    The ``tree`` must be the root context; the index is attached to it, so
+    that it can be found using :func:`get_index`. The index keeps per key a
+    list of the nodes in document order.
+
+    """
+    def __init__(self, tree):
+        self.tree = tree    #: The root context this index is attached to.
+        self._actions = {}
+        self._texts = {}
+        self._lexicons = {}
+        self.rebuild()
+        _indexes[tree] = self
+
+    def detach(self):
+        """Remove the index from the tree."""
+        if _indexes.get(self.tree) is self:
+            del _indexes[self.tree]
+
+    def rebuild(self):
+        """Index the whole tree again."""
+        self._actions.clear()
+        self._texts.clear()
+        self._lexicons.clear()
+        self._add(*_nodes(self.tree, 0, None))
+
+    def tokens_with_action(self, *actions, start=0, end=None):
+        """Yield the tokens having one of the actions, in document order.
+
+        If ``start`` and/or ``end`` are given, only tokens completely in that
+        range are yielded.
+
+        """
+        return self._find(self._actions, actions, start, end)
+
+    def tokens_with_text(self, *texts, start=0, end=None):
+        """Yield the tokens having one of the texts, in document order."""
+        return self._find(self._texts, texts, start, end)
+
+    def contexts_with_lexicon(self, *lexicons, start=0, end=None):
+        """Yield the contexts having one of the lexicons, in document order.
+
+        The root context is never yielded.
+
+        """
+        return self._find(self._lexicons, lexicons, start, end)
+
+    def find(self, node, key, values, start=0, end=None):
+        """Yield the node and its descendants having one of the values.
+
+        This is used by the :mod:`~parce.query` module. The ``key`` is
+        "action", "text" or "lexicon". Only nodes completely in the range
+        ``start``→``end`` are yielded.
+
+        """
+        if node.is_token:
+            if key != "lexicon" and getattr(node, key) in values \
+                    and node.pos >= start and (end is None or node.end <= end):
+                yield node
+            return
+        if key == "lexicon" and node.lexicon in values and node.pos >= start \
+                and (end is None or node.end <= end):
+            yield node
+        if not node:
+            return
+        pos = max(start, node.pos)
+        end = node.end if end is None else min(end, node.end)
+        if key == "action":
+            yield from self._find(self._actions, values, pos, end)
+        elif key == "text":
+            yield from self._find(self._texts, values, pos, end)
+        else:
+            # contexts at node.pos can be ancestors of the node, or the node
+            for n in self._find(self._lexicons, values, pos, end):
+                if n.pos > node.pos or node.is_ancestor_of(n):
+                    yield n
+
+    def remove_region(self, start, end=None):
+        """Remove nodes from the index, before the tree is modified.
+
+        Removes the tokens that start in ``start``→``end`` and the contexts
+        that start in ``start``→``end`` (inclusive). If ``end`` is None, the
+        region extends to the end of the tree.
+
+        """
+        tokens, contexts = _nodes(self.tree, start, end)
+        for d, nodes in (
+                (self._actions, (t.action for t in tokens)),
+                (self._texts, (t.text for t in tokens))):
+            for key in set(nodes):
+                l = d[key]
+                del l[_bisect(l, start):_bisect(l, end)]
+                if not l:
+                    del d[key]
+        for key in set(c.lexicon for c in contexts):
+            l = self._lexicons[key]
+            del l[_bisect(l, start):_bisect(l, end, True)]
+            if not l:
+                del self._lexicons[key]
+
+    def add_region(self, start, end=None):
+        """Add nodes to the index, after the tree was modified.
+
+        Adds the nodes in the same region as :meth:`remove_region` does, but
+        with ``end`` adjusted to the modified tree.
+
+        """
+        self._add(*_nodes(self.tree, start, end))
+
+    def _add(self, tokens, contexts):
+        """Insert the tokens and contexts, that must be in document order."""
+        for d, nodes, attr in (
+                (self._actions, tokens, "action"),
+                (self._texts, tokens, "text"),
+                (self._lexicons, contexts, "lexicon")):
+            groups = {}
+            for n in nodes:
+                groups.setdefault(getattr(n, attr), []).append(n)
+            for key, group in groups.items():
+                l = d.get(key)
+                if l is None:
+                    d[key] = group
+                else:
+                    i = _bisect(l, group[0].pos)
+                    l[i:i] = group
+
+    def _find(self, d, keys, start, end):
+        """Yield nodes from the lists in d for the keys, in document order."""
+        iterators = []
+        for key in keys:
+            l = d.get(key)
+            if l:
+                iterators.append(_slice(l, start, end))
+        if len(iterators) == 1:
+            return iterators[0]
+        if d is self._lexicons:
+            return heapq.merge(*iterators, key=lambda n: (n.pos, n.depth()))
+        return heapq.merge(*iterators, key=lambda n: n.pos)
+
+
+def _bisect(nodes, pos, inclusive=False):
+    """Return the index of the first node with a pos >= ``pos``.
+
+    If ``inclusive`` is True, returns the index of the first node with a pos >
+    ``pos``. If ``pos`` is None, returns the length of the list.
+
+    """
+    if pos is None:
+        return len(nodes)
+    lo, hi = 0, len(nodes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        n = nodes[mid].pos
+        if n < pos or (inclusive and n == pos):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _slice(nodes, start, end):
+    """Yield the nodes completely in the range start→end."""
+    for i in range(_bisect(nodes, start), len(nodes)):
+        n = nodes[i]
+        if end is not None:
+            if n.pos >= end:
+                break
+            if n.end > end:
+                continue
+        yield n
+
+
+def _nodes(tree, start, end):
+    """Return two lists: tokens and contexts starting in the region.
+
+    The tokens start in start→end, the contexts (excluding the root) start in
+    start→end inclusive, so that the contexts the token at end is the first
+    token of, are included.
+
+    """
+    tokens, contexts = [], []
+    t = tree.find_token(start)
+    if t:
+        for t in itertools.chain((t,), t.forward()):
+            if t.pos < start:
+                continue
+            elif end is not None and t.pos > end:
+                break
+            elif end is None or t.pos < end:
+                tokens.append(t)
+            # find the contexts of which this token is the first token
+            chain = []
+            n = t
+            p = n.parent
+            while p is not tree and p[0] is n:
+                chain.append(p)
+                n, p = p, p.parent
+            contexts.extend(reversed(chain))
+    return tokens, contexts
@@ -49,5 +49,30 @@ h1[attribute="value"] + p {
         'width', 'height', 'color', 'background','text-decoration']
     assert tree.query.all.action(Name.Property.Definition)("color").next.next.pick() == "white"
 
+def test_select():
+    from parce.css import Element, StyleSheet
+    style = StyleSheet.from_text(r"""
+        h1 { color: red; }
+        .a.b, #x { color: green; }
+        p > .b { color: blue; }
+        * { font-weight: bold; }
+        [lang] { font-style: italic; }
+        :focus { color: black; }
+    """).style
+
+    def select(e):
+        return [rule.properties['color'][0].text if 'color' in rule.properties else None
+            for rule in style.select_element(e).rules]
+
+    assert select(Element("h1")) == ["red"]
+    assert select(Element(class_="b")) == []
+    assert select(Element(class_="b a")) == ["green"]
+    assert select(Element(class_="b", parent=Element("p"))) == ["blue"]
+    assert select(Element("h1", id="x")) == ["green", "red"]
+    assert select(Element(lang="nl")) == [None]
+    assert select(Element(pseudo_classes=["focus"])) == ["black"]
+
+
 if __name__ == "__main__":
     test_main()
+    test_select()
@@ -26,7 +26,11 @@ Tests for the docio module.
 import sys
 sys.path.insert(0, '.')
 
+import os
+import tempfile
+
 import parce
+from parce.docio import decode_chunks
 
 
 
@@ -46,7 +50,31 @@ def test_main():
     assert d.to_bytes() == b'\\header { composer = "Gabri\xc3\xabl Faur\xc3\xa9" }'
 
 
+def test_load():
+    """Test loading a file, and decoding in chunks."""
+    text = "h1 { color: r\u00e9d; }\r\n/* \u20ac */\r" * 10
+    data = text.encode("utf-8")
+    for newline in (None, "", "\n"):
+        result = text.replace("\r\n", "\n").replace("\r", "\n") if newline is None else text
+        for chunk_size in (1, 2, 3, 100):
+            assert "".join(decode_chunks(data, "utf-8", None, newline, 0, chunk_size)) == result
+
+    fd, filename = tempfile.mkstemp(suffix=".css")
+    try:
+        os.write(fd, b'\xef\xbb\xbf' + data)
+        os.close(fd)
+        d = parce.Document.load(filename)
+        assert d.text() == text.replace("\r\n", "\n").replace("\r", "\n")
+        assert d.encoding == "utf-8"
+        assert d.root_lexicon() is parce.find("css")
+        open(filename, "wb").close()
+        d = parce.Document.load(filename)
+        assert d.text() == ""
+    finally:
+        os.remove(filename)
+
 
 if __name__ == "__main__":
     test_main()
+    test_load()
 
@@ -21,7 +21,9 @@
 Testing parce.document.
 """
 
+import copy
 import os
+import random
 import sys
 
 import pytest
@@ -29,6 +31,8 @@ import pytest
 sys.path.insert(0, ".")
 
 from parce import Document, Cursor
+from parce.document import BlockIndex, ChangeList, CursorRegistry
+from parce.mutablestring import MutableString, RopeString
 
 
 def test_main():
@@ -126,6 +130,159 @@ def test_main():
     assert d.find_block_by_number(-(d.block_count()+1)) is None
 
 
+def test_rope():
+    text = "".join(random.choice("ab\n") for i in range(10000))
+    s, r = MutableString(text), RopeString(text)
+    for i in range(300):
+        start = random.randrange(len(s) + 1)
+        end = random.randrange(start, min(start + 100, len(s)) + 1)
+        text = "x\n" * random.choice((0, 1, 5, 2000))
+        s[start:end] = text
+        r[start:end] = text
+        assert len(r) == len(s)
+        pos = random.randrange(len(s) + 1)
+        for sub in "\n", "b\nx":
+            assert r.find(sub, pos) == s.find(sub, pos)
+            assert r.rfind(sub, 0, pos) == s.rfind(sub, 0, pos)
+        assert r[pos:pos+50] == s[pos:pos+50]
+    assert r.text() == s.text()
+
+    class RopeDocument(Document, RopeString):
+        pass
+    d = RopeDocument(None, "abcd\nefgh\nijkl\n")
+    d[5:5] = "12\n"
+    assert d.find_block(6).text() == "12"
+    d.undo()
+    assert d.text() == "abcd\nefgh\nijkl\n"
+
+
+def test_block_index():
+    def blocks(text):
+        pos = 0
+        for line in text.split("\n"):
+            yield pos, pos + len(line)
+            pos += len(line) + 1
+
+    d = Document(None, "ab\ncd\n" * 50)
+    d.block_count()     # creates the index
+    old_size, BlockIndex.chunk_size = BlockIndex.chunk_size, 2
+    try:
+        for i in range(200):
+            with d:
+                for pos in sorted(random.sample(range(0, len(d), 3), 2)):
+                    d[pos:pos+random.randrange(3)] = random.choice(("", "x", "\n", "y\n\nz"))
+            expected = list(blocks(d.text()))
+            assert d.block_count() == len(expected)
+            assert [(b.pos, b.end, b.block_number) for b in d.blocks()] == \
+                [(pos, end, n) for n, (pos, end) in enumerate(expected)]
+            n = random.randrange(len(expected))
+            b = d.find_block_by_number(n)
+            assert (b.pos, b.end) == expected[n]
+            assert d.find_block(b.end).block_number == n
+    finally:
+        BlockIndex.chunk_size = old_size
+
+
+def test_cursors():
+    d = Document(None, "abcdefgh")
+    c = Cursor(d, 3, 3)
+    with d:
+        d[0:0] = "XX"
+        d[4:4] = "YY"
+    assert (c.pos, c.end) == (5, 5)
+    assert d[c.pos:] == "dYYefgh"
+
+    d = Document(None, "abcdefgh" * 40)
+    old_size, CursorRegistry.bucket_size = CursorRegistry.bucket_size, 2
+    try:
+        cursors = [Cursor(d, pos, pos + random.choice((0, 3))) for pos in range(0, len(d), 5)]
+        texts = [c.text() for c in cursors]
+        for i in range(50):
+            pos = random.randrange(len(d))
+            for j, c in enumerate(cursors):
+                if c.pos <= pos <= c.end:
+                    texts[j] = d[c.pos:pos] + "x" + d[pos:c.end]
+            d[pos:pos] = "x"
+            assert [c.text() for c in cursors] == texts
+        del cursors[::2]
+        assert len(d._cursors) == 2 * len(cursors)
+        positions = d._cursors.positions()
+        assert positions == sorted(positions)
+    finally:
+        CursorRegistry.bucket_size = old_size
+
+    # copies are independent cursors
+    d = Document(None, "abcdefgh")
+    c = Cursor(d, 2, 5)
+    c2 = copy.copy(c)
+    c3 = copy.deepcopy(c)
+    assert c2 is not c and c3 is not c and c2.document() is d and c3.document() is d
+    d[0:0] = "xx"
+    assert (c.pos, c.end) == (c2.pos, c2.end) == (c3.pos, c3.end) == (4, 7)
+    c2.select(0, None)
+    del c3
+    d[0:0] = "xx"
+    assert (c.pos, c.end) == (6, 9) and (c2.pos, c2.end) == (0, None)
+    assert len(d._cursors) == 3
+
+
+def test_undo_history():
+    d = Document(None, "text\n")
+    d.modified = True
+    for c in "typing":
+        d.insert(len(d) - 1, c)
+    assert len(d._undo_stack) == 1
+    for i in range(3):
+        del d[len(d) - 2]    # backspace
+    assert len(d._undo_stack) == 2
+    d.undo()
+    assert d.text() == "texttyping\n"
+    d.undo()
+    assert d.text() == "text\n"
+    d.redo()
+    d.redo()
+    assert d.text() == "texttyp\n"
+
+    # large removed text is compressed, and the memory usage can be limited
+    text = "".join(random.choice("abcdefgh\n") for i in range(50000))
+    d = Document(None, text)
+    d.undo_memory_limit = 200000
+    d.set_text("")
+    assert type(d._undo_stack[-1][0][0][2]) is bytes
+    for i in range(20):
+        d.set_text(text[i:] + text[:i])
+    assert d.undo_memory() <= 200000
+    assert 1 < len(d._undo_stack) < 20
+    d.undo()
+    assert d.text() == text[18:] + text[:18]
+    d.undo_limit = 2
+    d.insert(0, "x")
+    assert len(d._undo_stack) == 2
+
+
+def test_bulk_replace():
+    text = "".join("line {} foo\n".format(i) for i in range(100))
+    d = Document(None, text)
+    cursors = [Cursor(d, b.pos, b.pos + 4) for b in d.blocks()][:-1]
+    cursors += [Cursor(d, b.end - 3, b.end) for b in d.blocks()][:-1]
+    d.replace("foo", "barbaz")
+    assert d.text() == text.replace("foo", "barbaz")
+    assert d.block_count() == 101
+    assert [c.text() for c in cursors] == ["line"] * 100 + ["barbaz"] * 100
+    assert len(d._undo_stack) == 1
+    assert isinstance(d._undo_stack[0][0], ChangeList)
+    d.re_sub(r"line (\d+)", r"\1:")
+    assert d.find_block_by_number(42).text() == "42: barbaz"
+    d.undo()
+    d.undo()
+    assert d.text() == text
+    assert [c.text() for c in cursors[100:]] == ["foo"] * 100
+
 
 if __name__ == "__main__":
     test_main()
+    test_rope()
+    test_block_index()
+    test_cursors()
+    test_undo_history()
+    test_bulk_replace()
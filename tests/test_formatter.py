@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.formatter.
+"""
+
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+sys.path.insert(0, ".")
+
+import parce
+import parce.action
+from parce.formatter import (
+    BlockFormatCache, Formatter, FormatRange, FormatRangeCache, MultiFormatter)
+from parce.lang.css import Css
+from parce.theme import CompiledTheme, Theme
+from parce.treebuilder import TreeBuilder
+
+
+def test_format_range_cache():
+    f = Formatter(parce.theme_by_name())
+    text = open('parce/themes/default.css').read()
+    b = TreeBuilder(Css.root)
+    b.rebuild(text)
+    cache = FormatRangeCache(f)
+    assert cache.rebuild(b.root) == list(f.format_ranges(b.root))
+
+    def paint(ranges, length):
+        l = [None] * length
+        for r in ranges:
+            l[r.pos:r.end] = [r.textformat] * (r.end - r.pos)
+        return l
+
+    painted = paint(cache.ranges(), len(text))
+    for pos, removed, added in (
+            (100, 0, "p { color: red; }"),
+            (500, 20, "/* comment */"),
+            (510, 0, "x"),
+            (511, 0, "y"),
+            (1000, 3, "{"),
+            (20, 0, '"'),
+            (0, 0, "p.a.b { }\n"),
+            (2, 1, ""),     # nothing left between the dots
+            ):
+        text = text[:pos] + added + text[pos+removed:]
+        b.rebuild(text, False, pos, removed, len(added))
+        diff = cache.update(b.root, b.start, b.end, pos, removed, len(added))
+        # applying the differences gives the new highlighting
+        painted[pos:pos+removed] = [None] * len(added)
+        for r in diff:
+            painted[r.pos:r.end] = [r.textformat] * (r.end - r.pos)
+        ranges = list(f.format_ranges(b.root))
+        assert painted == paint(ranges, len(text))
+        assert cache.ranges() == ranges
+
+
+def test_block_format_cache():
+    f = Formatter(parce.theme_by_name())
+    d = parce.Document(Css.root, open('parce/themes/default.css').read())
+    cache = BlockFormatCache(f, d)
+
+    def check():
+        root = d.get_root(True)
+        for block, ranges in cache.block_ranges():
+            assert ranges == [FormatRange(pos - block.pos, end - block.pos, tf)
+                for pos, end, tf in f.format_ranges(root, block.pos, block.end)]
+
+    check()
+    for pos, removed, added in (
+            (100, 0, "p { color: red; }\n"),
+            (500, 20, "/* comment"),
+            (510, 0, "x\n"),
+            (1000, 3, "{\n\n"),
+            (20, 0, '*/'),
+            ):
+        d[pos:pos+removed] = added
+        d.get_root(True)
+        check()
+
+
+def test_multi_formatter():
+    from parce.out.html import HtmlFormatter, SimpleHtmlFormatter, write_html_multi
+    d = parce.Document(Css.root, open('parce/themes/default.css').read())
+    tree = d.get_root(True)
+    formatters = []
+    for name in "default", "dark", "debug":
+        f = Formatter()
+        f.add_theme(parce.theme_by_name(name), None, name == "dark")
+        formatters.append(f)
+    ranges = list(MultiFormatter(formatters).format_ranges(tree, 100, 5000))
+    for i, f in enumerate(formatters):
+        ranges_i = parce.util.merge_adjacent(((pos, end, formats[i])
+            for pos, end, formats in ranges if formats[i] is not None), FormatRange)
+        assert list(ranges_i) == list(f.format_ranges(tree, 100, 5000))
+
+    formatters = [HtmlFormatter(parce.theme_by_name()), SimpleHtmlFormatter()]
+    c = parce.Cursor(d, 10, 2000)
+    files = [io.StringIO(), io.StringIO()]
+    write_html_multi(formatters, c, files)
+    for f, file in zip(formatters, files):
+        assert file.getvalue() == f.html(c)
+
+
+def test_compiled_theme():
+    theme = parce.theme_by_name()
+    compiled = theme.compile()
+    with tempfile.TemporaryDirectory() as d:
+        filename = os.path.join(d, "default.theme")
+        compiled.save(filename)
+        loaded = CompiledTheme.load(filename)
+    assert loaded.uptodate()
+    assert loaded.baseformat() == theme.baseformat()
+    for action in compiled._textformats:
+        assert loaded.textformat(action) == theme.textformat(action)
+    # an unknown action is computed by the recreated theme
+    assert loaded.textformat(parce.action.String.Foo) == theme.textformat(parce.action.String.Foo)
+
+    tree = parce.root(Css.root, open('parce/themes/default.css').read())
+    assert list(Formatter(loaded).format_ranges(tree)) == \
+           list(Formatter(theme).format_ranges(tree))
+
+
+def test_theme_reload():
+    with tempfile.TemporaryDirectory() as d:
+        shutil.copy('parce/themes/default.css', d)
+        main = os.path.join(d, "main.css")
+        imported = os.path.join(d, "default.css")
+        with open(main, "w") as f:
+            f.write('@import "default.css";\n.parce .comment { color: red; }\n')
+        theme = Theme(main)
+        assert theme.filenames() == [main, imported]
+        formatter = Formatter(theme)
+        events = []
+        formatter.connect("changed", events.append)
+        comment = formatter.textformat(parce.action.Comment)
+        string = formatter.textformat(parce.action.String)
+        assert not theme.reload_if_changed()
+
+        with open(imported, "a") as f:
+            f.write('\n.parce .string { color: blue; }\n')
+        os.utime(imported, (time.time() + 10,) * 2)
+        assert theme.is_changed()
+        assert theme.reload_if_changed()
+        assert events == [{parce.action.String}]
+        assert formatter.textformat(parce.action.Comment) is comment
+        assert formatter.textformat(parce.action.String) != string
+        assert formatter.textformat(parce.action.String) == Theme(main).textformat(parce.action.String)
+
+
+def test_html_stream():
+    from parce.out.html import HtmlFormatter, SimpleHtmlFormatter
+    d = parce.Document(Css.root, 'h1 { content: "<&>"; }\n' * 100)
+    c = parce.Cursor(d, 0, None)
+    for f in HtmlFormatter(parce.theme_by_name()), SimpleHtmlFormatter():
+        html = f.full_html(c)
+        assert '<span' in html and '&lt;&amp;&gt;' in html
+        text = io.StringIO()
+        f.write_full_html(c, text, chunk_size=100)
+        assert text.getvalue() == html
+        data = io.BytesIO()
+        f.write_full_html(c, data)
+        assert data.getvalue() == html.encode()
+
+
+def test_compact_html():
+    from parce.out.html import CompactHtmlFormatter, HtmlFormatter, inline_css
+    d = parce.Document(Css.root, open('parce/themes/default.css').read())
+    c = parce.Cursor(d, 0, None)
+    f = CompactHtmlFormatter(parce.theme_by_name())
+    html = f.full_html(c)
+    assert len(html) < len(HtmlFormatter(parce.theme_by_name()).full_html(c))
+    # every distinct format has one class, and all used classes are defined
+    styles = f.style().splitlines()
+    assert len(set(line.split(' ', 1)[1] for line in styles)) == len(styles)
+    used = set(re.findall(r'<span class="(p\d+)">', html))
+    defined = set(re.findall(r'^ *\.(p\d+) \{', html, re.M))
+    assert used == defined
+
+    c = parce.Cursor(d, 0, 10)
+    assert len(re.findall(r'^ *\.(p\d+) \{', f.full_html(c), re.M)) < len(defined)
+
+    # the PRE block gets the inline CSS of the theme's window, like HtmlFormatter
+    pre = re.search(r'<pre style="([^"]*)">', html).group(1)
+    assert pre == re.search(r'<pre style="([^"]*)">',
+        HtmlFormatter(parce.theme_by_name()).full_html(c)).group(1)
+    assert pre == "white-space: pre; " + inline_css(parce.theme_by_name().baseformat())
+    assert 'background-color' in pre and not re.search(r'\bp\d+\b', pre)
+    assert re.search(r'<style>\n( *\.p\d+ \{ [^}]* \}\n)+ *</style>', html)
+
+
+def test_parallel_html():
+    import concurrent.futures
+    from parce.out.html import CompactHtmlFormatter, HtmlFormatter
+    text = 'h1 { color: red; }\n/* a\n\nb */\n\n' * 20
+    d = parce.Document(Css.root, text)
+    with concurrent.futures.ThreadPoolExecutor(3) as executor:
+        for f in HtmlFormatter(parce.theme_by_name()), CompactHtmlFormatter(parce.theme_by_name()):
+            for f.split_size in 1, 10, 100:
+                for pos, end in (0, None), (3, 50), (20, len(text)):
+                    c = parce.Cursor(d, pos, end)
+                    assert "".join(f.html_chunks(c, executor)) == f.html(c)
+                c = parce.Cursor(d, 0, None)
+                assert "".join(f.full_html_chunks(c, executor=executor)) == f.full_html(c)
+    # the jobs can't be sent to other processes
+    with concurrent.futures.ProcessPoolExecutor(1) as executor:
+        for f in HtmlFormatter(parce.theme_by_name()), CompactHtmlFormatter(parce.theme_by_name()):
+            with pytest.raises(TypeError):
+                "".join(f.full_html_chunks(c, executor=executor))
+
+
+def test_ansi():
+    import re
+    from parce.out.ansi import AnsiFormatter, RESET
+    text = 'h1 { content: "a\nb"; }\n' * 10
+    d = parce.Document(Css.root, text)
+    c = parce.Cursor(d, 0, None)
+    for mode in "truecolor", "256":
+        f = AnsiFormatter(parce.theme_by_name('terminal'), mode)
+        lines = list(f.ansi_lines(c))
+        assert len(lines) == 20
+        assert all(line.endswith(RESET + "\n") for line in lines)
+        assert re.sub('\x1b\\[[0-9;]*m', '', "".join(lines)) == text
+        data = io.BytesIO()
+        f.write_ansi(c, data)
+        assert data.getvalue() == f.ansi(c).encode()
+
+
+if __name__ == "__main__":
+    test_format_range_cache()
+    test_block_format_cache()
+    test_multi_formatter()
+    test_compiled_theme()
+    test_theme_reload()
+    test_html_stream()
+    test_compact_html()
+    test_parallel_html()
+    test_ansi()
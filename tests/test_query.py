@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.query.
+"""
+
+import sys
+
+sys.path.insert(0, ".")
+
+import parce
+from parce.action import Comment, Name
+from parce.lang.css import Css
+from parce.query import Query, QueryCache
+from parce.treebuilder import TreeBuilder
+from parce.treeindex import TreeIndex
+
+
+def test_main():
+    filename = 'parce/themes/default.css'
+    tree = parce.root(Css.root, open(filename).read())
+
+    # reference: all nodes in document order
+    nodes = [tree]
+    def walk(context):
+        for n in context:
+            nodes.append(n)
+            if n.is_context:
+                walk(n)
+    walk(tree)
+
+    assert list(tree.query.all) == nodes
+    assert list(tree.query.alltokens) == [n for n in nodes if n.is_token]
+    assert list(tree.query.all.contexts) == [n for n in nodes if n.is_context]
+
+    # fused filters
+    assert list(tree.query.all.action(Comment).containing('e')) == [
+        n for n in nodes if n.is_token and n.action is Comment and 'e' in n.text]
+    assert list(tree.query.all.is_not(Css.rule)) == [
+        n for n in nodes if not (n.is_context and n.lexicon is Css.rule)]
+
+    # in_range pushed down into the traversal
+    for start, end in ((0, 100), (333, 1777), (1000, None)):
+        e = sys.maxsize if end is None else end
+        assert list(tree.query.all.in_range(start, end)) == [
+            n for n in nodes if n.pos >= start and n.end <= e]
+        assert list(tree.query.all.action(Name.Property.Definition).in_range(start, end)) == [
+            n for n in nodes if n.pos >= start and n.end <= e
+                and n.is_token and n.action is Name.Property.Definition]
+        assert list(tree.query.all.is_not.in_range(start, end)) == [
+            n for n in nodes if n.end <= start or n.pos >= e]
+
+    # chained in_range steps that can't be pushed down
+    children = list(tree.query.children)
+    assert list(tree.query.children.in_range(0, 100).in_range(0, 10**9)) == [
+        n for n in children if n.pos >= 0 and n.end <= 100]
+    assert list(tree.query.children.in_range(0, 10**9).in_range(0, 100)) == [
+        n for n in children if n.pos >= 0 and n.end <= 100]
+
+    # uniq and remove_descendants on ordered and unordered streams
+    parents = list(tree.query.alltokens.parent)
+    assert len(list(tree.query.alltokens.parent.uniq)) == len(set(map(id, parents)))
+    sel = tree.query.all.filter(lambda n: n.is_context or n.text == 'color')
+    assert list(sel.remove_descendants) == list(Query.from_nodes(list(sel)).remove_descendants)
+    assert list(tree.query.all.remove_descendants) == [tree]
+
+
+def test_index():
+    text = open('parce/themes/default.css').read()
+    b = TreeBuilder(Css.root)
+    b.rebuild(text)
+    tree = b.root
+    TreeIndex(tree)
+
+    def check():
+        nodes = list(Query.from_nodes([tree]).all)  # does not use the index
+        assert list(tree.query.all.action(Comment)) == [
+            n for n in nodes if n.is_token and n.action is Comment]
+        assert list(tree.query.all('color', ';')) == [
+            n for n in nodes if n.is_token and n.text in ('color', ';')]
+        assert list(tree.query.all(Css.rule, Css.declaration)) == [
+            n for n in nodes if n.is_context and n.lexicon in (Css.rule, Css.declaration)]
+        assert list(tree.query.all.action(Name.Property.Definition).in_range(300, 3000)) == [
+            n for n in nodes if n.is_token and n.action is Name.Property.Definition
+                and n.pos >= 300 and n.end <= 3000]
+
+    check()
+    # the index is updated incrementally
+    for pos, removed, added in (
+            (100, 0, "p { color: red; }"),
+            (500, 20, "/* comment */"),
+            (1000, 3, "{"),
+            (1500, 0, "}"),
+            (0, 0, '"'),
+            ):
+        text = text[:pos] + added + text[pos+removed:]
+        b.rebuild(text, False, pos, removed, len(added))
+        check()
+
+
+def test_cache():
+    text = open('parce/themes/default.css').read()
+    b = TreeBuilder(Css.root)
+    b.rebuild(text)
+    tree = b.root
+    cache = QueryCache(tree)
+    cache.connect_treebuilder(b)
+
+    calls = []
+    def selector(q):
+        calls.append(1)
+        return q.action(Name.Property.Definition)
+    cache.add("props", selector)
+    cache.add("rules", lambda q: q(Css.rule))
+
+    def check():
+        assert cache.get("props") == list(tree.query.all.action(Name.Property.Definition))
+        assert cache.get("rules") == list(tree.query.children.all(Css.rule))
+
+    check()
+    count = len(calls)
+    cache.get("props")
+    assert len(calls) == count  # fully cached
+
+    pos = text.index("color")
+    text = text[:pos] + "background-" + text[pos:]
+    b.rebuild(text, False, pos, 0, 11)
+    check()
+    assert len(calls) - count < 10  # only the changed contexts were evaluated
+
+
+if __name__ == "__main__":
+    test_main()
+    test_index()
+    test_cache()
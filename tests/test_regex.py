@@ -26,6 +26,7 @@ Test the regex module.
 import sys
 sys.path.insert(0, '.')
 
+import random
 import re
 
 from parce.regex import *
@@ -62,6 +63,60 @@ def test_main():
         assert bool(to_string(expr)) is result
 
 
+def test_words2regexp():
+    """Test large and deeply nested word lists."""
+    rnd = random.Random(0)
+    words = set()
+    while len(words) < 5000:
+        words.add(''.join(rnd.choice("abcdef") for i in range(rnd.randint(1, 12))))
+    for suffixes in True, False:
+        rx = re.compile(words2regexp(words, suffixes))
+        for w in words:
+            assert rx.fullmatch(w)
+        for w in ("g", "abcdefabcdefa", "agb"):
+            assert not rx.fullmatch(w)
+
+    # deeper than Python's recursion limit
+    n = sys.getrecursionlimit() + 10
+    words = ['a' * i for i in range(1, n)]
+    rx = re.compile(words2regexp(words))
+    assert rx.fullmatch('a' * (n - 1)) and not rx.fullmatch('a' * n)
+
+    # deeper nodes are flattened, the longest word must still match
+    words = ['a' * i for i in range(1, 20)] + ['a' * i + 'b' for i in range(1, 20, 3)]
+    rx = re.compile(build_regexp(trie_to_regexp_tuple(make_trie(words), max_depth=3)))
+    for w in words:
+        assert rx.fullmatch(w)
+        assert rx.match(w + 'c').group() == w
+
+
+def test_findwords():
+    """Test that findwords() gives the same tokens using a regexp or a set."""
+    from parce import Language, lexicon, root
+    from parce.action import Delimiter, Keyword, Name
+    from parce.rule import findwords
+
+    rnd = random.Random(0)
+    words = sorted(set(''.join(rnd.choice("abc") for i in range(rnd.randint(1, 5)))
+                       for j in range(200)))
+    text = ' '.join(rnd.choice(words) + rnd.choice(('', 'x', ' .'))
+                    for i in range(1000))
+
+    def tokens(threshold):
+        class Lang(Language):
+            @lexicon
+            def root(cls):
+                yield from findwords(words, Keyword, (Name, cls.other), threshold=threshold)
+            @lexicon
+            def other(cls):
+                yield r'\.', Delimiter, -1
+        return [(t.pos, t.text, t.action) for t in root(Lang.root, text).tokens()]
+
+    assert tokens(0) == tokens(len(words))
+
+
 if __name__ == "__main__":
     test_main()
+    test_words2regexp()
+    test_findwords()
 
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Tests for the registry module.
+"""
+
+## find parce
+
+import subprocess
+import sys
+sys.path.insert(0, '.')
+
+from parce.registry import Registry, registry
+from parce.lang import _manifest
+
+
+def test_suggest():
+    """Test the suggest index."""
+    assert registry.suggest("style.css")[0] == "parce.lang.css.Css.root"
+    assert registry.suggest("main.c")[0] == "parce.lang.c.C.root"
+    assert registry.suggest(contents='{"key": 123}')[0] == "parce.lang.json.Json.root"
+    assert registry.suggest(contents='a,b,c\n1,2,3\n')[0] == "parce.lang.csv.Csv.root"
+
+    r = Registry()
+    r.add("a.A.root", name="A", desc="A", filenames=[("*.x", 0.5), ("*.tar.x", 1)],
+        mimetypes=[("text/a", 0.5)], guesses=[(r"\bfoo\b", 0.3)])
+    r.add("b.B.root", name="B", desc="B", filenames=[("*.x", 0.6), ("B[0-9]", 0.8)],
+        guesses=[(r"\bfoo\b", 0.2), (r"bar", 0.2)])
+    assert r.suggest("f.x") == ["b.B.root", "a.A.root"]
+    assert r.suggest("f.tar.x") == ["a.A.root", "b.B.root"]
+    assert r.suggest("B1") == ["b.B.root"]
+    assert r.suggest("B10") == []
+    assert r.suggest("f.x", "text/a") == ["a.A.root", "b.B.root"]
+    assert r.suggest(contents="foo") == ["a.A.root", "b.B.root"]
+    assert r.suggest(contents="foo bar") == ["b.B.root", "a.A.root"]
+    assert r.suggest(contents="foobar") == ["b.B.root"]
+
+    # modifying the registry drops the index
+    index = r.index()
+    r.add("c.C.root", name="C", desc="C", filenames=[("*.x", 0.9)])
+    assert r.index() is not index
+    assert r.suggest("f.x")[0] == "c.C.root"
+    del r["c.C.root"]
+    assert r.suggest("f.x")[0] == "b.B.root"
+
+
+def test_manifest():
+    """Test that the generated files are up to date and no language module is imported."""
+    for filename, text in _manifest.outputs():
+        with open(filename, encoding="utf-8") as f:
+            assert f.read() == text
+
+    output = subprocess.check_output([sys.executable, "-c",
+        "import sys; sys.path.insert(0, '.'); import parce, parce.registry; "
+        "print(' '.join(sorted(m for m in sys.modules if m.split('.')[:2] == ['parce', 'lang'])))"])
+    assert output.split() == [b'parce.lang', b'parce.lang._registry']
+
+
+if __name__ == "__main__":
+    test_suggest()
+    test_manifest()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+# This file is part of the parce Python package.
+#
+# Copyright © 2019-2020 by Wilbert Berendsen <info@wilbertberendsen.nl>
+#
+# This module is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This module is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Testing parce.tree.
+"""
+
+import sys
+
+sys.path.insert(0, ".")
+
+import parce
+from parce.lang.css import Css
+from parce.lexer import Lexer
+
+
+def test_range_traversal():
+    tree = parce.root(Css.root, open('parce/themes/default.css').read())
+    nodes = []
+    def walk(context):
+        for n in context:
+            nodes.append(n)
+            if n.is_context:
+                walk(n)
+    walk(tree)
+
+    for start, end in ((0, 100), (333, 1777), (1000, None), (2000, 2001)):
+        e = tree.end if end is None else end
+        inside = [n for n in nodes if n.pos >= start and n.end <= e]
+        overlapping = [n for n in nodes if n.pos < e and n.end > start]
+        assert list(tree.nodes_in(start, end)) == inside
+        assert list(tree.tokens_in(start, end)) == [n for n in inside if n.is_token]
+        assert list(tree.contexts_in(start, end)) == [n for n in inside if n.is_context]
+        assert list(tree.tokens_overlapping(start, end)) == [n for n in overlapping if n.is_token]
+        assert list(tree.contexts_overlapping(start, end)) == [n for n in overlapping if n.is_context]
+        assert list(tree.tokens_overlapping(start, end)) == list(tree.range(start, end).tokens())
+
+    # a range between two tokens is empty
+    t = tree.find_token(1000)
+    assert tree.range(t.end, t.next_token().pos) is None
+
+
+def test_columns():
+    text = open('parce/themes/default.css').read()
+    tree = parce.root(Css.root, text)
+    c = tree.columns()
+    tokens = list(tree.tokens())
+    assert len(c) == len(tokens)
+    assert list(c.pos) == [t.pos for t in tokens]
+    assert list(c.end) == [t.end for t in tokens]
+    assert list(c.depth) == [t.depth() for t in tokens]
+    actions, lexicons = c.action_table(), c.lexicon_table()
+    assert [actions[a] for a in c.action] == [t.action for t in tokens]
+    assert [lexicons[l] for l in c.lexicon] == [t.parent.lexicon for t in tokens]
+
+    # from lexer events, without building a tree
+    c2 = Lexer([Css.root]).columns(text)
+    assert c2.columns() == c.columns()
+    assert c2.action_table() == actions and c2.lexicon_table() == lexicons
+
+
+if __name__ == "__main__":
+    test_range_traversal()
+    test_columns()